@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+import socket
+import sys
+import time
+import xmlrpc.server
+from collections import deque
+from typing import Optional
+from urllib.parse import urlsplit
+
+from calculator_binary import (BINARY_SCHEME, DEFAULT_BINARY_PORT, MAX_FRAME_SIZE, ProtocolError,
+                               decode, pack_frame)
+from calculator_client_core import validate_numbers
+from calculator_logging import add_logging_arguments, setup_logging
+from calculator_numeric import FLOAT_MODE
+from calculator_idempotency import request_fingerprint
+from calculator_server import (ADMITTED_METHODS, BUSY_ERROR, QUEUE_TIMEOUT_ERROR, AdmittedWork, CalculatorService,
+                               _register_service, add_service_arguments, service_options_from_args)
+
+logger = logging.getLogger(__name__)
+
+ASYNC_OPERATIONS = ('add', 'subtract', 'multiply', 'divide')
+
+
+class AsyncAdmissionController:
+
+    def __init__(self, slots: int = 1, max_queue: int = 0, queue_timeout: Optional[float] = None):
+        if slots < 1:
+            raise ValueError("El número de slots debe ser al menos 1")
+        self.slots = slots
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._queue = deque()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._queued = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_queue_depth = 0
+
+    async def acquire(self, timeout: Optional[float] = None) -> tuple[Optional[str], float]:
+        if timeout is None:
+            timeout = self.queue_timeout
+        if self._in_flight < self.slots and not self._queue:
+            self._in_flight += 1
+            self._admitted += 1
+            return None, 0.0
+        if len(self._queue) >= self.max_queue:
+            self._rejected += 1
+            return 'busy', 0.0
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.append(waiter)
+        self._queued += 1
+        self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                waiter.cancel()
+                self._queue.remove(waiter)
+            raise
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # El slot llegó justo al expirar el plazo: se devuelve
+                self.release()
+            else:
+                waiter.cancel()
+                self._queue.remove(waiter)
+            self._timed_out += 1
+            return 'timeout', time.monotonic() - start
+        waited = time.monotonic() - start
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return None, waited
+
+    def release(self):
+        # El slot se transfiere directamente al siguiente en la cola
+        while self._queue:
+            waiter = self._queue.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        if self._in_flight > 0:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            'slots': self.slots,
+            'max_queue': self.max_queue,
+            'queue_timeout': self.queue_timeout,
+            'in_flight': self._in_flight,
+            'queue_depth': len(self._queue),
+            'max_queue_depth': self._max_queue_depth,
+            'admitted': self._admitted,
+            'rejected': self._rejected,
+            'timed_out': self._timed_out,
+            'queued': self._queued,
+            'avg_wait': self._total_wait / self._admitted if self._admitted else 0.0,
+            'max_wait': self._max_wait,
+        }
+
+
+class AsyncCalculatorServer:
+
+    def __init__(self, host: str = 'localhost', port: int = DEFAULT_BINARY_PORT,
+                 calculator: Optional[CalculatorService] = None, **service_options):
+        self.host = host
+        self.port = port
+        self.calculator = calculator or CalculatorService(**service_options)
+        sync_admission = self.calculator._admission
+        self.admission = AsyncAdmissionController(sync_admission.slots, sync_admission.max_queue,
+                                                  sync_admission.queue_timeout)
+        self._dispatcher = xmlrpc.server.SimpleXMLRPCDispatcher(allow_none=True)
+        _register_service(self._dispatcher, self.calculator)
+        self._server = None
+
+    async def execute(self, operation: str, a, b, mode: str = FLOAT_MODE) -> dict:
+        # Mismo flujo que CalculatorService._execute_operation, pero cediendo el loop en cada delay
+        calculator = self.calculator
+        try:
+            if mode != FLOAT_MODE:
+                mode, a, b, error = calculator._exact_operands(operation, a, b, mode)
+                if error is not None:
+                    return error
+            cached = await self._journaled(calculator._cached_operation, operation, a, b, mode)
+            if cached is not None:
+                return cached
+            rejected = await self._admit(operation)
+            if rejected is not None:
+                return rejected
+            start = time.perf_counter()
+            try:
+                error = calculator._check_operands(operation, a, b, mode)
+                if error is not None:
+                    return error
+                await self._service_delay()
+                return await self._journaled(calculator._complete_operation, operation, a, b, mode)
+            finally:
+                self.admission.release()
+                calculator.metrics.service_time.observe(time.perf_counter() - start, (operation,))
+        except Exception as e:
+            return calculator._operation_error(operation, a, b, e)
+
+    async def _journaled(self, fn, *args):
+        # Registrar una operación en el journal puede esperar un fsync (--fsync always): con journal el paso
+        # va al executor para no bloquear el loop. Sin journal es inmediato y se queda en el loop
+        if self.calculator._journal is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _admit(self, operation: str) -> Optional[dict]:
+        # Igual que CalculatorService._pre_process con la admisión asyncio; None si se obtuvo el slot
+        calculator = self.calculator
+        pre_delay = calculator._pre_latency.sample()
+        if pre_delay > 0:
+            await asyncio.sleep(pre_delay)
+        failure = calculator._maybe_fail()
+        if failure is not None:
+            calculator.metrics.errors.inc((operation, 'fault'))
+            return failure
+        reason, waited = await self.admission.acquire()
+        if reason is not None:
+            calculator.metrics.rejections.inc((reason,))
+        if reason == 'busy':
+            return {'success': False, 'error': BUSY_ERROR}
+        if reason == 'timeout':
+            return {'success': False, 'error': QUEUE_TIMEOUT_ERROR}
+        calculator.metrics.queue_time.observe(waited)
+        return None
+
+    async def _service_delay(self):
+        delay = self.calculator._service_latency.sample()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def run_admitted(self, method: str, params: list) -> dict:
+        # Lotes y expresiones: la validación corre en el loop, la admisión y el delay no ocupan hilos y solo
+        # el cálculo va al executor
+        work = self.calculator.admitted_work(method, params)
+        if not isinstance(work, AdmittedWork):
+            return work
+        try:
+            rejected = await self._admit(work.label)
+            if rejected is not None:
+                return rejected
+            start = time.perf_counter()
+            try:
+                await self._service_delay()
+                return await asyncio.get_running_loop().run_in_executor(None, work.run)
+            finally:
+                self.admission.release()
+                self.calculator.metrics.service_time.observe(time.perf_counter() - start, (work.metric,))
+        except Exception as e:
+            return work.on_error(e)
+
+    async def _call_idempotent(self, key: str, method: str, params: Optional[list] = None) -> dict:
+        calculator = self.calculator
+        error = calculator._idempotency_error(key, method)
+        if error is not None:
+            return error
+        params = list(params or [])
+
+        async def call() -> dict:
+            try:
+                return await self.call(method, params)
+            except TypeError as e:
+                return {
+                    'success': False,
+                    'error': f"Error: {str(e)}"
+                }
+
+        return await calculator._idempotency.execute_async(key, request_fingerprint(method, params), call,
+                                                           calculator._is_final)
+
+    async def call(self, method: str, params: list):
+        if method in ASYNC_OPERATIONS:
+            if len(params) not in (2, 3):
+                raise TypeError(f"{method}() requiere 2 argumentos y un modo numérico opcional")
+            return await self.execute(method, *params)
+        if method in ADMITTED_METHODS:
+            return await self.run_admitted(method, params)
+        if method == 'call_idempotent':
+            return await self._call_idempotent(*params)
+        if method == 'system.multicall':
+            return await self._multicall(params[0])
+        if method == 'get_metrics_text':
+            admission = self.admission.stats()
+            return self.calculator.metrics.to_prometheus({
+                'calculator_in_flight': ('Solicitudes en ejecución', admission['in_flight']),
+                'calculator_queue_depth': ('Solicitudes en espera en la cola de admisión', admission['queue_depth']),
+            })
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self._dispatcher._dispatch, method, params)
+        if method == 'get_stats' and isinstance(result, dict) and result.get('success'):
+            result['admission'] = self.admission.stats()
+            result['server_status'] = 'running (asyncio)'
+        return result
+
+    async def _multicall(self, calls: list) -> list:
+        async def run(call):
+            try:
+                return [await self.call(call['methodName'], call['params'])]
+            except Exception as e:
+                return {'faultCode': 1, 'faultString': f"{type(e).__name__}: {str(e)}"}
+        return list(await asyncio.gather(*(run(call) for call in calls)))
+
+    async def _respond(self, request, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        request_id = None
+        try:
+            request_id, method, params = request
+            response = [request_id, 0, await self.call(method, params)]
+        except Exception as e:
+            response = [request_id, 1, f"{type(e).__name__}: {str(e)}"]
+        try:
+            writer.write(pack_frame(response))
+            async with write_lock:
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            # Las solicitudes de una misma conexión se atienden en paralelo y responden por id
+            while True:
+                header = await reader.readexactly(4)
+                length = int.from_bytes(header, 'big')
+                if length > MAX_FRAME_SIZE:
+                    raise ProtocolError(f"Trama demasiado grande: {length} bytes")
+                request = decode(await reader.readexactly(length))
+                task = asyncio.ensure_future(self._respond(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except asyncio.IncompleteReadError:
+            pass
+        except ProtocolError as e:
+            logger.error(f"Error de protocolo binario: {str(e)}")
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        logger.info(f"Servidor asyncio iniciado en calc://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+
+class AsyncCalculatorClient:
+
+    def __init__(self, server_url: str = f"calc://localhost:{DEFAULT_BINARY_PORT}", timeout: Optional[float] = None):
+        parts = urlsplit(server_url)
+        if parts.scheme != BINARY_SCHEME:
+            raise ValueError(f"AsyncCalculatorClient requiere una URL {BINARY_SCHEME}://")
+        self.server_url = server_url
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or DEFAULT_BINARY_PORT
+        self.timeout = timeout
+        self.connected = False
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._next_id = 0
+
+    async def connect(self) -> bool:
+        try:
+            logger.info(f"Conectando al servidor: {self.server_url}")
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._reader_task = asyncio.ensure_future(self._read_responses())
+            response = await self._call('ping', [])
+            if response.get('success'):
+                self.connected = True
+                logger.info("Conexión establecida exitosamente")
+                return True
+            logger.error("Error en la respuesta del servidor")
+            return False
+        except Exception as e:
+            logger.error(f"Error de conexión: {str(e)}")
+            await self.disconnect()
+            return False
+
+    async def disconnect(self):
+        self.connected = False
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending(ConnectionResetError("Conexión cerrada"))
+
+    async def __aenter__(self) -> 'AsyncCalculatorClient':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.disconnect()
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_responses(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(4)
+                payload = await self._reader.readexactly(int.from_bytes(header, 'big'))
+                request_id, is_fault, value = decode(payload)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if is_fault:
+                    future.set_exception(RuntimeError(value))
+                else:
+                    future.set_result(value)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.connected = False
+            self._fail_pending(e if isinstance(e, ConnectionError) else ConnectionResetError(str(e)))
+
+    async def _call(self, method: str, params: list):
+        if self._writer is None:
+            raise ConnectionError("No hay conexión con el servidor")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        # Si el envío falla (conexión cortada en drain) la entrada también se quita de _pending
+        try:
+            self._writer.write(pack_frame([request_id, method, params]))
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _execute_operation(self, operation: str, a: str, b: str) -> dict:
+        if not self.connected:
+            return {
+                'success': False,
+                'error': 'No hay conexión con el servidor'
+            }
+        num_a, num_b, error = validate_numbers(a, b)
+        if error:
+            return {
+                'success': False,
+                'error': error
+            }
+        try:
+            return await self._call(operation, [num_a, num_b])
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Error en la comunicación: {str(e)}"
+            }
+
+    async def add(self, a: str, b: str) -> dict:
+        return await self._execute_operation('add', a, b)
+
+    async def subtract(self, a: str, b: str) -> dict:
+        return await self._execute_operation('subtract', a, b)
+
+    async def multiply(self, a: str, b: str) -> dict:
+        return await self._execute_operation('multiply', a, b)
+
+    async def divide(self, a: str, b: str) -> dict:
+        return await self._execute_operation('divide', a, b)
+
+    async def _simple_call(self, method: str, error_prefix: str) -> dict:
+        if not self.connected:
+            return {
+                'success': False,
+                'error': 'No hay conexión con el servidor'
+            }
+        try:
+            return await self._call(method, [])
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"{error_prefix}: {str(e)}"
+            }
+
+    async def get_stats(self) -> dict:
+        return await self._simple_call('get_stats', 'Error al obtener estadísticas')
+
+    async def ping(self) -> dict:
+        return await self._simple_call('ping', 'Error en ping')
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calculadora RPC Server (asyncio, protocolo calc://)')
+    parser.add_argument('--host', default='localhost', help='Dirección del servidor (default: localhost)')
+    parser.add_argument('--port', type=int, default=DEFAULT_BINARY_PORT,
+                        help=f'Puerto del servidor (default: {DEFAULT_BINARY_PORT})')
+    add_service_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+
+    server = AsyncCalculatorServer(args.host, args.port, **service_options_from_args(args))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Servidor detenido por el usuario")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Error al iniciar el servidor: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
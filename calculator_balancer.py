@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+import random
+import threading
+import time
+import logging
+import xmlrpc.client
+from typing import Optional
+
+from calculator_constants import BUSY_ERROR
+from calculator_transport import create_proxy, close_proxy, resolve_method
+
+logger = logging.getLogger(__name__)
+
+BALANCING_POLICIES = ('round_robin', 'least_outstanding', 'p2c')
+
+
+class Backend:
+
+    def __init__(self, url: str, proxy):
+        self.url = url
+        self.proxy = proxy
+        self.outstanding = 0
+        self.requests = 0
+        self.busy_rejections = 0
+        self.failures = 0
+        self.unavailable_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.unavailable_until
+
+    def stats(self, now: float) -> dict:
+        return {
+            'url': self.url,
+            'available': self.available(now),
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'busy_rejections': self.busy_rejections,
+            'failures': self.failures,
+        }
+
+
+def is_busy_response(result) -> bool:
+    return isinstance(result, dict) and not result.get('success') and result.get('error') == BUSY_ERROR
+
+
+class BalancedServerProxy:
+    # Reparte las llamadas entre varios servidores; los que responden "proceso en ejecución"
+    # o fallan a nivel de transporte salen de rotación por un tiempo
+
+    def __init__(self, urls: list, policy: str = 'round_robin', pool_size: int = 4,
+                 timeout: Optional[float] = None, busy_cooldown: float = 1.0,
+                 failure_cooldown: float = 5.0, seed: Optional[int] = None):
+        if not urls:
+            raise ValueError("Se requiere al menos un servidor")
+        if policy not in BALANCING_POLICIES:
+            raise ValueError(f"Política de balanceo inválida: {policy}")
+        self.policy = policy
+        self.busy_cooldown = busy_cooldown
+        self.failure_cooldown = failure_cooldown
+        self.backends = [Backend(url, create_proxy(url, pool_size=pool_size, timeout=timeout)) for url in urls]
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._next = 0
+
+    def _choose(self, exclude: set) -> Backend:
+        with self._lock:
+            now = time.monotonic()
+            candidates = [b for b in self.backends if b not in exclude and b.available(now)]
+            if not candidates:
+                # Todos fuera de rotación: se usa el que vuelve antes
+                candidates = [b for b in self.backends if b not in exclude] or self.backends
+                candidates = [min(candidates, key=lambda b: b.unavailable_until)]
+            if self.policy == 'round_robin' or len(candidates) == 1:
+                backend = candidates[self._next % len(candidates)]
+                self._next += 1
+            elif self.policy == 'least_outstanding':
+                offset = self._next % len(candidates)
+                self._next += 1
+                rotated = candidates[offset:] + candidates[:offset]
+                backend = min(rotated, key=lambda b: b.outstanding)
+            else:
+                first, second = self._rng.sample(candidates, 2)
+                backend = first if first.outstanding <= second.outstanding else second
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _finish(self, backend: Backend, busy: bool = False, failed: bool = False):
+        with self._lock:
+            backend.outstanding -= 1
+            if busy:
+                backend.busy_rejections += 1
+                backend.unavailable_until = time.monotonic() + self.busy_cooldown
+            elif failed:
+                backend.failures += 1
+                backend.unavailable_until = time.monotonic() + self.failure_cooldown
+
+    def _call(self, name: str, args: tuple):
+        tried = set()
+        result = None
+        # Un rechazo por ocupado o una conexión rechazada significan que la operación no se ejecutó,
+        # así que se puede intentar en otro servidor
+        while len(tried) < len(self.backends):
+            backend = self._choose(tried)
+            tried.add(backend)
+            try:
+                result = resolve_method(backend.proxy, name)(*args)
+            except xmlrpc.client.Fault:
+                self._finish(backend)
+                raise
+            except ConnectionRefusedError:
+                self._finish(backend, failed=True)
+                logger.warning(f"Servidor {backend.url} no disponible, se saca de rotación")
+                if len(tried) == len(self.backends):
+                    raise
+                continue
+            except Exception:
+                self._finish(backend, failed=True)
+                raise
+            busy = is_busy_response(result)
+            self._finish(backend, busy=busy)
+            if not busy:
+                return result
+        return result
+
+    def mark_unavailable(self, backend: Backend, cooldown: Optional[float] = None):
+        with self._lock:
+            backend.failures += 1
+            backend.unavailable_until = time.monotonic() + (self.failure_cooldown if cooldown is None else cooldown)
+
+    def check_health(self) -> list:
+        # Hace ping a cada servidor; los que no responden salen de rotación. Retorna las URLs sanas
+        healthy = []
+        for backend in self.backends:
+            try:
+                response = backend.proxy.ping()
+                if isinstance(response, dict) and response.get('success'):
+                    healthy.append(backend.url)
+                    with self._lock:
+                        if backend.failures and backend.unavailable_until > time.monotonic():
+                            backend.unavailable_until = 0.0
+                    continue
+            except Exception as e:
+                logger.warning(f"Servidor {backend.url} no responde: {str(e)}")
+            self.mark_unavailable(backend)
+        return healthy
+
+    def __getattr__(self, name: str) -> '_BalancedMethod':
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _BalancedMethod(self, name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'policy': self.policy,
+                'backends': [b.stats(now) for b in self.backends],
+            }
+
+    def close(self):
+        for backend in self.backends:
+            close_proxy(backend.proxy)
+
+
+class _BalancedMethod:
+
+    def __init__(self, balancer: BalancedServerProxy, name: str):
+        self._balancer = balancer
+        self._name = name
+
+    def __getattr__(self, name: str) -> '_BalancedMethod':
+        return _BalancedMethod(self._balancer, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        return self._balancer._call(self._name, args)
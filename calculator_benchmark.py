@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import random
+import signal
+import sys
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from calculator_binary import BINARY_SCHEME
+from calculator_latency import derive_seed
+from calculator_logging import set_log_level, setup_logging
+from calculator_metrics import Counter, Histogram
+from calculator_server import (BUSY_ERROR, QUEUE_TIMEOUT_ERROR, SERVING_MODES, _serve_prefork,
+                               add_service_arguments, create_binary_server, create_server, resolve_workers,
+                               service_options_from_args)
+from calculator_transport import close_proxy, create_proxy
+from calculator_vector import normalize_operation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = 'add=1,subtract=1,multiply=1,divide=1'
+DEFAULT_LOCAL_WORKERS = 8
+
+
+def parse_mix(spec: str) -> list:
+    # "add=3,divide=1" -> [('add', 3.0), ('divide', 1.0)]; el peso es opcional
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition('=')
+        name = name.strip()
+        operation = name if name == 'ping' else normalize_operation(name)
+        if operation is None:
+            raise ValueError(f"Operación inválida en la mezcla: {name}")
+        weight = float(weight) if weight else 1.0
+        if weight < 0:
+            raise ValueError(f"Peso negativo para {name}")
+        mix.append((operation, weight))
+    if not mix or sum(weight for _, weight in mix) <= 0:
+        raise ValueError("La mezcla de operaciones está vacía")
+    return mix
+
+
+def classify(response) -> str:
+    if not isinstance(response, dict):
+        return 'error'
+    if response.get('success'):
+        return 'ok'
+    if response.get('error') == BUSY_ERROR:
+        return 'busy'
+    if response.get('error') == QUEUE_TIMEOUT_ERROR:
+        return 'queue_timeout'
+    return 'error'
+
+
+def local_workers(mode: str, workers: Optional[int] = None) -> int:
+    # Sin --workers se comparan los modos con DEFAULT_LOCAL_WORKERS hilos o procesos; single usa uno solo
+    if workers is None:
+        workers = 1 if mode == 'single' else DEFAULT_LOCAL_WORKERS
+    return resolve_workers(mode, workers)
+
+
+class LocalServer:
+    # Levanta un servidor en este proceso (o un maestro pre-fork hijo en modo process) para el benchmark
+
+    def __init__(self, host: str, port: int, mode: str, workers: Optional[int], binary: bool, **service_options):
+        self.mode = mode
+        self.workers = workers = local_workers(mode, workers)
+        self.server = create_server(host, port, mode, workers, **service_options)
+        self.binary_server = None
+        self._pid = None
+        port = self.server.server_address[1]
+        if binary:
+            self.binary_server = create_binary_server(host, 0, self.server.calculator)
+            self.url = f"{BINARY_SCHEME}://{host}:{self.binary_server.server_address[1]}"
+        else:
+            self.url = f"http://{host}:{port}"
+        if mode == 'process':
+            if binary:
+                raise ValueError("El protocolo binario no está disponible en modo process")
+            self._pid = os.fork()
+            if self._pid == 0:
+                try:
+                    _serve_prefork(self.server, workers)
+                except KeyboardInterrupt:
+                    pass
+                finally:
+                    os._exit(0)
+            self.server.server_close()
+        else:
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            if self.binary_server is not None:
+                threading.Thread(target=self.binary_server.serve_forever, daemon=True).start()
+
+    def close(self):
+        if self._pid is not None:
+            # El maestro pre-fork termina a sus workers al recibir SIGINT
+            os.kill(self._pid, signal.SIGINT)
+            os.waitpid(self._pid, 0)
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        if self.binary_server is not None:
+            self.binary_server.shutdown()
+            self.binary_server.server_close()
+
+
+class Benchmark:
+
+    def __init__(self, url: str, clients: int = 8, duration: float = 10.0, requests: Optional[int] = None,
+                 rate: Optional[float] = None, mix: str = DEFAULT_MIX, timeout: Optional[float] = 30.0,
+                 seed: Optional[int] = None):
+        if clients < 1:
+            raise ValueError("Se requiere al menos 1 cliente")
+        self.url = url
+        self.clients = clients
+        self.duration = duration
+        self.requests = requests
+        self.rate = rate
+        self.mix = parse_mix(mix)
+        self.timeout = timeout
+        self.seed = seed
+        self.latency = Histogram('benchmark_latency_seconds', 'Latencia observada por el cliente', ('operation',))
+        self.outcomes = Counter('benchmark_requests_total', 'Solicitudes por resultado', ('operation', 'outcome'))
+        self._local = threading.local()
+        self._proxies = []
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _proxy(self):
+        proxy = getattr(self._local, 'proxy', None)
+        if proxy is None:
+            proxy = create_proxy(self.url, timeout=self.timeout)
+            self._local.proxy = proxy
+            with self._lock:
+                self._proxies.append(proxy)
+        return proxy
+
+    def _rng(self, stream: int) -> random.Random:
+        return random.Random(derive_seed(self.seed, stream) if self.seed is not None else None)
+
+    def _next_request(self, rng: random.Random) -> tuple:
+        operations = [operation for operation, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        operation = rng.choices(operations, weights)[0]
+        if operation == 'ping':
+            return operation, ()
+        return operation, (rng.randint(1, 1000), rng.randint(1, 1000))
+
+    def _claim(self) -> bool:
+        if self.requests is None:
+            return True
+        with self._lock:
+            if self._issued >= self.requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _issue(self, operation: str, args: tuple, start: float):
+        # En lazo abierto start es el instante programado, así la espera local también cuenta como latencia
+        try:
+            outcome = classify(getattr(self._proxy(), operation)(*args))
+        except Exception:
+            outcome = 'exception'
+            self._local.proxy = None
+        self.latency.observe(time.perf_counter() - start, (operation,))
+        self.outcomes.inc((operation, outcome))
+
+    def _closed_loop_client(self, index: int, deadline: float):
+        rng = self._rng(100 + index)
+        while time.perf_counter() < deadline and self._claim():
+            operation, args = self._next_request(rng)
+            self._issue(operation, args, time.perf_counter())
+
+    def _run_closed_loop(self, deadline: float):
+        threads = [threading.Thread(target=self._closed_loop_client, args=(i, deadline), daemon=True)
+                   for i in range(self.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _run_open_loop(self, deadline: float):
+        # Llegadas de Poisson a la tasa pedida, independientes de si el servidor ya respondió
+        rng = self._rng(99)
+        with ThreadPoolExecutor(max_workers=self.clients, thread_name_prefix='bench-client') as executor:
+            scheduled = time.perf_counter()
+            while scheduled < deadline and self._claim():
+                now = time.perf_counter()
+                if scheduled > now:
+                    time.sleep(scheduled - now)
+                operation, args = self._next_request(rng)
+                executor.submit(self._issue, operation, args, scheduled)
+                scheduled += rng.expovariate(self.rate)
+
+    def run(self) -> dict:
+        deadline_span = self.duration if self.duration else float('inf')
+        start = time.perf_counter()
+        if self.rate:
+            self._run_open_loop(start + deadline_span)
+        else:
+            self._run_closed_loop(start + deadline_span)
+        elapsed = time.perf_counter() - start
+        for proxy in self._proxies:
+            close_proxy(proxy)
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        outcomes = {}
+        per_operation = {}
+        for (operation, outcome), count in self.outcomes.values().items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + count
+            per_operation.setdefault(operation, {})[outcome] = count
+        total = sum(outcomes.values())
+        rejected = outcomes.get('busy', 0) + outcomes.get('queue_timeout', 0)
+        failed = outcomes.get('error', 0) + outcomes.get('exception', 0)
+        latency = {operation: summary for (operation,), summary in self.latency.summary().items()}
+        latency['all'] = self.latency.combined()
+        for operation, counts in per_operation.items():
+            latency[operation]['outcomes'] = counts
+        return {
+            'config': {
+                'url': self.url,
+                'loop': 'open' if self.rate else 'closed',
+                'clients': self.clients,
+                'rate': self.rate,
+                'duration': self.duration,
+                'requests': self.requests,
+                'mix': dict(self.mix),
+                'seed': self.seed,
+            },
+            'elapsed': elapsed,
+            'total_requests': total,
+            'throughput': outcomes.get('ok', 0) / elapsed if elapsed else 0.0,
+            'offered_rate': total / elapsed if elapsed else 0.0,
+            'rejection_rate': rejected / total if total else 0.0,
+            'error_rate': failed / total if total else 0.0,
+            'outcomes': outcomes,
+            'latency': latency,
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de la Calculadora RPC')
+    parser.add_argument('--url', default=None,
+                        help='Servidor a medir (http:// o calc://); sin --url se levanta uno en este proceso')
+    parser.add_argument('--clients', type=int, default=8,
+                        help='Clientes concurrentes (hilos con su propia conexión) (default: 8)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Segundos de carga; 0 sin límite de tiempo (default: 10)')
+    parser.add_argument('--requests', type=int, default=None,
+                        help='Total de solicitudes a enviar (default: sin límite, se usa --duration)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Solicitudes por segundo en lazo abierto; sin --rate cada cliente espera su '
+                             'respuesta antes de enviar la siguiente (lazo cerrado)')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f'Mezcla de operaciones con pesos, p. ej. add=3,divide=1,ping=1 (default: {DEFAULT_MIX})')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Timeout de cada llamada en segundos (default: 30)')
+    parser.add_argument('--output', default=None,
+                        help='Archivo donde guardar el reporte JSON (default: stdout)')
+    local = parser.add_argument_group('servidor local (sin --url)')
+    local.add_argument('--host', default='localhost', help='Dirección del servidor local (default: localhost)')
+    local.add_argument('--port', type=int, default=0, help='Puerto del servidor local; 0 elige uno libre (default: 0)')
+    local.add_argument('--mode', choices=SERVING_MODES, default='thread',
+                       help='Modo de servicio del servidor local (default: thread)')
+    local.add_argument('--workers', type=int, default=None,
+                       help='Hilos o procesos worker del servidor local; en thread, 0 crea un hilo por conexión '
+                            f'(default: {DEFAULT_LOCAL_WORKERS}, 1 en single)')
+    local.add_argument('--binary', action='store_true',
+                       help='Usar el protocolo binario calc:// con el servidor local')
+    add_service_arguments(local)
+    parser.set_defaults(latency='zero', slots=8)
+
+    args = parser.parse_args()
+    if args.requests is None and not args.duration:
+        parser.error("Se requiere --duration o --requests")
+    # El servidor local solo reporta advertencias para no competir con la carga medida
+    setup_logging('WARNING')
+    set_log_level('INFO', __name__)
+
+    server = None
+    try:
+        url = args.url
+        if url is None:
+            server = LocalServer(args.host, args.port, args.mode, args.workers, args.binary,
+                                 **service_options_from_args(args))
+            url = server.url
+        logger.info(f"Benchmark contra {url} con {args.clients} clientes")
+        benchmark = Benchmark(url, args.clients, args.duration, args.requests, args.rate, args.mix,
+                              args.timeout, args.seed)
+        report = benchmark.run()
+        if server is not None:
+            report['server'] = {'mode': args.mode, 'workers': server.workers,
+                                **service_options_from_args(args)}
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"Error en el benchmark: {str(e)}")
+        sys.exit(1)
+    finally:
+        if server is not None:
+            server.close()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
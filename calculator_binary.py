@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+import socket
+import socketserver
+import struct
+import threading
+import logging
+import xmlrpc.client
+import xmlrpc.server
+from typing import Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+BINARY_SCHEME = 'calc'
+DEFAULT_BINARY_PORT = 8100
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Trama: longitud (uint32 big-endian) + carga codificada
+# Solicitud: [id, método, [parámetros]]   Respuesta: [id, 0, resultado] o [id, 1, mensaje de fallo]
+_FRAME_HEADER = struct.Struct('>I')
+_INT64 = struct.Struct('>q')
+_FLOAT64 = struct.Struct('>d')
+_UINT32 = struct.Struct('>I')
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _encode_into(value, out: bytearray):
+    if value is None:
+        out += b'N'
+    elif value is True:
+        out += b'T'
+    elif value is False:
+        out += b'F'
+    elif isinstance(value, int):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            out += b'i'
+            out += _INT64.pack(value)
+        else:
+            data = str(value).encode('ascii')
+            out += b'I'
+            out += _UINT32.pack(len(data))
+            out += data
+    elif isinstance(value, float):
+        out += b'd'
+        out += _FLOAT64.pack(value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out += b's'
+        out += _UINT32.pack(len(data))
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'b'
+        out += _UINT32.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += b'l'
+        out += _UINT32.pack(len(value))
+        for item in value:
+            _encode_into(item, out)
+    elif isinstance(value, dict):
+        out += b'm'
+        out += _UINT32.pack(len(value))
+        for key, item in value.items():
+            _encode_into(str(key), out)
+            _encode_into(item, out)
+    else:
+        raise TypeError(f"No se puede serializar el tipo {type(value).__name__}")
+
+
+def encode(value) -> bytes:
+    out = bytearray()
+    _encode_into(value, out)
+    return bytes(out)
+
+
+def _decode_from(data: memoryview, pos: int):
+    tag = data[pos]
+    pos += 1
+    if tag == 0x4E:  # N
+        return None, pos
+    if tag == 0x54:  # T
+        return True, pos
+    if tag == 0x46:  # F
+        return False, pos
+    if tag == 0x69:  # i
+        return _INT64.unpack_from(data, pos)[0], pos + 8
+    if tag == 0x64:  # d
+        return _FLOAT64.unpack_from(data, pos)[0], pos + 8
+    if tag in (0x73, 0x49, 0x62, 0x6C, 0x6D):
+        (length,) = _UINT32.unpack_from(data, pos)
+        pos += 4
+        if tag == 0x73:  # s
+            return str(data[pos:pos + length], 'utf-8'), pos + length
+        if tag == 0x49:  # I
+            return int(str(data[pos:pos + length], 'ascii')), pos + length
+        if tag == 0x62:  # b
+            return bytes(data[pos:pos + length]), pos + length
+        if tag == 0x6C:  # l
+            items = []
+            for _ in range(length):
+                item, pos = _decode_from(data, pos)
+                items.append(item)
+            return items, pos
+        result = {}
+        for _ in range(length):
+            key, pos = _decode_from(data, pos)
+            result[key], pos = _decode_from(data, pos)
+        return result, pos
+    raise ProtocolError(f"Etiqueta desconocida en la trama: {tag:#x}")
+
+
+def decode(data: bytes):
+    try:
+        value, pos = _decode_from(memoryview(data), 0)
+    except (IndexError, struct.error, UnicodeDecodeError, ValueError) as e:
+        raise ProtocolError(f"Trama inválida: {str(e)}")
+    if pos != len(data):
+        raise ProtocolError("Trama inválida: datos sobrantes")
+    return value
+
+
+def pack_frame(value) -> bytes:
+    payload = encode(value)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+def read_frame(stream) -> Optional[bytes]:
+    header = stream.read(_FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _FRAME_HEADER.size:
+        raise ProtocolError("Conexión cerrada a mitad de trama")
+    (length,) = _FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Trama demasiado grande: {length} bytes")
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise ProtocolError("Conexión cerrada a mitad de trama")
+    return payload
+
+
+def dispatch_request(dispatcher, request) -> list:
+    # Ejecuta [id, método, parámetros] sobre un SimpleXMLRPCDispatcher y arma la respuesta
+    request_id = None
+    try:
+        request_id, method, params = request
+        return [request_id, 0, dispatcher._dispatch(method, params)]
+    except xmlrpc.client.Fault as fault:
+        return [request_id, 1, fault.faultString]
+    except Exception as e:
+        return [request_id, 1, f"{type(e).__name__}: {str(e)}"]
+
+
+class BinaryRequestHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        # Conexión persistente: se atienden tramas hasta que el cliente cierre
+        while True:
+            try:
+                payload = read_frame(self.rfile)
+                if payload is None:
+                    return
+                response = dispatch_request(self.server, decode(payload))
+                self.wfile.write(pack_frame(response))
+            except ProtocolError as e:
+                logger.error(f"Error de protocolo binario desde {self.client_address[0]}: {str(e)}")
+                return
+            except (ConnectionError, OSError):
+                return
+
+
+class BinaryRPCServer(socketserver.ThreadingMixIn, socketserver.TCPServer,
+                      xmlrpc.server.SimpleXMLRPCDispatcher):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, addr, bind_and_activate: bool = True):
+        xmlrpc.server.SimpleXMLRPCDispatcher.__init__(self, allow_none=True)
+        socketserver.TCPServer.__init__(self, addr, BinaryRequestHandler, bind_and_activate)
+
+
+class _BinaryMethod:
+
+    def __init__(self, proxy: 'BinaryServerProxy', name: str):
+        self._proxy = proxy
+        self._name = name
+
+    def __getattr__(self, name: str) -> '_BinaryMethod':
+        return _BinaryMethod(self._proxy, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        return self._proxy._request(self._name, list(args))
+
+
+class BinaryServerProxy:
+
+    def __init__(self, url: str, timeout: Optional[float] = None):
+        parts = urlsplit(url)
+        if parts.scheme != BINARY_SCHEME:
+            raise ValueError(f"Esquema no soportado para el protocolo binario: {parts.scheme}")
+        self.url = url
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or DEFAULT_BINARY_PORT
+        self.timeout = timeout
+        self._sock = None
+        self._rfile = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rfile = self._sock.makefile('rb')
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._rfile is not None:
+            self._rfile.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._rfile = None
+
+    def _request(self, method: str, params: list):
+        with self._lock:
+            self._next_id += 1
+            frame = pack_frame([self._next_id, method, params])
+            # Un reintento solo si la conexión persistente ya estaba cerrada: falla el envío o llega EOF sin
+            # ningún byte de respuesta. Un timeout o un corte a mitad de respuesta pueden llegar después de que
+            # el servidor ejecutó la solicitud; esos quedan a cargo del llamador (idempotencia y reintentos)
+            for attempt in range(2):
+                reused = self._sock is not None
+                if not reused:
+                    self._connect()
+                try:
+                    self._sock.sendall(frame)
+                except TimeoutError:
+                    self._close()
+                    raise
+                except OSError:
+                    self._close()
+                    if attempt or not reused:
+                        raise
+                    continue
+                try:
+                    payload = read_frame(self._rfile)
+                except Exception:
+                    self._close()
+                    raise
+                if payload is not None:
+                    break
+                self._close()
+                if attempt or not reused:
+                    raise ConnectionResetError("El servidor cerró la conexión")
+        _, is_fault, value = decode(payload)
+        if is_fault:
+            raise xmlrpc.client.Fault(1, value)
+        return value
+
+    def __getattr__(self, name: str) -> _BinaryMethod:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _BinaryMethod(self, name)
+
+    def __enter__(self) -> 'BinaryServerProxy':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+CACHE_POLICIES = ('lru', 'fifo')
+
+MISSING = object()
+
+
+class ResultCache:
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, policy: str = 'lru'):
+        if max_entries < 1:
+            raise ValueError("El caché debe admitir al menos 1 entrada")
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Política de caché inválida: {policy}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.policy = policy
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            if self.policy == 'lru':
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (value, expires)
+                if self.policy == 'lru':
+                    self._entries.move_to_end(key)
+                return
+            self._entries[key] = (value, expires)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'policy': self.policy,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+
+import time
+import logging
+import xmlrpc.client
+from typing import Callable, Iterator, Optional
+
+from calculator_idempotency import IDEMPOTENT_METHODS, new_idempotency_key
+from calculator_metrics import Histogram
+from calculator_numeric import FLOAT_MODE, NumericError, encode_value, parse_operand, resolve_mode
+from calculator_retry import SAFE_METHODS, RetryPolicy
+from calculator_transport import create_proxy, close_proxy, resolve_method
+
+logger = logging.getLogger(__name__)
+
+CLIENT_OPERATIONS = {
+    'add': ('suma', '+'),
+    'subtract': ('resta', '-'),
+    'multiply': ('multiplicación', '*'),
+    'divide': ('división', '/'),
+}
+
+CLIENT_MESSAGES = {
+    'connecting': "Conectando al servidor: {url}",
+    'connected': "Conexión establecida exitosamente",
+    'refused': "No se pudo conectar al servidor en {url}",
+    'refused_hint': "Asegúrate de que el servidor esté ejecutándose",
+    'disconnected': "Desconectado del servidor",
+    'not_connected': "No hay conexión con el servidor",
+    'sending': "Enviando petición de {name}: {a} {symbol} {b}",
+    'received': "Resultado recibido: {result}",
+    'server_error': "Error del servidor: {error}",
+    'communication_error': "Error en la comunicación: {error}",
+    'stats': "Solicitando estadísticas del servidor",
+    'stats_error': "Error al obtener estadísticas: {error}",
+}
+
+# Un middleware recibe (método, argumentos, siguiente) y retorna el resultado de la llamada;
+# así se agregan reintentos, medición de tiempos o trazas sin tocar cada operación
+Middleware = Callable[[str, tuple, Callable[[], object]], object]
+
+
+def validate_numbers(a: str, b: str, mode: str = FLOAT_MODE) -> tuple[Optional[float], Optional[float], Optional[str]]:
+    # Validación de operandos compartida por los clientes síncrono y asíncrono
+    if mode != FLOAT_MODE:
+        return _validate_exact(a, b, mode)
+    try:
+        num_a = float(a)
+        num_b = float(b)
+
+        if num_a < -1000000 or num_a > 1000000:
+            return None, None, "Error: El primer número debe estar entre -1,000,000 y 1,000,000"
+
+        if num_b < -1000000 or num_b > 1000000:
+            return None, None, "Error: El segundo número debe estar entre -1,000,000 y 1,000,000"
+
+        return num_a, num_b, None
+    except ValueError as e:
+        return None, None, f"Error: Los valores deben ser números válidos. {str(e)}"
+
+
+def _validate_exact(a: str, b: str, mode: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    # Sin el límite de ±1,000,000: se valida el formato aquí y el servidor hace el cálculo exacto
+    try:
+        return encode_value(parse_operand(a, mode)), encode_value(parse_operand(b, mode)), None
+    except NumericError as e:
+        return None, None, f"Error: {str(e)}"
+
+
+class CallTimer:
+    # Middleware que mide la latencia de cada llamada vista desde el cliente
+
+    def __init__(self):
+        self.histogram = Histogram('client_call_seconds', 'Latencia de las llamadas del cliente', ('method',))
+
+    def __call__(self, method: str, args: tuple, call: Callable[[], object]):
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self.histogram.observe(time.perf_counter() - start, (method,))
+
+    def summary(self) -> dict:
+        return {key[0]: summary for key, summary in self.histogram.summary().items()}
+
+
+class CalculatorClientCore:
+    # Lógica compartida por los clientes: conexión con cualquier transporte de create_proxy (http://,
+    # calc://, inproc://, con o sin pool), validación, despacho de operaciones, lotes y middlewares.
+    # Cada cliente solo define sus mensajes en MESSAGES
+
+    MESSAGES = CLIENT_MESSAGES
+
+    def __init__(self, server_url: Optional[str] = None, pool_size: int = 0, timeout: Optional[float] = None,
+                 middlewares: Optional[list] = None, mode: str = FLOAT_MODE, idempotent: bool = False,
+                 **pool_options):
+        self.server_url = server_url
+        self.server_info = None
+        self.proxy = None
+        self.connected = False
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pool_options = pool_options
+        self.middlewares = list(middlewares or [])
+        self.mode = resolve_mode(mode)
+        # Con idempotent cada operación lleva una clave propia y el servidor no la ejecuta dos veces
+        self.idempotent = idempotent
+
+    def _message(self, key: str, **values) -> str:
+        return self.MESSAGES[key].format(**values)
+
+    def add_middleware(self, middleware: Middleware):
+        # El primero agregado es el más externo
+        self.middlewares.append(middleware)
+
+    def enable_timing(self) -> CallTimer:
+        timer = CallTimer()
+        self.add_middleware(timer)
+        return timer
+
+    def _retry_safe(self, method: str) -> bool:
+        # Tras un error de transporte solo se repite lo que no puede ejecutarse dos veces: consultas o
+        # llamadas que llevan clave de idempotencia (los lotes llevan una por operación)
+        if method in SAFE_METHODS:
+            return True
+        return self.idempotent and (method in IDEMPOTENT_METHODS or method == 'system.multicall')
+
+    def enable_retries(self, **options) -> RetryPolicy:
+        # max_retries, base_delay, max_delay, jitter, deadline, retry_on, budget (ver RetryPolicy)
+        policy = RetryPolicy(is_safe=self._retry_safe, **options)
+        self.add_middleware(policy)
+        return policy
+
+    def _idempotency_key(self, method: str, key: Optional[str] = None) -> Optional[str]:
+        if key is None and self.idempotent and method in IDEMPOTENT_METHODS:
+            return new_idempotency_key()
+        return key
+
+    def _invoke(self, method: str, args: tuple = (), idempotency_key: Optional[str] = None):
+        # La clave se fija antes de recorrer los middlewares: si uno repite la llamada, viaja la misma clave
+        def call(index: int = 0):
+            if index == len(self.middlewares):
+                if idempotency_key is not None:
+                    return resolve_method(self.proxy, 'call_idempotent')(idempotency_key, method, list(args))
+                return resolve_method(self.proxy, method)(*args)
+            return self.middlewares[index](method, args, lambda: call(index + 1))
+        return call()
+
+    def _attach(self, proxy, server_url: str):
+        if self.proxy is not None and self.proxy is not proxy:
+            close_proxy(self.proxy)
+        self.proxy = proxy
+        self.server_url = server_url
+
+    def connect(self, server_url: Optional[str] = None) -> bool:
+        server_url = server_url or self.server_url
+        try:
+            logger.info(self._message('connecting', url=server_url))
+            if self.pool_size > 0:
+                proxy = create_proxy(server_url, pool_size=self.pool_size, timeout=self.timeout,
+                                     **self.pool_options)
+            else:
+                proxy = create_proxy(server_url, timeout=self.timeout)
+            self._attach(proxy, server_url)
+
+            response = self._invoke('ping')
+            if response.get('success'):
+                self.connected = True
+                self.server_info = response
+                logger.info(self._message('connected'))
+                return True
+            else:
+                logger.error("Error en la respuesta del servidor")
+                return False
+
+        except ConnectionRefusedError:
+            logger.error(self._message('refused', url=server_url))
+            logger.error(self._message('refused_hint'))
+            return False
+        except Exception as e:
+            logger.error(f"Error de conexión: {str(e)}")
+            return False
+
+    def disconnect(self):
+        self.connected = False
+        if self.proxy is not None:
+            close_proxy(self.proxy)
+        self.proxy = None
+        self.server_info = None
+        logger.info(self._message('disconnected'))
+
+    def set_mode(self, mode: str):
+        # float, decimal, fraction o int; los modos exactos envían los operandos como texto
+        self.mode = resolve_mode(mode)
+
+    def _validate_numbers(self, a: str, b: str) -> tuple[Optional[float], Optional[float], Optional[str]]:
+        return validate_numbers(a, b, self.mode)
+
+    def _operation_args(self, a, b) -> tuple:
+        return (a, b) if self.mode == FLOAT_MODE else (a, b, self.mode)
+
+    def _not_connected(self) -> dict:
+        return {
+            'success': False,
+            'error': self._message('not_connected')
+        }
+
+    def _execute_operation(self, operation: str, a: str, b: str, idempotency_key: Optional[str] = None) -> dict:
+        if not self.connected:
+            return self._not_connected()
+
+        num_a, num_b, error = self._validate_numbers(a, b)
+        if error:
+            logger.error(f"Error de validación: {error}")
+            return {
+                'success': False,
+                'error': error
+            }
+
+        try:
+            name, symbol = CLIENT_OPERATIONS[operation]
+            logger.info(self._message('sending', name=name, a=num_a, symbol=symbol, b=num_b))
+            result = self._invoke(operation, self._operation_args(num_a, num_b),
+                                  self._idempotency_key(operation, idempotency_key))
+
+            if result.get('success'):
+                logger.info(self._message('received', result=result.get('result')))
+            else:
+                logger.error(self._message('server_error', error=result.get('error')))
+
+            return result
+
+        except Exception as e:
+            error_msg = self._message('communication_error', error=str(e))
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+    def add(self, a: str, b: str, idempotency_key: Optional[str] = None) -> dict:
+        return self._execute_operation('add', a, b, idempotency_key)
+
+    def subtract(self, a: str, b: str, idempotency_key: Optional[str] = None) -> dict:
+        return self._execute_operation('subtract', a, b, idempotency_key)
+
+    def multiply(self, a: str, b: str, idempotency_key: Optional[str] = None) -> dict:
+        return self._execute_operation('multiply', a, b, idempotency_key)
+
+    def divide(self, a: str, b: str, idempotency_key: Optional[str] = None) -> dict:
+        return self._execute_operation('divide', a, b, idempotency_key)
+
+    def _request(self, method: str, *args) -> dict:
+        if not self.connected:
+            return self._not_connected()
+        try:
+            return self._invoke(method, args, self._idempotency_key(method))
+        except Exception as e:
+            error_msg = self._message('communication_error', error=str(e))
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+    def evaluate(self, expression: str, variables: Optional[dict] = None) -> dict:
+        return self._request('evaluate', expression, variables or {})
+
+    def prepare(self, expression: str) -> dict:
+        return self._request('prepare', expression)
+
+    def evaluate_prepared(self, handle: str, columns: dict) -> dict:
+        return self._request('evaluate_prepared', handle, columns)
+
+    def query_history(self, **criteria) -> dict:
+        # operation, id_from, id_to, time_from, time_to, cursor, limit (ver CalculatorService.query_history)
+        return self._request('query_history', {key: value for key, value in criteria.items() if value is not None})
+
+    def iter_history(self, **criteria) -> Iterator[dict]:
+        # Recorre el historial página por página siguiendo next_cursor; cada página es un dict de columnas
+        while True:
+            page = self.query_history(**criteria)
+            if not page.get('success'):
+                raise RuntimeError(page.get('error'))
+            if page['count']:
+                yield page['columns']
+            if page['next_cursor'] is None:
+                return
+            criteria['cursor'] = page['next_cursor']
+
+    def batch(self) -> 'OperationBatch':
+        return OperationBatch(self)
+
+    def get_stats(self) -> dict:
+        if not self.connected:
+            return self._not_connected()
+
+        try:
+            logger.info(self._message('stats'))
+            result = self._invoke('get_stats')
+            return result
+        except Exception as e:
+            error_msg = self._message('stats_error', error=str(e))
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
+
+class OperationBatch:
+    # Acumula operaciones y las envía en una sola petición system.multicall al salir del bloque
+
+    def __init__(self, client: CalculatorClientCore):
+        self._client = client
+        self._calls = []
+        self.results = []
+
+    def __enter__(self) -> 'OperationBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _queue(self, operation: str, a: str, b: str) -> int:
+        num_a, num_b, error = self._client._validate_numbers(a, b)
+        if error:
+            logger.error(f"Error de validación: {error}")
+            self._calls.append((operation, None, {'success': False, 'error': error}))
+        else:
+            self._calls.append((operation, self._client._operation_args(num_a, num_b), None))
+        return len(self._calls) - 1
+
+    def add(self, a: str, b: str) -> int:
+        return self._queue('add', a, b)
+
+    def subtract(self, a: str, b: str) -> int:
+        return self._queue('subtract', a, b)
+
+    def multiply(self, a: str, b: str) -> int:
+        return self._queue('multiply', a, b)
+
+    def divide(self, a: str, b: str) -> int:
+        return self._queue('divide', a, b)
+
+    def flush(self) -> list:
+        calls, self._calls = self._calls, []
+        results = [error for _, _, error in calls]
+        pending = [i for i, (_, args, _) in enumerate(calls) if args is not None]
+
+        if pending and not self._client.connected:
+            for i in pending:
+                results[i] = self._client._not_connected()
+            pending = []
+
+        if pending:
+            # La llamada pasa por los middlewares del cliente como cualquier otra
+            multicall = []
+            for i in pending:
+                operation, args, _ = calls[i]
+                key = self._client._idempotency_key(operation)
+                if key is None:
+                    multicall.append({'methodName': operation, 'params': list(args)})
+                else:
+                    multicall.append({'methodName': 'call_idempotent', 'params': [key, operation, list(args)]})
+            try:
+                logger.info(f"Enviando lote de {len(pending)} operaciones en una sola petición")
+                responses = xmlrpc.client.MultiCallIterator(self._client._invoke('system.multicall', (multicall,)))
+                for i, index in enumerate(pending):
+                    try:
+                        results[index] = responses[i]
+                    except xmlrpc.client.Fault as fault:
+                        results[index] = {
+                            'success': False,
+                            'error': f"Error del servidor: {fault.faultString}"
+                        }
+            except Exception as e:
+                error_msg = self._client._message('communication_error', error=str(e))
+                logger.error(error_msg)
+                for index in pending:
+                    results[index] = {
+                        'success': False,
+                        'error': error_msg
+                    }
+
+        self.results.extend(results)
+        return results
+
+
+def get_valid_number(prompt: str, mode: str = FLOAT_MODE) -> str:
+    while True:
+        try:
+            value = input(prompt).strip()
+            if not value:
+                print("Error: Debes ingresar un número")
+                continue
+
+            if mode != FLOAT_MODE:
+                try:
+                    parse_operand(value, mode)
+                    return value
+                except NumericError as e:
+                    print(f"Error: {str(e)}")
+                    continue
+
+            num = float(value)
+            if num < -1000000 or num > 1000000:
+                print("Error: El número debe estar entre -1,000,000 y 1,000,000")
+                continue
+
+            return value
+        except ValueError:
+            print("Error: Debes ingresar un número válido")
+        except KeyboardInterrupt:
+            print("\nOperación cancelada")
+            return ""
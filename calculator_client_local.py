@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
-import xmlrpc.client
 import sys
 import logging
-from typing import Union, Optional
+from calculator_client_core import CalculatorClientCore, get_valid_number
+from calculator_numeric import FLOAT_MODE, NUMERIC_MODES
+from calculator_retry import DEFAULT_MAX_RETRIES
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,209 +13,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class CalculatorClient:
+class CalculatorClient(CalculatorClientCore):
     
-    def __init__(self, server_url: str = "http://localhost:8000"):
-        self.server_url = server_url
-        self.proxy = None
-        self.connected = False
-    
-    def connect(self) -> bool:
-        try:
-            logger.info(f"Conectando al servidor: {self.server_url}")
-            self.proxy = xmlrpc.client.ServerProxy(self.server_url)
-            
-            response = self.proxy.ping()
-            if response.get('success'):
-                self.connected = True
-                logger.info("Conexión establecida exitosamente")
-                return True
-            else:
-                logger.error("Error en la respuesta del servidor")
-                return False
-                
-        except ConnectionRefusedError:
-            logger.error(f"No se pudo conectar al servidor en {self.server_url}")
-            logger.error("Asegúrate de que el servidor esté ejecutándose")
-            return False
-        except Exception as e:
-            logger.error(f"Error de conexión: {str(e)}")
-            return False
-    
-    def disconnect(self):
-        self.connected = False
-        self.proxy = None
-        logger.info("Desconectado del servidor")
-    
-    def _validate_numbers(self, a: str, b: str) -> tuple[Optional[float], Optional[float], Optional[str]]:
-        try:
-            num_a = float(a)
-            num_b = float(b)
-            
-            if num_a < -1000000 or num_a > 1000000:
-                return None, None, "Error: El primer número debe estar entre -1,000,000 y 1,000,000"
-            
-            if num_b < -1000000 or num_b > 1000000:
-                return None, None, "Error: El segundo número debe estar entre -1,000,000 y 1,000,000"
-            
-            return num_a, num_b, None
-        except ValueError as e:
-            return None, None, f"Error: Los valores deben ser números válidos. {str(e)}"
-    
-    def add(self, a: str, b: str) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor'
-            }
-        
-        num_a, num_b, error = self._validate_numbers(a, b)
-        if error:
-            logger.error(f"Error de validación: {error}")
-            return {
-                'success': False,
-                'error': error
-            }
-        
-        try:
-            logger.info(f"Enviando petición de suma: {num_a} + {num_b}")
-            result = self.proxy.add(num_a, num_b)
-            
-            if result.get('success'):
-                logger.info(f"Resultado recibido: {result.get('result')}")
-            else:
-                logger.error(f"Error del servidor: {result.get('error')}")
-            
-            return result
-            
-        except Exception as e:
-            error_msg = f"Error en la comunicación: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-    
-    def subtract(self, a: str, b: str) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor'
-            }
-        
-        num_a, num_b, error = self._validate_numbers(a, b)
-        if error:
-            logger.error(f"Error de validación: {error}")
-            return {
-                'success': False,
-                'error': error
-            }
-        
-        try:
-            logger.info(f"Enviando petición de resta: {num_a} - {num_b}")
-            result = self.proxy.subtract(num_a, num_b)
-            
-            if result.get('success'):
-                logger.info(f"Resultado recibido: {result.get('result')}")
-            else:
-                logger.error(f"Error del servidor: {result.get('error')}")
-            
-            return result
-            
-        except Exception as e:
-            error_msg = f"Error en la comunicación: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-    
-    def multiply(self, a: str, b: str) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor'
-            }
-        
-        num_a, num_b, error = self._validate_numbers(a, b)
-        if error:
-            logger.error(f"Error de validación: {error}")
-            return {
-                'success': False,
-                'error': error
-            }
-        
-        try:
-            logger.info(f"Enviando petición de multiplicación: {num_a} * {num_b}")
-            result = self.proxy.multiply(num_a, num_b)
-            
-            if result.get('success'):
-                logger.info(f"Resultado recibido: {result.get('result')}")
-            else:
-                logger.error(f"Error del servidor: {result.get('error')}")
-            
-            return result
-            
-        except Exception as e:
-            error_msg = f"Error en la comunicación: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-    
-    def divide(self, a: str, b: str) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor'
-            }
-        
-        num_a, num_b, error = self._validate_numbers(a, b)
-        if error:
-            logger.error(f"Error de validación: {error}")
-            return {
-                'success': False,
-                'error': error
-            }
-        
-        try:
-            logger.info(f"Enviando petición de división: {num_a} / {num_b}")
-            result = self.proxy.divide(num_a, num_b)
-            
-            if result.get('success'):
-                logger.info(f"Resultado recibido: {result.get('result')}")
-            else:
-                logger.error(f"Error del servidor: {result.get('error')}")
-            
-            return result
-            
-        except Exception as e:
-            error_msg = f"Error en la comunicación: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-    
-    def get_stats(self) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor'
-            }
-        
-        try:
-            logger.info("Solicitando estadísticas del servidor")
-            result = self.proxy.get_stats()
-            return result
-        except Exception as e:
-            error_msg = f"Error al obtener estadísticas: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
+    def __init__(self, server_url: str = "http://localhost:8000", **options):
+        super().__init__(server_url, **options)
 
 
 def display_result(result: dict):
@@ -231,32 +33,35 @@ def display_result(result: dict):
     print("="*50 + "\n")
 
 
-def get_valid_number(prompt: str) -> str:
-    while True:
-        try:
-            value = input(prompt).strip()
-            if not value:
-                print("Error: Debes ingresar un número")
-                continue
-            
-            num = float(value)
-            if num < -1000000 or num > 1000000:
-                print("Error: El número debe estar entre -1,000,000 y 1,000,000")
-                continue
-            
-            return value
-        except ValueError:
-            print("Error: Debes ingresar un número válido")
-        except KeyboardInterrupt:
-            print("\nOperación cancelada")
-            return ""
-
-
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Calculadora RPC - Cliente Local')
+    parser.add_argument('--server', default='http://localhost:8000',
+                        help='URL del servidor: http://, calc:// o inproc:// (default: http://localhost:8000)')
+    parser.add_argument('--embedded', action='store_true',
+                        help='Ejecutar el servicio dentro de este proceso, sin servidor ni red')
+    parser.add_argument('--mode', choices=NUMERIC_MODES, default=FLOAT_MODE,
+                        help='Modo numérico: float, decimal, fraction o int (exactos) (default: float)')
+    parser.add_argument('--retries', type=int, default=0,
+                        help=f'Reintentos ante servidor ocupado o fallo de red, por ejemplo {DEFAULT_MAX_RETRIES} '
+                             '(default: 0, desactivados)')
+    parser.add_argument('--retry-deadline', type=float, default=None,
+                        help='Segundos máximos por llamada contando los reintentos (default: sin límite)')
+    args = parser.parse_args()
+    
     print("Calculadora RPC - Cliente Local")
     print("="*50)
     
-    client = CalculatorClient()
+    server_url = args.server
+    if args.embedded:
+        from calculator_inproc import register_service
+        register_service('local')
+        server_url = 'inproc://local'
+    
+    client = CalculatorClient(server_url, mode=args.mode)
+    if args.retries > 0:
+        client.enable_retries(max_retries=args.retries, deadline=args.retry_deadline)
     
     if not client.connect():
         print("No se pudo conectar al servidor. Asegurate de que esté ejecutándose.")
@@ -301,11 +106,11 @@ def main():
             
             elif choice in ['1', '2', '3', '4']:
                 try:
-                    a = get_valid_number("Ingresa el primer número: ")
+                    a = get_valid_number("Ingresa el primer número: ", client.mode)
                     if not a:
                         continue
                     
-                    b = get_valid_number("Ingresa el segundo número: ")
+                    b = get_valid_number("Ingresa el segundo número: ", client.mode)
                     if not b:
                         continue
                     
@@ -4,7 +4,14 @@ import xmlrpc.client
 import sys
 import logging
 import socket
-from typing import Union, Optional
+import asyncio
+import ipaddress
+import queue
+import threading
+from typing import Optional, Iterator
+from calculator_client_core import CLIENT_MESSAGES, CalculatorClientCore, get_valid_number
+from calculator_balancer import BalancedServerProxy
+from calculator_numeric import FLOAT_MODE
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,66 +20,129 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class RemoteCalculatorClient:
+class RemoteCalculatorClient(CalculatorClientCore):
     
-    def __init__(self):
-        self.proxy = None
-        self.connected = False
-        self.server_url = None
-        self.server_info = None
+    MESSAGES = {
+        **CLIENT_MESSAGES,
+        'connecting': "Conectando al servidor remoto: {url}",
+        'connected': "Conexión remota establecida exitosamente",
+        'refused_hint': "Verifica que el servidor esté ejecutándose y accesible",
+        'disconnected': "Desconectado del servidor remoto",
+        'not_connected': "No hay conexión con el servidor remoto",
+        'sending': "Enviando petición remota de {name}: {a} {symbol} {b}",
+        'received': "Resultado remoto recibido: {result}",
+        'server_error': "Error del servidor remoto: {error}",
+        'communication_error': "Error en la comunicación remota: {error}",
+        'stats': "Solicitando estadísticas del servidor remoto",
+        'stats_error': "Error al obtener estadísticas remotas: {error}",
+    }
+    
+    def __init__(self, pool_size: int = 4, timeout: Optional[float] = None,
+                 idle_timeout: Optional[float] = 60.0, health_check_interval: Optional[float] = 30.0,
+                 middlewares: Optional[list] = None, mode: str = FLOAT_MODE, idempotent: bool = False,
+                 retries: int = 0):
+        super().__init__(None, pool_size, timeout, middlewares, mode, idempotent, idle_timeout=idle_timeout,
+                         health_check_interval=health_check_interval)
+        # Desactivados por defecto: la espera de RetryPolicy no conoce el tiempo de servicio del servidor
+        # (3s con la latencia por defecto) y con el servidor ocupado agotaría el presupuesto antes de que
+        # se libere un slot. Con retries > 0 los rechazos por ocupado se reintentan con espera exponencial
+        self.retry_policy = self.enable_retries(max_retries=retries) if retries > 0 else None
     
-    def discover_servers(self, port: int = 8000, timeout: float = 1.0) -> list:
+    def _default_network(self) -> tuple[str, str]:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(("8.8.8.8", 80))
+                local_ip = s.getsockname()[0]
+        except:
+            local_ip = "127.0.0.1"
+        network = ".".join(local_ip.split(".")[:-1])
+        return f"{network}.0/24", local_ip
+
+    async def _probe_server(self, ip: str, port: int, timeout: float) -> Optional[dict]:
+        # Pre-chequeo TCP barato; si el puerto está abierto se envía el ping XML-RPC por la misma conexión
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        try:
+            body = xmlrpc.client.dumps((), 'ping').encode('utf-8')
+            writer.write(
+                f"POST /RPC2 HTTP/1.0\r\nHost: {ip}:{port}\r\nContent-Type: text/xml\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body
+            )
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), timeout)
+            _, _, payload = raw.partition(b"\r\n\r\n")
+            (result,), _ = xmlrpc.client.loads(payload)
+        except Exception:
+            return None
+        finally:
+            writer.close()
+        if isinstance(result, dict) and result.get('success'):
+            return {
+                'ip': ip,
+                'port': port,
+                'url': f"http://{ip}:{port}",
+                'status': 'online'
+            }
+        return None
+
+    async def _scan(self, targets: list, timeout: float, max_concurrency: int, on_found):
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def probe(ip, port):
+            async with semaphore:
+                server = await self._probe_server(ip, port, timeout)
+            if server is not None:
+                on_found(server)
+
+        await asyncio.gather(*(probe(ip, port) for ip, port in targets))
+
+    def iter_servers(self, networks: Optional[list] = None, ports: Optional[list] = None,
+                     timeout: float = 1.0, max_concurrency: int = 256) -> Iterator[dict]:
+        # Genera los servidores a medida que responden; networks acepta rangos CIDR ("192.168.1.0/24")
+        ports = list(ports or [8000])
+        skip = set()
+        if not networks:
+            default_network, local_ip = self._default_network()
+            networks = [default_network]
+            skip.add(local_ip)
+        targets = []
+        for network in networks:
+            hosts = ipaddress.ip_network(network, strict=False)
+            hosts = list(hosts.hosts()) or [hosts.network_address]
+            targets.extend((str(ip), port) for ip in hosts if str(ip) not in skip for port in ports)
+
+        found = queue.Queue()
+        done = object()
+
+        def run_scan():
+            try:
+                asyncio.run(self._scan(targets, timeout, max_concurrency, found.put))
+            except Exception as e:
+                logger.error(f"Error al escanear la red: {str(e)}")
+            finally:
+                found.put(done)
+
+        threading.Thread(target=run_scan, daemon=True).start()
+        while True:
+            server = found.get()
+            if server is done:
+                return
+            yield server
+
+    def discover_servers(self, port: int = 8000, timeout: float = 1.0, networks: Optional[list] = None,
+                         ports: Optional[list] = None, max_concurrency: int = 256) -> list:
         try:
             print("Buscando servidores en la red local...")
             available_servers = []
+            ports = list(ports or [port])
+            scanned = networks or [self._default_network()[0]]
+            print(f"Escaneando red: {', '.join(scanned)} en puerto {', '.join(str(p) for p in ports)}")
             
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-                    s.connect(("8.8.8.8", 80))
-                    local_ip = s.getsockname()[0]
-            except:
-                local_ip = "127.0.0.1"
-            
-            network = ".".join(local_ip.split(".")[:-1])
-            
-            print(f"Escaneando red: {network}.0/24 en puerto {port}")
-            
-            for i in range(1, 255):
-                ip = f"{network}.{i}"
-                if ip == local_ip:
-                    continue
-                    
-                try:
-                    url = f"http://{ip}:{port}"
-                    proxy = xmlrpc.client.ServerProxy(url)
-                    
-                    import threading
-                    import time
-                    
-                    result = None
-                    def ping_server():
-                        nonlocal result
-                        try:
-                            result = proxy.ping()
-                        except:
-                            result = None
-                    
-                    thread = threading.Thread(target=ping_server)
-                    thread.daemon = True
-                    thread.start()
-                    thread.join(timeout)
-                    
-                    if result and result.get('success'):
-                        available_servers.append({
-                            'ip': ip,
-                            'port': port,
-                            'url': url,
-                            'status': 'online'
-                        })
-                        print(f"Servidor encontrado: {ip}:{port}")
-                    
-                except:
-                    continue
+            for server in self.iter_servers(networks, ports, timeout, max_concurrency):
+                available_servers.append(server)
+                print(f"Servidor encontrado: {server['ip']}:{server['port']}")
             
             if not available_servers:
                 print("No se encontraron servidores en la red local")
@@ -84,115 +154,34 @@ class RemoteCalculatorClient:
             return []
     
     def connect_to_server(self, server_url: str) -> bool:
+        if self.connect(server_url):
+            return True
+        self.server_url = None
+        return False
+    
+    def connect_to_servers(self, server_urls: list, policy: str = 'round_robin') -> bool:
         try:
-            logger.info(f"Conectando al servidor remoto: {server_url}")
-            self.proxy = xmlrpc.client.ServerProxy(server_url)
+            logger.info(f"Conectando a {len(server_urls)} servidores remotos (balanceo: {policy})")
+            balancer = BalancedServerProxy(server_urls, policy, pool_size=max(self.pool_size, 1),
+                                           timeout=self.timeout)
+            self._attach(balancer, None)
             
-            response = self.proxy.ping()
-            if response.get('success'):
-                self.connected = True
-                self.server_url = server_url
-                self.server_info = response
-                logger.info("Conexión remota establecida exitosamente")
-                return True
-            else:
-                logger.error("Error en la respuesta del servidor")
+            healthy = balancer.check_health()
+            if not healthy:
+                logger.error("Ningún servidor respondió")
                 return False
-                
-        except ConnectionRefusedError:
-            logger.error(f"No se pudo conectar al servidor en {server_url}")
-            logger.error("Verifica que el servidor esté ejecutándose y accesible")
-            return False
+            self.connected = True
+            self.server_url = ", ".join(healthy)
+            self.server_info = {'success': True, 'server_status': f"balanceando {len(healthy)} servidores ({policy})"}
+            logger.info("Conexión remota establecida exitosamente")
+            return True
         except Exception as e:
             logger.error(f"Error de conexión: {str(e)}")
             return False
     
     def disconnect(self):
-        self.connected = False
-        self.proxy = None
+        super().disconnect()
         self.server_url = None
-        self.server_info = None
-        logger.info("Desconectado del servidor remoto")
-    
-    def _validate_numbers(self, a: str, b: str) -> tuple[Optional[float], Optional[float], Optional[str]]:
-        try:
-            num_a = float(a)
-            num_b = float(b)
-            
-            if num_a < -1000000 or num_a > 1000000:
-                return None, None, "Error: El primer número debe estar entre -1,000,000 y 1,000,000"
-            
-            if num_b < -1000000 or num_b > 1000000:
-                return None, None, "Error: El segundo número debe estar entre -1,000,000 y 1,000,000"
-            
-            return num_a, num_b, None
-        except ValueError as e:
-            return None, None, f"Error: Los valores deben ser números válidos. {str(e)}"
-    
-    def _execute_operation(self, operation: str, a: str, b: str) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor remoto'
-            }
-        
-        num_a, num_b, error = self._validate_numbers(a, b)
-        if error:
-            logger.error(f"Error de validación: {error}")
-            return {
-                'success': False,
-                'error': error
-            }
-        
-        try:
-            logger.info(f"Enviando petición remota de {operation}: {num_a} {operation} {num_b}")
-            result = getattr(self.proxy, operation)(num_a, num_b)
-            
-            if result.get('success'):
-                logger.info(f"Resultado remoto recibido: {result.get('result')}")
-            else:
-                logger.error(f"Error del servidor remoto: {result.get('error')}")
-            
-            return result
-            
-        except Exception as e:
-            error_msg = f"Error en la comunicación remota: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-    
-    def add(self, a: str, b: str) -> dict:
-        return self._execute_operation('add', a, b)
-    
-    def subtract(self, a: str, b: str) -> dict:
-        return self._execute_operation('subtract', a, b)
-    
-    def multiply(self, a: str, b: str) -> dict:
-        return self._execute_operation('multiply', a, b)
-    
-    def divide(self, a: str, b: str) -> dict:
-        return self._execute_operation('divide', a, b)
-    
-    def get_stats(self) -> dict:
-        if not self.connected:
-            return {
-                'success': False,
-                'error': 'No hay conexión con el servidor remoto'
-            }
-        
-        try:
-            logger.info("Solicitando estadísticas del servidor remoto")
-            result = self.proxy.get_stats()
-            return result
-        except Exception as e:
-            error_msg = f"Error al obtener estadísticas remotas: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
     
     def test_connection(self) -> dict:
         if not self.connected:
@@ -203,7 +192,7 @@ class RemoteCalculatorClient:
         
         try:
             logger.info("Probando conexión remota...")
-            result = self.proxy.ping()
+            result = self._invoke('ping')
             return result
         except Exception as e:
             error_msg = f"Error en la prueba de conexión: {str(e)}"
@@ -237,27 +226,6 @@ def display_server_info(client: RemoteCalculatorClient):
         print("\nNo hay servidor remoto conectado")
 
 
-def get_valid_number(prompt: str) -> str:
-    while True:
-        try:
-            value = input(prompt).strip()
-            if not value:
-                print("Error: Debes ingresar un número")
-                continue
-            
-            num = float(value)
-            if num < -1000000 or num > 1000000:
-                print("Error: El número debe estar entre -1,000,000 y 1,000,000")
-                continue
-            
-            return value
-        except ValueError:
-            print("Error: Debes ingresar un número válido")
-        except KeyboardInterrupt:
-            print("\nOperación cancelada")
-            return ""
-
-
 def main():
     print("Calculadora RPC - Cliente Remoto")
     print("="*50)
@@ -295,11 +263,19 @@ def main():
             print(f"\nSe encontraron {len(servers)} servidor(es):")
             for i, server in enumerate(servers, 1):
                 print(f"   {i}. {server['ip']}:{server['port']} - {server['status']}")
+            if len(servers) > 1:
+                print("   0. Usar todos (balanceo de carga)")
             
             while True:
                 try:
                     server_choice = int(input(f"\nSelecciona un servidor (1-{len(servers)}): ")) - 1
-                    if 0 <= server_choice < len(servers):
+                    if server_choice == -1 and len(servers) > 1:
+                        if client.connect_to_servers([server['url'] for server in servers], 'least_outstanding'):
+                            print(f"Conectado a {len(servers)} servidores con balanceo de carga")
+                        else:
+                            print("No se pudo conectar a los servidores encontrados")
+                        break
+                    elif 0 <= server_choice < len(servers):
                         selected_server = servers[server_choice]
                         if client.connect_to_server(selected_server['url']):
                             print(f"Conectado exitosamente a {selected_server['ip']}:{selected_server['port']}")
@@ -407,11 +383,11 @@ def main():
             
             elif choice in ['1', '2', '3', '4']:
                 try:
-                    a = get_valid_number("Ingresa el primer número: ")
+                    a = get_valid_number("Ingresa el primer número: ", client.mode)
                     if not a:
                         continue
                     
-                    b = get_valid_number("Ingresa el segundo número: ")
+                    b = get_valid_number("Ingresa el segundo número: ", client.mode)
                     if not b:
                         continue
                     
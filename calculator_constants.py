@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+
+# Respuestas y límites del servicio que también necesitan los clientes. Sin dependencias: importar
+# calculator_server configura el logging del proceso, algo que un cliente o una librería no deben hacer
+
+BUSY_ERROR = 'proceso en ejecución, solicitud rechazada'
+QUEUE_TIMEOUT_ERROR = 'tiempo de espera en cola agotado, solicitud rechazada'
+SIMULATED_FAULT_ERROR = 'fallo simulado del servidor'
+
+MAX_BATCH_SIZE = 100000
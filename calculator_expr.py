@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+import math
+import re
+from typing import Optional
+
+from calculator_vector import (OPERATIONS, NUMPY_MIN_SIZE, DIVISION_BY_ZERO_ERROR, INVALID_INPUT_ERROR,
+                               RESULT_RANGE_ERROR, XMLRPC_MAXINT, integer_dtype, is_number, max_magnitude, np,
+                               wire_result)
+
+MAX_EXPRESSION_LENGTH = 4096
+MAX_NESTING = 100
+MAX_OPERATORS = 256
+
+# Nodos del árbol: ('num', valor), ('var', nombre), ('neg', nodo) y (operación, izquierda, derecha)
+BINARY_OPERATORS = {symbol: operation for operation, (symbol, _) in OPERATIONS.items()}
+PRECEDENCE = {'add': 1, 'subtract': 1, 'multiply': 2, 'divide': 2}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op>[-+*/()])
+    )""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        if position is not None:
+            message = f"{message} (posición {position})"
+        super().__init__(message)
+        self.position = position
+
+
+def tokenize(source: str) -> list:
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+    while position < end:
+        match = _TOKEN.match(source, position)
+        if match is None or match.end() == position:
+            raise ExpressionError(f"Carácter inesperado '{source[position:].strip()[:1]}'", position)
+        kind = match.lastgroup
+        text = match.group(kind)
+        start = match.start(kind)
+        if kind == 'number':
+            value = float(text) if any(c in text for c in '.eE') else int(text)
+            if type(value) is float and math.isinf(value):
+                raise ExpressionError(f"Número fuera de rango '{text}'", start)
+            tokens.append(('number', value, start))
+        else:
+            tokens.append((kind, text, start))
+        position = match.end()
+    tokens.append(('end', None, len(source)))
+    return tokens
+
+
+class _Parser:
+    # Descenso recursivo: expresión -> término (('+'|'-') término)*, término -> factor (('*'|'/') factor)*
+
+    def __init__(self, source: str):
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.depth = 0
+        self.operators = 0
+
+    def _peek(self) -> tuple:
+        return self.tokens[self.index]
+
+    def _advance(self) -> tuple:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse(self) -> tuple:
+        tree = self._expression()
+        kind, text, position = self._peek()
+        if kind != 'end':
+            raise ExpressionError(f"Símbolo inesperado '{text}'", position)
+        return tree
+
+    def _expression(self) -> tuple:
+        node = self._term()
+        while self._peek()[0] == 'op' and self._peek()[1] in '+-':
+            node = (self._operator(), node, self._term())
+        return node
+
+    def _term(self) -> tuple:
+        node = self._factor()
+        while self._peek()[0] == 'op' and self._peek()[1] in '*/':
+            node = (self._operator(), node, self._factor())
+        return node
+
+    def _operator(self) -> str:
+        _, symbol, position = self._advance()
+        self.operators += 1
+        if self.operators > MAX_OPERATORS:
+            raise ExpressionError(f"Expresión demasiado larga (máximo {MAX_OPERATORS} operadores)", position)
+        return BINARY_OPERATORS[symbol]
+
+    def _factor(self) -> tuple:
+        kind, text, position = self._advance()
+        if kind == 'number':
+            return ('num', text)
+        if kind == 'name':
+            return ('var', text)
+        if kind == 'op' and text in '+-':
+            self._enter(position)
+            operand = self._factor()
+            self.depth -= 1
+            return operand if text == '+' else ('neg', operand)
+        if kind == 'op' and text == '(':
+            self._enter(position)
+            node = self._expression()
+            closing = self._advance()
+            if closing[:2] != ('op', ')'):
+                raise ExpressionError("Falta ')'", closing[2])
+            self.depth -= 1
+            return node
+        if kind == 'end':
+            raise ExpressionError("Expresión incompleta", position)
+        raise ExpressionError(f"Símbolo inesperado '{text}'", position)
+
+    def _enter(self, position: int):
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise ExpressionError(f"Expresión demasiado anidada (máximo {MAX_NESTING} niveles)", position)
+
+
+def _compile(node: tuple):
+    # Convierte el árbol en closures anidadas para no recorrerlo en cada evaluación
+    kind = node[0]
+    if kind == 'num':
+        value = node[1]
+        return lambda variables: value
+    if kind == 'var':
+        name = node[1]
+        return lambda variables: variables[name]
+    if kind == 'neg':
+        operand = _compile(node[1])
+        return lambda variables: -operand(variables)
+    fn = OPERATIONS[kind][1]
+    left = _compile(node[1])
+    right = _compile(node[2])
+    return lambda variables: fn(left(variables), right(variables))
+
+
+def format_tree(node: tuple, parent: int = 0, right_side: bool = False) -> str:
+    kind = node[0]
+    if kind == 'num':
+        return repr(node[1])
+    if kind == 'var':
+        return node[1]
+    if kind == 'neg':
+        operand = format_tree(node[1], 3)
+        return f"-({operand})" if node[1][0] == 'neg' else f"-{operand}"
+    precedence = PRECEDENCE[kind]
+    text = (f"{format_tree(node[1], precedence)} {OPERATIONS[kind][0]} "
+            f"{format_tree(node[2], precedence, right_side=True)}")
+    # a - (b - c) y a / (b * c) necesitan paréntesis aunque la precedencia sea la misma
+    if precedence < parent or (right_side and precedence == parent):
+        return f"({text})"
+    return text
+
+
+def _numpy_eval(node: tuple, arrays: dict, zero):
+    kind = node[0]
+    if kind == 'num':
+        return node[1]
+    if kind == 'var':
+        return arrays[node[1]]
+    if kind == 'neg':
+        return -_numpy_eval(node[1], arrays, zero)
+    left = _numpy_eval(node[1], arrays, zero)
+    right = _numpy_eval(node[2], arrays, zero)
+    if kind == 'divide':
+        # Las filas con divisor cero se marcan y se calculan con divisor 1 para no emitir avisos
+        is_zero = np.asarray(right == 0)
+        zero |= is_zero
+        return left / np.where(is_zero, 1, right)
+    return OPERATIONS[kind][1](left, right)
+
+
+def _has_division(node: tuple) -> bool:
+    if node[0] == 'divide':
+        return True
+    return node[0] not in ('num', 'var') and any(_has_division(child) for child in node[1:])
+
+
+def _magnitude(node: tuple, bounds: dict):
+    # Cota del valor absoluto de cualquier resultado intermedio dadas las cotas de las variables
+    kind = node[0]
+    if kind == 'num':
+        return abs(node[1])
+    if kind == 'var':
+        return bounds[node[1]]
+    if kind == 'neg':
+        return _magnitude(node[1], bounds)
+    left = _magnitude(node[1], bounds)
+    right = _magnitude(node[2], bounds)
+    if kind == 'multiply':
+        return left * right
+    if kind == 'divide':
+        # Con divisor entero no nulo |a / b| <= |a|
+        return max(left, right)
+    return left + right
+
+
+def _collect_variables(node: tuple, names: list):
+    if node[0] == 'var':
+        if node[1] not in names:
+            names.append(node[1])
+    elif node[0] != 'num':
+        for child in node[1:]:
+            _collect_variables(child, names)
+
+
+class Expression:
+
+    def __init__(self, source: str, tree: tuple):
+        self.source = source
+        self.tree = tree
+        self.text = format_tree(tree)
+        names = []
+        _collect_variables(tree, names)
+        self.variables = tuple(names)
+        self._fn = _compile(tree)
+
+    def bind(self, variables: Optional[dict]) -> dict:
+        variables = variables or {}
+        missing = [name for name in self.variables if name not in variables]
+        if missing:
+            raise ExpressionError(f"Variables sin valor: {', '.join(missing)}")
+        invalid = [name for name in self.variables if not is_number(variables[name])]
+        if invalid:
+            raise ExpressionError(f"Valor no numérico para: {', '.join(invalid)}")
+        return {name: variables[name] for name in self.variables}
+
+    def evaluate(self, variables: Optional[dict] = None):
+        # ZeroDivisionError se propaga para que el llamador lo reporte como división por cero
+        return self._fn(self.bind(variables))
+
+    def evaluate_columns(self, columns: Optional[dict], use_numpy: Optional[bool] = None,
+                         max_rows: Optional[int] = None) -> tuple[list, list]:
+        # Evalúa la expresión sobre columnas de valores (listas de igual longitud o escalares que se
+        # repiten en todas las filas). Retorna (resultados, errores); las filas con error quedan en None y
+        # los resultados ya vienen codificados como wire_result
+        columns = columns or {}
+        missing = [name for name in self.variables if name not in columns]
+        if missing:
+            raise ExpressionError(f"Columnas sin valor: {', '.join(missing)}")
+        lists = {name: columns[name] for name in self.variables if isinstance(columns[name], (list, tuple))}
+        lengths = {len(values) for values in lists.values()}
+        if len(lengths) > 1:
+            raise ExpressionError("Las columnas deben tener la misma longitud")
+        size = lengths.pop() if lengths else 1
+        if max_rows is not None and size > max_rows:
+            raise ExpressionError(f"Demasiadas filas (máximo {max_rows:,})")
+        scalars = {name: columns[name] for name in self.variables if name not in lists}
+        invalid = [name for name, value in scalars.items() if not is_number(value)]
+        if invalid:
+            raise ExpressionError(f"Valor no numérico para: {', '.join(invalid)}")
+
+        bad_rows = set()
+        for values in lists.values():
+            if not all(map(is_number, values)):
+                bad_rows.update(i for i, value in enumerate(values) if not is_number(value))
+
+        if use_numpy is None:
+            use_numpy = np is not None and size >= NUMPY_MIN_SIZE
+        evaluated = None
+        if use_numpy and np is not None:
+            evaluated = self._evaluate_numpy(lists, scalars, size, bad_rows)
+        if evaluated is None:
+            evaluated = self._evaluate_rows(lists, scalars, size, bad_rows)
+        results, zero_rows, range_rows = evaluated
+
+        errors = []
+        for i in sorted(bad_rows | zero_rows | range_rows):
+            results[i] = None
+            if i in bad_rows:
+                error = INVALID_INPUT_ERROR
+            elif i in zero_rows:
+                error = DIVISION_BY_ZERO_ERROR
+            else:
+                error = RESULT_RANGE_ERROR
+            errors.append({'row': i, 'error': error})
+        return results, errors
+
+    def _evaluate_rows(self, lists: dict, scalars: dict, size: int, bad_rows: set) -> tuple[list, set, set]:
+        fn = self._fn
+        row = dict(scalars)
+        results = [None] * size
+        zero_rows = set()
+        range_rows = set()
+        for i in range(size):
+            if i in bad_rows:
+                continue
+            for name, values in lists.items():
+                row[name] = values[i]
+            try:
+                results[i] = wire_result(fn(row))
+            except ZeroDivisionError:
+                zero_rows.add(i)
+                continue
+            except OverflowError:
+                pass
+            if results[i] is None:
+                range_rows.add(i)
+        return results, zero_rows, range_rows
+
+    def _evaluate_numpy(self, lists: dict, scalars: dict, size: int,
+                        bad_rows: set) -> Optional[tuple[list, set, set]]:
+        # Retorna None si los enteros no caben en el tipo de NumPy: el llamador sigue fila por fila en Python
+        if bad_rows:
+            lists = {name: [v if is_number(v) else 0 for v in column] for name, column in lists.items()}
+        all_ints = (all(type(v) is int for v in scalars.values())
+                    and all(type(v) is int for column in lists.values() for v in column))
+        dtype = np.float64
+        if all_ints:
+            bounds = {name: max_magnitude(column) for name, column in lists.items()}
+            bounds.update((name, abs(value)) for name, value in scalars.items())
+            dtype = integer_dtype(_magnitude(self.tree, bounds), _has_division(self.tree))
+            if dtype is None:
+                return None
+        arrays = {}
+        for name, column in lists.items():
+            arrays[name] = np.asarray(column, dtype=dtype)
+        for name, value in scalars.items():
+            arrays[name] = dtype(value)
+        zero = np.zeros(size, dtype=bool)
+        with np.errstate(over='ignore', invalid='ignore'):
+            out = np.broadcast_to(_numpy_eval(self.tree, arrays, zero), (size,))
+        # Misma codificación que wire_result: enteros fuera de int32 como float y filas no finitas con error
+        if out.dtype.kind == 'i':
+            if size and np.abs(out).max() > XMLRPC_MAXINT:
+                out = out.astype(np.float64)
+            range_rows = set()
+        else:
+            range_rows = set(np.flatnonzero(~np.isfinite(out)).tolist()) - bad_rows
+        return out.tolist(), set(np.flatnonzero(zero).tolist()), range_rows
+
+
+def compile_expression(source: str) -> Expression:
+    if not isinstance(source, str):
+        raise ExpressionError("La expresión debe ser texto")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expresión demasiado larga (máximo {MAX_EXPRESSION_LENGTH} caracteres)")
+    if not source.strip():
+        raise ExpressionError("Expresión vacía")
+    return Expression(source, _Parser(source).parse())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+import sys
+import threading
+import time
+import logging
+import xmlrpc.client
+from typing import Optional
+
+from calculator_balancer import BALANCING_POLICIES, BalancedServerProxy, is_busy_response
+from calculator_logging import add_logging_arguments, setup_logging
+from calculator_server import (BUSY_ERROR, QUEUE_TIMEOUT_ERROR, AdmissionController, LoggingRequestHandler,
+                               PooledXMLRPCServer, ThreadedXMLRPCServer)
+from calculator_transport import resolve_method
+
+logger = logging.getLogger(__name__)
+
+
+class CalculatorGateway:
+    # Expone la interfaz de CalculatorService y reenvía cada llamada a un pool de servidores
+
+    def __init__(self, backends: list, policy: str = 'least_outstanding', pool_size: int = 8,
+                 timeout: Optional[float] = 30.0, max_in_flight: int = 32, max_queue: int = 128,
+                 queue_timeout: Optional[float] = None, retries: int = 5, retry_delay: float = 0.1,
+                 health_interval: float = 5.0):
+        self.balancer = BalancedServerProxy(backends, policy, pool_size=pool_size, timeout=timeout)
+        self._admission = AdmissionController(max_in_flight, max_queue, queue_timeout)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self.forwarded = 0
+        self.busy_retries = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    def start_health_checks(self):
+        if self.health_interval <= 0 or self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name='gateway-health', daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            healthy = self.balancer.check_health()
+            if len(healthy) < len(self.balancer.backends):
+                logger.warning(f"Servidores sanos: {len(healthy)}/{len(self.balancer.backends)}")
+
+    def stop(self):
+        self._stop.set()
+        self.balancer.close()
+
+    def _forward(self, method: str, params: tuple):
+        result = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.busy_retries += 1
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+            result = resolve_method(self.balancer, method)(*params)
+            if not is_busy_response(result):
+                break
+        with self._lock:
+            self.forwarded += 1
+        return result
+
+    def _dispatch(self, method: str, params: tuple):
+        if method == 'ping':
+            return self.ping()
+        if method == 'get_stats':
+            return self.get_stats()
+
+        reason, _ = self._admission.acquire()
+        if reason == 'busy':
+            return {'success': False, 'error': BUSY_ERROR}
+        if reason == 'timeout':
+            return {'success': False, 'error': QUEUE_TIMEOUT_ERROR}
+        try:
+            return self._forward(method, params)
+        except xmlrpc.client.Fault:
+            raise
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            error_msg = f"Error en gateway: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+        finally:
+            self._admission.release()
+
+    def ping(self) -> dict:
+        return {
+            'success': True,
+            'message': 'pong',
+            'server_status': 'alive'
+        }
+
+    def get_stats(self) -> dict:
+        backends = []
+        total = 0
+        for backend in self.balancer.backends:
+            try:
+                stats = backend.proxy.get_stats()
+                total += stats.get('total_operations', 0)
+                backends.append({'url': backend.url, 'stats': stats})
+            except Exception as e:
+                backends.append({'url': backend.url, 'error': str(e)})
+        with self._lock:
+            gateway = {
+                'forwarded': self.forwarded,
+                'busy_retries': self.busy_retries,
+                'errors': self.errors,
+                'balancer': self.balancer.stats()
+            }
+        return {
+            'success': True,
+            'total_operations': total,
+            'server_status': 'running (gateway)',
+            'admission': self._admission.stats(),
+            'gateway': gateway,
+            'backends': backends
+        }
+
+
+def create_gateway_server(host: str, port: int, gateway: CalculatorGateway, workers: int = 0):
+    if workers > 0:
+        server = PooledXMLRPCServer((host, port), workers, requestHandler=LoggingRequestHandler, allow_none=True)
+    else:
+        server = ThreadedXMLRPCServer((host, port), requestHandler=LoggingRequestHandler, allow_none=True)
+    server.register_instance(gateway)
+    server.gateway = gateway
+    return server
+
+
+def start_gateway(host: str, port: int, backends: list, workers: int = 0, **gateway_options):
+    setup_logging(force=False)
+    try:
+        gateway = CalculatorGateway(backends, **gateway_options)
+        healthy = gateway.balancer.check_health()
+        logger.info(f"Servidores sanos al iniciar: {len(healthy)}/{len(backends)}")
+        gateway.start_health_checks()
+        server = create_gateway_server(host, port, gateway, workers)
+
+        logger.info(f"Gateway RPC iniciado en {host}:{port} -> {', '.join(backends)}")
+        logger.info("Presiona Ctrl+C para detener el gateway")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Gateway detenido por el usuario")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Error al iniciar el gateway: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calculadora RPC Gateway')
+    parser.add_argument('--host', default='localhost', help='Dirección del gateway (default: localhost)')
+    parser.add_argument('--port', type=int, default=8000, help='Puerto del gateway (default: 8000)')
+    parser.add_argument('--backend', action='append', required=True, dest='backends',
+                        help='URL de un servidor de calculadora (http:// o calc://); repetir por cada servidor')
+    parser.add_argument('--policy', choices=BALANCING_POLICIES, default='least_outstanding',
+                        help='Política de balanceo (default: least_outstanding)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Hilos worker del gateway; 0 crea un hilo por conexión (default: 0)')
+    parser.add_argument('--pool-size', type=int, default=8,
+                        help='Conexiones persistentes por servidor (default: 8)')
+    parser.add_argument('--max-in-flight', type=int, default=32,
+                        help='Solicitudes reenviadas en paralelo (default: 32)')
+    parser.add_argument('--queue-size', type=int, default=128,
+                        help='Solicitudes en espera cuando se alcanza --max-in-flight (default: 128)')
+    parser.add_argument('--queue-timeout', type=float, default=None,
+                        help='Segundos máximos de espera en cola (default: sin límite)')
+    parser.add_argument('--retries', type=int, default=5,
+                        help='Reintentos con espera exponencial cuando todos los servidores responden ocupado (default: 5)')
+    parser.add_argument('--retry-delay', type=float, default=0.1,
+                        help='Espera antes del primer reintento, se duplica en cada uno (default: 0.1)')
+    parser.add_argument('--health-interval', type=float, default=5.0,
+                        help='Segundos entre chequeos de salud; 0 los deshabilita (default: 5)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+
+    start_gateway(args.host, args.port, args.backends, args.workers,
+                  policy=args.policy, pool_size=args.pool_size, max_in_flight=args.max_in_flight,
+                  max_queue=args.queue_size, queue_timeout=args.queue_timeout, retries=args.retries,
+                  retry_delay=args.retry_delay, health_interval=args.health_interval)
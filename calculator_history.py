@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+import bisect
+import math
+import mmap
+import os
+import struct
+import threading
+import logging
+from array import array
+from fractions import Fraction
+from typing import Optional
+
+from calculator_journal import SEGMENT_PREFIX, SEGMENT_SUFFIX, list_segments, read_records
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIRECTORY = 'history'
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+INITIAL_CAPACITY = 65536
+# Filas revisadas como máximo por página cuando se filtra por operación: una página sin coincidencias
+# igual retorna next_cursor para que el llamador siga sin retener el lock mucho tiempo
+MAX_SCAN_FACTOR = 64
+
+HISTORY_DISABLED_ERROR = 'Error: El historial no está habilitado (inicie el servidor con --journal y --history)'
+
+# Columnas de ancho fijo, un archivo mapeado en memoria por columna
+COLUMNS = (
+    ('id', 'q'),
+    ('timestamp', 'd'),
+    ('op', 'B'),
+    ('a', 'd'),
+    ('b', 'd'),
+    ('result', 'd'),
+    ('flags', 'B'),
+)
+OPERATION_CODES = {'add': 1, 'subtract': 2, 'multiply': 3, 'divide': 4, 'evaluate': 5}
+OPERATION_NAMES = {code: name for name, code in OPERATION_CODES.items()}
+# flags: el valor guardado es una aproximación float del original (modos exactos o enteros > 2**53)
+FLAG_APPROXIMATE = 1
+
+_ROWS = struct.Struct('<q')
+
+
+def _column_value(value) -> tuple[float, bool]:
+    # Retorna (valor float, es_aproximado); lo que no es numérico (texto de expresión, variables) queda como NaN
+    if isinstance(value, bool) or value is None:
+        return math.nan, False
+    if isinstance(value, str):
+        # Los valores de los modos exactos llegan como texto: '0.1', '1/3', enteros grandes
+        try:
+            value = Fraction(value)
+        except (ValueError, ZeroDivisionError):
+            return math.nan, False
+    try:
+        converted = float(value)
+    except OverflowError:
+        return math.nan, True
+    except (TypeError, ValueError):
+        return math.nan, False
+    return converted, converted != value
+
+
+def _optional(value: float):
+    return None if math.isnan(value) else value
+
+
+class HistoryStore:
+    # Almacén columnar de operaciones pasadas sobre archivos mapeados en memoria. Las filas llegan en orden
+    # de id desde el journal, así que id y timestamp están ordenados y los rangos se resuelven con búsqueda
+    # binaria sin recorrer el historial; cada consulta lee solo la página pedida
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files = {}
+        self._maps = {}
+        self._views = {}
+        self._rows_file = open(os.path.join(directory, 'rows'), 'a+b')
+        if os.path.getsize(self._rows_file.name) < _ROWS.size:
+            self._rows_file.truncate(_ROWS.size)
+        self._rows_map = mmap.mmap(self._rows_file.fileno(), _ROWS.size)
+        self.rows = _ROWS.unpack_from(self._rows_map)[0]
+        self.capacity = 0
+        id_path = os.path.join(directory, 'id.col')
+        existing = os.path.getsize(id_path) // array('q').itemsize if os.path.exists(id_path) else 0
+        self._open_columns(max(INITIAL_CAPACITY, self.rows, existing))
+        if self.rows and self._views['id'][self.rows - 1] == 0:
+            # Contador adelantado a columnas que no llegaron a disco: se reconstruye desde el journal
+            logger.warning("Historial inconsistente en %s; se reconstruye desde el journal", directory)
+            self._set_rows(0)
+
+    def _open_columns(self, capacity: int):
+        self._release_views()
+        for name, code in COLUMNS:
+            f = self._files.get(name)
+            if f is None:
+                f = open(os.path.join(self.directory, f"{name}.col"), 'a+b')
+                self._files[name] = f
+            size = capacity * array(code).itemsize
+            if os.path.getsize(f.name) < size:
+                f.truncate(size)
+            self._maps[name] = mmap.mmap(f.fileno(), size)
+            self._views[name] = memoryview(self._maps[name]).cast(code)
+        self.capacity = capacity
+
+    def _release_views(self):
+        for view in self._views.values():
+            view.release()
+        for mapped in self._maps.values():
+            mapped.close()
+        self._views = {}
+        self._maps = {}
+
+    def _set_rows(self, rows: int):
+        self.rows = rows
+        _ROWS.pack_into(self._rows_map, 0, rows)
+
+    @property
+    def last_id(self) -> int:
+        return self._views['id'][self.rows - 1] if self.rows else 0
+
+    def append_records(self, records: list):
+        # records: tuplas (id, timestamp, operación, a, b, resultado) en orden de id, como las escribe el journal
+        with self._lock:
+            last_id = self.last_id
+            records = [record for record in records if record[0] > last_id]
+            if not records:
+                return
+            needed = self.rows + len(records)
+            if needed > self.capacity:
+                capacity = self.capacity
+                while capacity < needed:
+                    capacity *= 2
+                self._open_columns(capacity)
+            last_time = self._views['timestamp'][self.rows - 1] if self.rows else -math.inf
+            columns = {name: array(code) for name, code in COLUMNS}
+            for operation_id, timestamp, operation, a, b, result in records:
+                # El timestamp nunca retrocede (p. ej. por un ajuste del reloj) para que la búsqueda binaria sea válida
+                last_time = max(timestamp, last_time)
+                a, a_approximate = _column_value(a)
+                b, b_approximate = _column_value(b)
+                result, result_approximate = _column_value(result)
+                columns['id'].append(operation_id)
+                columns['timestamp'].append(last_time)
+                columns['op'].append(OPERATION_CODES.get(operation, 0))
+                columns['a'].append(a)
+                columns['b'].append(b)
+                columns['result'].append(result)
+                columns['flags'].append(FLAG_APPROXIMATE if a_approximate or b_approximate or result_approximate
+                                        else 0)
+            start, end = self.rows, self.rows + len(records)
+            for name, values in columns.items():
+                self._views[name][start:end] = values
+            # El contador se actualiza al final: una caída a mitad de grupo deja las filas nuevas invisibles
+            self._set_rows(end)
+
+    def catch_up(self, journal_directory: str) -> int:
+        # Agrega lo que el journal tiene y el historial no (primer arranque o caída antes de actualizarlo)
+        last_id = self.last_id
+        segments = list_segments(journal_directory)
+        # Cada segmento se nombra con su primer id: se salta directo al que contiene last_id + 1
+        first_ids = [int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) for name in segments]
+        start = max(0, bisect.bisect_right(first_ids, last_id + 1) - 1)
+        added = 0
+        for name in segments[start:]:
+            pending = []
+            for _, record in read_records(os.path.join(journal_directory, name)):
+                if record[0] > last_id:
+                    pending.append(tuple(record))
+                if len(pending) >= 10000:
+                    self.append_records(pending)
+                    added += len(pending)
+                    pending = []
+            if pending:
+                self.append_records(pending)
+                added += len(pending)
+        if added:
+            logger.info("Historial actualizado desde el journal: %d operaciones", added)
+        return added
+
+    def _bounds(self, id_from, id_to, time_from, time_to) -> tuple[int, int]:
+        rows = self.rows
+        low, high = 0, rows
+        ids = self._views['id']
+        times = self._views['timestamp']
+        if id_from is not None:
+            low = max(low, bisect.bisect_left(ids, id_from, 0, rows))
+        if id_to is not None:
+            high = min(high, bisect.bisect_right(ids, id_to, 0, rows))
+        if time_from is not None:
+            low = max(low, bisect.bisect_left(times, time_from, 0, rows))
+        if time_to is not None:
+            high = min(high, bisect.bisect_left(times, time_to, 0, rows))
+        return low, high
+
+    def query(self, operation: Optional[str] = None, id_from: Optional[int] = None, id_to: Optional[int] = None,
+              time_from: Optional[float] = None, time_to: Optional[float] = None, cursor: Optional[int] = None,
+              limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        # Rango de ids inclusivo y ventana de tiempo [time_from, time_to). Retorna una página en columnas y
+        # next_cursor (None al terminar) para pedir la siguiente
+        code = None
+        if operation is not None:
+            code = OPERATION_CODES.get(operation)
+            if code is None:
+                raise ValueError(f"Operación desconocida: {operation}")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"El límite de la página debe estar entre 1 y {MAX_PAGE_SIZE:,}")
+        with self._lock:
+            low, high = self._bounds(id_from, id_to, time_from, time_to)
+            if cursor is not None:
+                low = max(low, cursor)
+            views = self._views
+            if code is None:
+                end = min(high, low + limit)
+                indices = range(low, end)
+            else:
+                end = min(high, low + limit * MAX_SCAN_FACTOR)
+                ops = self._maps['op']
+                marker = bytes((code,))
+                indices = []
+                position = ops.find(marker, low, end) if low < end else -1
+                while position != -1:
+                    indices.append(position)
+                    if len(indices) == limit:
+                        end = position + 1
+                        break
+                    position = ops.find(marker, position + 1, end)
+            page = {
+                'id': [views['id'][i] for i in indices],
+                'timestamp': [views['timestamp'][i] for i in indices],
+                'operation': [OPERATION_NAMES.get(views['op'][i], 'other') for i in indices],
+                'a': [_optional(views['a'][i]) for i in indices],
+                'b': [_optional(views['b'][i]) for i in indices],
+                'result': [_optional(views['result'][i]) for i in indices],
+                'approximate': [bool(views['flags'][i] & FLAG_APPROXIMATE) for i in indices],
+            }
+        return {
+            'count': len(page['id']),
+            'columns': page,
+            'next_cursor': end if end < high else None
+        }
+
+    def stats(self) -> dict:
+        return {
+            'enabled': True,
+            'rows': self.rows,
+            'capacity': self.capacity,
+            'last_id': self.last_id
+        }
+
+    def close(self):
+        with self._lock:
+            self._release_views()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self._rows_map.close()
+            self._rows_file.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import asyncio
+import hashlib
+import threading
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from calculator_cache import MISSING, ResultCache
+
+# Métodos que se pueden envolver en call_idempotent: los que calculan y consumen operation_id
+IDEMPOTENT_METHODS = (
+    'add', 'subtract', 'multiply', 'divide',
+    'add_many', 'subtract_many', 'multiply_many', 'divide_many', 'evaluate_many', 'evaluate_batch',
+    'evaluate', 'evaluate_prepared',
+)
+
+DEFAULT_IDEMPOTENCY_SIZE = 10000
+DEFAULT_IDEMPOTENCY_TTL = 300.0
+DEFAULT_IDEMPOTENCY_WAIT = 60.0
+MAX_KEY_LENGTH = 128
+
+KEY_CONFLICT_ERROR = 'Error: La clave de idempotencia ya se usó con otra solicitud'
+IN_PROGRESS_ERROR = 'Error: La solicitud con esta clave de idempotencia sigue en curso'
+
+
+def new_idempotency_key() -> str:
+    return uuid.uuid4().hex
+
+
+def request_fingerprint(method: str, params: list) -> str:
+    return hashlib.sha1(f"{method}:{params!r}".encode('utf-8')).hexdigest()
+
+
+class IdempotencyTable:
+    # Respuestas recientes por clave de idempotencia (acotadas y con TTL). Un duplicado recibe la respuesta
+    # guardada; si la original sigue en curso espera a que termine en vez de ejecutarla otra vez
+
+    def __init__(self, max_entries: int = DEFAULT_IDEMPOTENCY_SIZE, ttl: Optional[float] = DEFAULT_IDEMPOTENCY_TTL,
+                 wait: float = DEFAULT_IDEMPOTENCY_WAIT):
+        self._responses = ResultCache(max_entries, ttl)
+        self.wait = wait
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.executed = 0
+        self.replays = 0
+        self.waits = 0
+        self.conflicts = 0
+
+    def _begin(self, key: str, fingerprint: str) -> tuple[Optional[dict], Optional[tuple], bool]:
+        # Retorna (respuesta ya resuelta, entrada en curso, es_dueño); el dueño debe llamar a _finish
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is not MISSING:
+                if entry[0] != fingerprint:
+                    self.conflicts += 1
+                    return {'success': False, 'error': KEY_CONFLICT_ERROR}, None, False
+                self.replays += 1
+                return {**entry[1], 'replayed': True}, None, False
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = (fingerprint, threading.Event())
+                self._in_flight[key] = in_flight
+                return None, in_flight, True
+            if in_flight[0] != fingerprint:
+                self.conflicts += 1
+                return {'success': False, 'error': KEY_CONFLICT_ERROR}, None, False
+            self.waits += 1
+            return None, in_flight, False
+
+    def _finish(self, key: str, in_flight: tuple, response: Optional[dict], should_store: Callable[[dict], bool]):
+        # La respuesta se guarda antes de liberar a los que esperan, así la encuentran al despertar
+        with self._lock:
+            if response is not None:
+                self.executed += 1
+                if should_store(response):
+                    self._responses.put(key, (in_flight[0], response))
+            self._in_flight.pop(key, None)
+        in_flight[1].set()
+
+    def execute(self, key: str, fingerprint: str, call: Callable[[], dict],
+                should_store: Callable[[dict], bool]) -> dict:
+        while True:
+            response, in_flight, owner = self._begin(key, fingerprint)
+            if response is not None:
+                return response
+            if not owner:
+                if not in_flight[1].wait(self.wait):
+                    return {'success': False, 'error': IN_PROGRESS_ERROR}
+                # Si la original no quedó guardada (p. ej. fue rechazada por ocupado) se vuelve a intentar
+                continue
+            response = None
+            try:
+                response = call()
+                return response
+            finally:
+                self._finish(key, in_flight, response, should_store)
+
+    async def execute_async(self, key: str, fingerprint: str, call: Callable[[], Awaitable[dict]],
+                            should_store: Callable[[dict], bool]) -> dict:
+        # Igual que execute para el servidor asyncio: call es una corrutina y solo un duplicado concurrente
+        # (caso raro) ocupa un hilo del executor mientras espera a la original
+        while True:
+            response, in_flight, owner = self._begin(key, fingerprint)
+            if response is not None:
+                return response
+            if not owner:
+                loop = asyncio.get_running_loop()
+                if not await loop.run_in_executor(None, in_flight[1].wait, self.wait):
+                    return {'success': False, 'error': IN_PROGRESS_ERROR}
+                continue
+            response = None
+            try:
+                response = await call()
+                return response
+            finally:
+                self._finish(key, in_flight, response, should_store)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        responses = self._responses.stats()
+        return {
+            'entries': responses['entries'],
+            'max_entries': responses['max_entries'],
+            'ttl': responses['ttl'],
+            'evictions': responses['evictions'],
+            'expirations': responses['expirations'],
+            'in_flight': in_flight,
+            'executed': self.executed,
+            'replays': self.replays,
+            'waits': self.waits,
+            'conflicts': self.conflicts,
+        }
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import threading
+import xmlrpc.client
+import xmlrpc.server
+from typing import Optional
+from urllib.parse import urlsplit
+
+from calculator_server import CalculatorService, _register_service
+from calculator_transport import INPROC_SCHEME
+
+DEFAULT_SERVICE_NAME = 'default'
+
+_services = {}
+_lock = threading.Lock()
+
+
+def register_service(name: str = DEFAULT_SERVICE_NAME, calculator: Optional[CalculatorService] = None,
+                     **service_options) -> CalculatorService:
+    # Publica un CalculatorService en este proceso bajo inproc://<name>
+    if calculator is None:
+        calculator = CalculatorService(**service_options)
+    dispatcher = xmlrpc.server.SimpleXMLRPCDispatcher(allow_none=True)
+    _register_service(dispatcher, calculator)
+    with _lock:
+        _services[name] = (calculator, dispatcher)
+    return calculator
+
+
+def unregister_service(name: str = DEFAULT_SERVICE_NAME):
+    with _lock:
+        _services.pop(name, None)
+
+
+def get_service(name: str = DEFAULT_SERVICE_NAME) -> Optional[CalculatorService]:
+    with _lock:
+        entry = _services.get(name)
+    return entry[0] if entry is not None else None
+
+
+def _lookup(name: str) -> xmlrpc.server.SimpleXMLRPCDispatcher:
+    with _lock:
+        entry = _services.get(name)
+    if entry is None:
+        # Mismo error que un servidor que no está escuchando, para que los clientes lo manejen igual
+        raise ConnectionRefusedError(f"No hay un servicio registrado en {INPROC_SCHEME}://{name}")
+    return entry[1]
+
+
+class InProcessServerProxy:
+    # Llama al servicio directamente, sin sockets ni serialización, con el mismo contrato que ServerProxy:
+    # los métodos se resuelven con el mismo dispatcher y las excepciones llegan como xmlrpc.client.Fault
+
+    def __init__(self, url: str = f"{INPROC_SCHEME}://{DEFAULT_SERVICE_NAME}"):
+        parts = urlsplit(url)
+        if parts.scheme.lower() != INPROC_SCHEME:
+            raise ValueError(f"Esquema de URL no soportado: {parts.scheme or url}")
+        self.name = parts.netloc or parts.path.lstrip('/') or DEFAULT_SERVICE_NAME
+
+    def _call(self, method: str, params: tuple):
+        dispatcher = _lookup(self.name)
+        try:
+            return dispatcher._dispatch(method, params)
+        except xmlrpc.client.Fault:
+            raise
+        except Exception as e:
+            raise xmlrpc.client.Fault(1, f"{type(e)}:{e}")
+
+    def __getattr__(self, name: str) -> '_InProcessMethod':
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _InProcessMethod(self, name)
+
+    def close(self):
+        pass
+
+
+class _InProcessMethod:
+
+    def __init__(self, proxy: InProcessServerProxy, name: str):
+        self._proxy = proxy
+        self._name = name
+
+    def __getattr__(self, name: str) -> '_InProcessMethod':
+        return _InProcessMethod(self._proxy, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        return self._proxy._call(self._name, args)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+import logging
+from typing import Iterator, Optional
+
+from calculator_binary import ProtocolError, decode, encode
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_FSYNC_INTERVAL = 1.0
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+SEGMENT_PREFIX = 'journal-'
+SEGMENT_SUFFIX = '.log'
+CHECKPOINT_FILE = 'checkpoint.json'
+
+# Registro: longitud (uint32) + crc32 de la carga (uint32) + carga codificada con calculator_binary:
+# [id, timestamp, operación, a, b, resultado]
+_RECORD_HEADER = struct.Struct('>II')
+
+
+def _plain(value):
+    # Decimal, Fraction y otros tipos exactos se guardan como texto, igual que viajan por la red
+    if value is None or isinstance(value, (int, float, str, list, dict)):
+        return value
+    return str(value)
+
+
+def encode_record(record: tuple) -> bytes:
+    payload = encode([_plain(value) for value in record])
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str, offset: int = 0) -> Iterator[tuple[int, list]]:
+    # Retorna (offset al final del registro, registro); se detiene en el primer registro incompleto o corrupto
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    pos = 0
+    while pos + _RECORD_HEADER.size <= len(data):
+        length, crc = _RECORD_HEADER.unpack_from(data, pos)
+        start = pos + _RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        try:
+            record = decode(payload)
+        except ProtocolError:
+            return
+        pos = start + length
+        yield offset + pos, record
+
+
+def segment_name(first_id: int) -> str:
+    return f"{SEGMENT_PREFIX}{first_id:020d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> list:
+    # El nombre lleva el primer id del segmento con ceros a la izquierda: el orden alfabético es el del journal
+    return sorted(name for name in os.listdir(directory)
+                  if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+
+class Journal:
+    # Journal de solo agregado con escritura agrupada: append() solo encola el registro y un hilo escritor
+    # vuelca todo lo pendiente en una sola escritura. Con fsync='always' append() espera a que su grupo
+    # esté en disco; con 'interval' el fsync ocurre a lo sumo cada fsync_interval segundos y con 'never'
+    # queda a cargo del sistema operativo
+
+    def __init__(self, directory: str, fsync: str = 'interval', fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE, checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync} ({', '.join(FSYNC_POLICIES)})")
+        if segment_size < 1:
+            raise ValueError("El tamaño de segmento debe ser positivo")
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.segment_size = segment_size
+        self.checkpoint_interval = checkpoint_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._closing = False
+        self._closed = False
+        # Error que detuvo al hilo escritor; desde ese momento append() falla en vez de perder registros
+        self._failed = None
+        self.last_id = 0
+        self.counts = {}
+        self._durable_id = 0
+        self._file = None
+        self._segment = None
+        self._segment_bytes = 0
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        self._last_checkpoint = time.monotonic()
+        self._checkpoint_state = None
+        self._records_written = 0
+        self._groups = 0
+        self._fsyncs = 0
+        self._listeners = []
+        self.recovered = self._recover()
+        self._durable_id = self.last_id
+
+        self._thread = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _load_checkpoint(self) -> Optional[dict]:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        try:
+            with open(path) as f:
+                checkpoint = json.load(f)
+            return checkpoint if isinstance(checkpoint, dict) else None
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning("Checkpoint del journal ilegible, se relee el journal completo: %s", e)
+            return None
+
+    def _recover(self) -> dict:
+        # Con checkpoint solo se releen los registros escritos después de él, no la historia completa
+        start = time.perf_counter()
+        segments = list_segments(self.directory)
+        checkpoint = self._load_checkpoint()
+        first_segment, offset = 0, 0
+        if checkpoint is not None and checkpoint.get('segment') in segments:
+            path = os.path.join(self.directory, checkpoint['segment'])
+            if checkpoint.get('offset', 0) <= os.path.getsize(path):
+                first_segment = segments.index(checkpoint['segment'])
+                offset = checkpoint.get('offset', 0)
+                self.last_id = checkpoint.get('last_id', 0)
+                self.counts = dict(checkpoint.get('counts', {}))
+            else:
+                checkpoint = None
+        else:
+            checkpoint = None
+
+        replayed = 0
+        for index in range(first_segment, len(segments)):
+            path = os.path.join(self.directory, segments[index])
+            end = offset
+            for end, record in read_records(path, offset):
+                operation_id, operation = record[0], record[2]
+                self.last_id = max(self.last_id, operation_id)
+                self.counts[operation] = self.counts.get(operation, 0) + 1
+                replayed += 1
+            size = os.path.getsize(path)
+            if end < size:
+                if index == len(segments) - 1:
+                    # Registro a medio escribir por una caída: se descarta para poder seguir agregando
+                    logger.warning("Journal %s truncado en %d bytes (registro incompleto al final)",
+                                   segments[index], end)
+                    os.truncate(path, end)
+                else:
+                    logger.error("Journal %s corrupto desde el byte %d; se omite el resto del segmento",
+                                 segments[index], end)
+            offset = 0
+
+        if segments:
+            self._segment = segments[-1]
+            self._segment_bytes = os.path.getsize(os.path.join(self.directory, self._segment))
+        elapsed = time.perf_counter() - start
+        if segments:
+            logger.info("Journal recuperado: %d operaciones, %d registros releídos en %.3fs%s",
+                        self.last_id, replayed, elapsed, ' desde checkpoint' if checkpoint else '')
+        return {
+            'from_checkpoint': checkpoint is not None,
+            'records_replayed': replayed,
+            'seconds': elapsed
+        }
+
+    def append(self, operation: str, a=None, b=None, result=None) -> int:
+        return self.append_many(operation, [(a, b, result)])
+
+    def append_many(self, operation: str, items: list) -> int:
+        # Asigna ids consecutivos bajo el mismo lock que ordena los registros: el journal queda ordenado por id.
+        # Retorna el primer id asignado
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El journal está cerrado")
+            self._check_failed()
+            now = time.time()
+            first_id = self.last_id + 1
+            self._buffer.extend((first_id + i, now, operation, a, b, result) for i, (a, b, result) in enumerate(items))
+            self.last_id += len(items)
+            self.counts[operation] = self.counts.get(operation, 0) + len(items)
+            self._cond.notify_all()
+            if self.fsync == 'always':
+                last_id = self.last_id
+                while self._durable_id < last_id and self._failed is None and not self._closed:
+                    self._cond.wait()
+                if self._durable_id < last_id:
+                    self._check_failed()
+        return first_id
+
+    def _check_failed(self):
+        if self._failed is not None:
+            raise RuntimeError(f"El journal dejó de escribir: {self._failed}")
+
+    def add_listener(self, listener):
+        # listener(grupo) se llama desde el hilo escritor con cada grupo ya escrito, en orden de id
+        self._listeners.append(listener)
+
+    def _notify_listeners(self, batch: list):
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error("Error en un suscriptor del journal: %s", e)
+
+    def _open_segment(self, first_id: int):
+        if self._file is not None:
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        if self._segment is None or self._segment_bytes >= self.segment_size:
+            self._segment = segment_name(first_id)
+            self._segment_bytes = 0
+        self._file = open(os.path.join(self.directory, self._segment), 'ab', buffering=0)
+
+    def _write(self, batch: list):
+        if self._file is None or self._segment_bytes >= self.segment_size:
+            self._open_segment(batch[0][0])
+        data = b''.join(encode_record(record) for record in batch)
+        self._file.write(data)
+        self._segment_bytes += len(data)
+        self._records_written += len(batch)
+        self._groups += 1
+        self._dirty = True
+
+    def _sync(self):
+        if self._file is not None and self._dirty and self.fsync != 'never':
+            os.fsync(self._file.fileno())
+            self._fsyncs += 1
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _write_checkpoint(self, state: tuple):
+        last_id, counts = state
+        checkpoint = {
+            'segment': self._segment,
+            'offset': self._segment_bytes,
+            'last_id': last_id,
+            'counts': counts,
+            'timestamp': time.time()
+        }
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        temp = path + '.tmp'
+        with open(temp, 'w') as f:
+            json.dump(checkpoint, f)
+            if self.fsync != 'never':
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp, path)
+        self._last_checkpoint = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closing:
+                    timeout = None
+                    if self._dirty:
+                        timeout = max(0.0, self._last_fsync + self.fsync_interval - time.monotonic())
+                    elif self._checkpoint_state is not None:
+                        timeout = max(0.0, self._last_checkpoint + self.checkpoint_interval - time.monotonic())
+                    if timeout == 0.0 or not self._cond.wait(timeout):
+                        break
+                batch, self._buffer = self._buffer, []
+                # Contadores tomados junto con el grupo: el checkpoint cubre exactamente lo escrito
+                state = (self.last_id, dict(self.counts)) if batch else None
+                closing = self._closing
+            try:
+                if batch:
+                    self._write(batch)
+                    self._checkpoint_state = state
+                now = time.monotonic()
+                if self.fsync == 'always' or closing or now - self._last_fsync >= self.fsync_interval:
+                    self._sync()
+                if batch and self.fsync == 'always':
+                    with self._cond:
+                        self._durable_id = batch[-1][0]
+                        self._cond.notify_all()
+                if self._checkpoint_state is not None and not self._dirty and (
+                        closing or now - self._last_checkpoint >= self.checkpoint_interval):
+                    self._write_checkpoint(self._checkpoint_state)
+                    self._checkpoint_state = None
+            except Exception as e:
+                # Sin reintentos: el grupo pudo quedar escrito a medias y el siguiente arranque descarta la
+                # cola rota. Los que esperan en fsync='always' y los nuevos append() reciben el error
+                logger.critical("El journal dejó de escribir en %s: %s", self.directory, e)
+                with self._cond:
+                    self._failed = e
+                    self._buffer = []
+                    self._cond.notify_all()
+                break
+            if batch:
+                self._notify_listeners(batch)
+            if closing and not batch:
+                break
+
+    def close(self):
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        atexit.unregister(self.close)
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = len(self._buffer)
+        return {
+            'enabled': True,
+            'directory': self.directory,
+            'fsync': self.fsync,
+            'last_id': self.last_id,
+            'segment': self._segment,
+            'segments': len(list_segments(self.directory)),
+            'records_written': self._records_written,
+            'groups': self._groups,
+            'avg_group_size': self._records_written / self._groups if self._groups else 0.0,
+            'fsyncs': self._fsyncs,
+            'pending': pending,
+            'failed': str(self._failed) if self._failed is not None else None,
+            'recovered': self.recovered
+        }
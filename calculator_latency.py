@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+import json
+import random
+import threading
+from bisect import bisect_left
+from typing import Optional, Union
+
+from calculator_constants import SIMULATED_FAULT_ERROR
+
+
+class LatencyModel:
+    name = 'base'
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            return max(0.0, self._draw(self._rng))
+
+    def _draw(self, rng: random.Random) -> float:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+
+class ZeroLatency(LatencyModel):
+    name = 'zero'
+
+    def sample(self) -> float:
+        return 0.0
+
+
+class FixedLatency(LatencyModel):
+    name = 'fixed'
+
+    def __init__(self, delay: float, seed: Optional[int] = None):
+        super().__init__(seed)
+        self.delay = delay
+
+    def sample(self) -> float:
+        return self.delay
+
+    def describe(self) -> str:
+        return f"fixed:{self.delay}"
+
+
+class UniformLatency(LatencyModel):
+    name = 'uniform'
+
+    def __init__(self, low: float, high: float, seed: Optional[int] = None):
+        super().__init__(seed)
+        if high < low:
+            raise ValueError("uniform: el máximo debe ser mayor o igual al mínimo")
+        self.low = low
+        self.high = high
+
+    def _draw(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+    def describe(self) -> str:
+        return f"uniform:{self.low},{self.high}"
+
+
+class ExponentialLatency(LatencyModel):
+    name = 'exponential'
+
+    def __init__(self, mean: float, cap: Optional[float] = None, seed: Optional[int] = None):
+        super().__init__(seed)
+        if mean <= 0:
+            raise ValueError("exponential: la media debe ser mayor que 0")
+        self.mean = mean
+        self.cap = cap
+
+    def _draw(self, rng: random.Random) -> float:
+        value = rng.expovariate(1.0 / self.mean)
+        if self.cap is not None:
+            value = min(value, self.cap)
+        return value
+
+    def describe(self) -> str:
+        return f"exponential:{self.mean}" + (f",{self.cap}" if self.cap is not None else "")
+
+
+class HistogramLatency(LatencyModel):
+    name = 'histogram'
+
+    def __init__(self, buckets: list, seed: Optional[int] = None):
+        # buckets: lista de (limite_superior, cantidad) ordenada por limite
+        super().__init__(seed)
+        buckets = sorted((float(bound), float(count)) for bound, count in buckets if count > 0)
+        if not buckets:
+            raise ValueError("histogram: el histograma no tiene muestras")
+        self.bounds = [bound for bound, _ in buckets]
+        self.cumulative = []
+        total = 0.0
+        for _, count in buckets:
+            total += count
+            self.cumulative.append(total)
+        self.total = total
+
+    @classmethod
+    def from_samples(cls, samples: list, seed: Optional[int] = None) -> 'HistogramLatency':
+        counts = {}
+        for value in samples:
+            counts[float(value)] = counts.get(float(value), 0) + 1
+        return cls(list(counts.items()), seed)
+
+    @classmethod
+    def from_file(cls, path: str, seed: Optional[int] = None) -> 'HistogramLatency':
+        # Acepta {"buckets": [[limite, cantidad], ...]}, {"samples": [...]} o una lista de muestras
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and 'buckets' in data:
+            return cls(data['buckets'], seed)
+        if isinstance(data, dict) and 'samples' in data:
+            return cls.from_samples(data['samples'], seed)
+        if isinstance(data, list):
+            return cls.from_samples(data, seed)
+        raise ValueError(f"histogram: formato no reconocido en {path}")
+
+    def _draw(self, rng: random.Random) -> float:
+        index = bisect_left(self.cumulative, rng.random() * self.total)
+        index = min(index, len(self.bounds) - 1)
+        low = self.bounds[index - 1] if index > 0 else 0.0
+        return rng.uniform(low, self.bounds[index])
+
+    def describe(self) -> str:
+        return f"histogram:{len(self.bounds)} buckets"
+
+
+def build_latency_model(spec: Union[str, float, int, LatencyModel, None],
+                        seed: Optional[int] = None) -> LatencyModel:
+    # spec: "zero", "fixed:3", "uniform:1,5", "exponential:3[,max]" o "histogram:archivo.json"
+    if isinstance(spec, LatencyModel):
+        return spec
+    if spec is None:
+        return ZeroLatency()
+    if isinstance(spec, (int, float)):
+        return FixedLatency(float(spec)) if spec > 0 else ZeroLatency()
+
+    kind, _, args = spec.strip().partition(':')
+    kind = kind.lower()
+    try:
+        if kind in ('zero', 'none', '0'):
+            return ZeroLatency()
+        if kind == 'fixed':
+            return FixedLatency(float(args), seed)
+        if kind == 'uniform':
+            low, high = (float(x) for x in args.split(','))
+            return UniformLatency(low, high, seed)
+        if kind in ('exponential', 'exp'):
+            values = [float(x) for x in args.split(',')]
+            return ExponentialLatency(values[0], values[1] if len(values) > 1 else None, seed)
+        if kind in ('histogram', 'hist'):
+            return HistogramLatency.from_file(args, seed)
+        return FixedLatency(float(spec), seed)
+    except (TypeError, ValueError, IndexError) as e:
+        raise ValueError(f"Modelo de latencia inválido '{spec}': {str(e)}")
+
+
+class FaultInjector:
+
+    def __init__(self, rate: float = 0.0, seed: Optional[int] = None,
+                 error: str = SIMULATED_FAULT_ERROR):
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("La tasa de fallos debe estar entre 0 y 1")
+        self.rate = rate
+        self.error = error
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.injected = 0
+
+    def maybe_fail(self) -> Optional[dict]:
+        if self.rate <= 0.0:
+            return None
+        with self._lock:
+            if self._rng.random() >= self.rate:
+                return None
+            self.injected += 1
+        return {
+            'success': False,
+            'error': self.error
+        }
+
+
+def derive_seed(seed: Optional[int], stream: int) -> Optional[int]:
+    # Semillas independientes por flujo para que cada modelo sea reproducible por separado
+    if seed is None:
+        return None
+    return (seed * 1000003 + stream) % (2 ** 63)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Optional, Union
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+LOG_FORMATS = ('text', 'json')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    # Solo encola el registro: el formateo del mensaje y la escritura ocurren en el hilo del listener.
+    # Si la cola se llena el registro se descarta en lugar de bloquear la solicitud
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_lock = threading.Lock()
+_handler: Optional[AsyncQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_output: Optional[logging.Handler] = None
+_queue_size = DEFAULT_QUEUE_SIZE
+
+
+def _start_listener():
+    global _listener
+    _listener = logging.handlers.QueueListener(_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # El hilo del listener no sobrevive a os.fork: cada proceso worker arranca el suyo con una cola nueva
+    if _handler is None:
+        return
+    _handler.queue = queue.Queue(_queue_size)
+    _start_listener()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def setup_logging(level: Union[str, int] = 'INFO', log_format: str = 'text',
+                  queue_size: int = DEFAULT_QUEUE_SIZE, stream=None,
+                  force: bool = True) -> Optional[AsyncQueueHandler]:
+    # Reemplaza los handlers del root: solo los puntos de entrada deben llamarla. Con force=False, igual que
+    # logging.basicConfig, no hace nada si la aplicación ya configuró su logging
+    global _handler, _output, _queue_size
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Formato de log inválido: {log_format}")
+    if not force and logging.getLogger().handlers:
+        return _handler
+    with _lock:
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(LOG_FORMAT))
+        root = logging.getLogger()
+        if _handler is None:
+            _queue_size = queue_size
+            _handler = AsyncQueueHandler(queue.Queue(queue_size))
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(_handler)
+            _output = output
+            _start_listener()
+            atexit.register(_stop_listener)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_restart_after_fork)
+        else:
+            # Reconfiguración: se cambia el destino sin perder lo que ya está en la cola
+            _stop_listener()
+            _output = output
+            _start_listener()
+    set_log_level(level)
+    return _handler
+
+
+def set_log_level(level: Union[str, int], name: Optional[str] = None) -> str:
+    if isinstance(level, str):
+        level = level.upper()
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Nivel de log inválido: {level}")
+    target = logging.getLogger(name)
+    target.setLevel(level)
+    return logging.getLevelName(target.getEffectiveLevel())
+
+
+def logging_stats() -> dict:
+    root = logging.getLogger()
+    return {
+        'level': logging.getLevelName(root.getEffectiveLevel()),
+        'queued': _handler.queue.qsize() if _handler is not None else 0,
+        'dropped': _handler.dropped if _handler is not None else 0,
+    }
+
+
+def add_logging_arguments(parser):
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='INFO', type=str.upper,
+                        help='Nivel de log inicial; DEBUG muestra el detalle de cada solicitud (default: INFO)')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='Formato de log: texto o una línea JSON por registro (default: text)')
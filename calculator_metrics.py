@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+import threading
+from bisect import bisect_left
+from typing import Optional
+
+# Límites de los buckets de latencia en segundos: 100us * 1.5^i, hasta ~1000s
+LATENCY_BUCKETS = tuple(0.0001 * 1.5 ** i for i in range(41))
+
+
+class _ShardSet:
+    # Cada hilo escribe en su propio shard sin locks; las lecturas suman todos los shards.
+    # Los shards de hilos terminados se consolidan para que la memoria no crezca con ThreadingMixIn
+
+    def __init__(self, new_shard, merge):
+        self._new_shard = new_shard
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = new_shard()
+
+    def local(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def collect(self) -> list:
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = alive
+            return [self._retired] + [shard for _, shard in alive]
+
+
+def _merge_counts(target: dict, source: dict):
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._shards = _ShardSet(dict, _merge_counts)
+
+    def inc(self, key: tuple = (), amount: int = 1):
+        shard = self._shards.local()
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self) -> dict:
+        totals = {}
+        for shard in self._shards.collect():
+            _merge_counts(totals, dict(shard))
+        return totals
+
+    def total(self) -> int:
+        return sum(self.values().values())
+
+
+def _new_series() -> list:
+    # [conteos por bucket..., +Inf, suma, máximo]
+    return [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0.0]
+
+
+def _merge_series(target: dict, source: dict):
+    for key, series in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(series)
+            continue
+        for i in range(len(series) - 1):
+            current[i] += series[i]
+        current[-1] = max(current[-1], series[-1])
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._shards = _ShardSet(dict, _merge_series)
+
+    def observe(self, value: float, key: tuple = ()):
+        shard = self._shards.local()
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = _new_series()
+        series[bisect_left(LATENCY_BUCKETS, value)] += 1
+        series[-2] += value
+        if value > series[-1]:
+            series[-1] = value
+
+    def series(self) -> dict:
+        merged = {}
+        for shard in self._shards.collect():
+            _merge_series(merged, dict(shard))
+        return merged
+
+    @staticmethod
+    def percentile(series: list, q: float) -> float:
+        counts = series[:len(LATENCY_BUCKETS) + 1]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if not count:
+                continue
+            if seen + count >= rank:
+                # Interpolación lineal dentro del bucket, acotada por el máximo observado
+                low = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                high = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else series[-1]
+                value = low + (high - low) * (rank - seen) / count
+                return min(value, series[-1])
+            seen += count
+        return series[-1]
+
+    @classmethod
+    def summarize(cls, series: list) -> dict:
+        count = sum(series[:len(LATENCY_BUCKETS) + 1])
+        return {
+            'count': count,
+            'avg': series[-2] / count if count else 0.0,
+            'p50': cls.percentile(series, 0.50),
+            'p95': cls.percentile(series, 0.95),
+            'p99': cls.percentile(series, 0.99),
+            'max': series[-1],
+        }
+
+    def summary(self) -> dict:
+        return {key: self.summarize(series) for key, series in self.series().items()}
+
+    def combined(self) -> dict:
+        total = {}
+        for series in self.series().values():
+            _merge_series(total, {(): series})
+        return self.summarize(total.get((), _new_series()))
+
+
+def _label_text(labels: tuple, key: tuple, extra: Optional[str] = None) -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labels, key)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class ServiceMetrics:
+
+    def __init__(self):
+        self.operations = Counter('calculator_operations_total', 'Operaciones completadas', ('operation',))
+        self.rejections = Counter('calculator_rejections_total', 'Solicitudes rechazadas por la admisión', ('reason',))
+        self.errors = Counter('calculator_errors_total', 'Solicitudes con error', ('operation', 'kind'))
+        self.queue_time = Histogram('calculator_queue_seconds', 'Tiempo de espera en la cola de admisión')
+        self.service_time = Histogram('calculator_service_seconds', 'Tiempo de servicio tras la admisión',
+                                      ('operation',))
+
+    def to_dict(self) -> dict:
+        service = {key[0]: summary for key, summary in self.service_time.summary().items()}
+        service['all'] = self.service_time.combined()
+        return {
+            'operations': {key[0]: value for key, value in self.operations.values().items()},
+            'rejections': {key[0]: value for key, value in self.rejections.values().items()},
+            'errors': {f"{key[0]}:{key[1]}": value for key, value in self.errors.values().items()},
+            'queue_time': self.queue_time.combined(),
+            'service_time': service,
+        }
+
+    def to_prometheus(self, gauges: Optional[dict] = None) -> str:
+        lines = []
+        for counter in (self.operations, self.rejections, self.errors):
+            lines.append(f"# HELP {counter.name} {counter.help}")
+            lines.append(f"# TYPE {counter.name} counter")
+            for key, value in sorted(counter.values().items()):
+                lines.append(f"{counter.name}{_label_text(counter.labels, key)} {value}")
+        for histogram in (self.queue_time, self.service_time):
+            lines.append(f"# HELP {histogram.name} {histogram.help}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            for key, series in sorted(histogram.series().items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + (None,), series):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound is None else f'le="{bound:.6g}"'
+                    lines.append(f"{histogram.name}_bucket{_label_text(histogram.labels, key, le)} {cumulative}")
+                lines.append(f"{histogram.name}_sum{_label_text(histogram.labels, key)} {series[-2]}")
+                lines.append(f"{histogram.name}_count{_label_text(histogram.labels, key)} {cumulative}")
+        for name, (help_text, value) in (gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
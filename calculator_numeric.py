@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import decimal
+from fractions import Fraction
+from typing import Optional
+
+from calculator_vector import OPERATIONS
+
+FLOAT_MODE = 'float'
+DECIMAL_MODE = 'decimal'
+FRACTION_MODE = 'fraction'
+INT_MODE = 'int'
+NUMERIC_MODES = (FLOAT_MODE, DECIMAL_MODE, FRACTION_MODE, INT_MODE)
+
+DEFAULT_DECIMAL_PRECISION = 28
+DECIMAL_ROUNDINGS = ('ROUND_HALF_EVEN', 'ROUND_HALF_UP', 'ROUND_HALF_DOWN', 'ROUND_UP', 'ROUND_DOWN',
+                     'ROUND_CEILING', 'ROUND_FLOOR', 'ROUND_05UP')
+# Límites de los operandos exactos: sin ellos un "1e999999" en modo fraction crearía un entero gigante
+MAX_OPERAND_LENGTH = 1000
+MAX_EXPONENT = 1000
+
+INEXACT_DIVISION_ERROR = "Error: La división no es exacta en modo int (use el modo fraction o decimal)"
+
+
+class NumericError(ValueError):
+    pass
+
+
+def normalize_mode(mode) -> Optional[str]:
+    if mode is None:
+        return FLOAT_MODE
+    if not isinstance(mode, str):
+        return None
+    mode = mode.strip().lower()
+    return mode if mode in NUMERIC_MODES else None
+
+
+def resolve_mode(mode) -> str:
+    resolved = normalize_mode(mode)
+    if resolved is None:
+        raise NumericError(f"Modo numérico desconocido '{mode}' ({', '.join(NUMERIC_MODES)})")
+    return resolved
+
+
+def decimal_context(precision: int = DEFAULT_DECIMAL_PRECISION, rounding: str = 'ROUND_HALF_EVEN') -> decimal.Context:
+    if precision < 1:
+        raise ValueError("La precisión decimal debe ser al menos 1")
+    if rounding not in DECIMAL_ROUNDINGS:
+        raise ValueError(f"Redondeo decimal inválido: {rounding}")
+    return decimal.Context(prec=precision, rounding=getattr(decimal, rounding),
+                           traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow])
+
+
+def _operand_text(value) -> str:
+    if isinstance(value, bool):
+        raise NumericError(f"Valor no numérico: {value!r}")
+    if isinstance(value, (int, float)):
+        # repr del float es la forma más corta que lo reconstruye: 0.1 se lee como '0.1' y no 0.1000000000000000055...
+        return repr(value)
+    if not isinstance(value, str):
+        raise NumericError(f"Valor no numérico: {value!r}")
+    text = value.strip()
+    if not text:
+        raise NumericError("Valor vacío")
+    if len(text) > MAX_OPERAND_LENGTH:
+        raise NumericError(f"Valor demasiado largo (máximo {MAX_OPERAND_LENGTH} caracteres)")
+    return text
+
+
+def _parse_decimal(text: str) -> decimal.Decimal:
+    try:
+        value = decimal.Decimal(text)
+    except decimal.InvalidOperation:
+        raise NumericError(f"Valor decimal inválido: '{text}'")
+    if not value.is_finite():
+        raise NumericError(f"Valor no finito: '{text}'")
+    if abs(value.adjusted()) > MAX_EXPONENT:
+        raise NumericError(f"Exponente fuera de rango (máximo {MAX_EXPONENT}): '{text}'")
+    return value
+
+
+def parse_operand(value, mode: str):
+    # Convierte un operando recibido (texto, int o float) al tipo exacto del modo
+    text = _operand_text(value)
+    if mode == DECIMAL_MODE:
+        return _parse_decimal(text)
+    if mode == FRACTION_MODE:
+        numerator, slash, denominator = text.partition('/')
+        if slash:
+            try:
+                value = Fraction(int(numerator), int(denominator))
+            except ValueError:
+                raise NumericError(f"Fracción inválida: '{text}'")
+            except ZeroDivisionError:
+                raise NumericError(f"Fracción con denominador cero: '{text}'")
+            return value
+        return Fraction(_parse_decimal(text))
+    if mode == INT_MODE:
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        value = _parse_decimal(text)
+        if value != value.to_integral_value():
+            raise NumericError(f"Valor entero inválido: '{text}'")
+        return int(value)
+    raise NumericError(f"Modo numérico desconocido '{mode}' ({', '.join(NUMERIC_MODES)})")
+
+
+def encode_value(value) -> str:
+    # Los modos exactos viajan como texto: XML-RPC solo transporta enteros de 32 bits y floats binarios
+    return str(value)
+
+
+def apply_operation(operation: str, a, b, mode: str, context: Optional[decimal.Context] = None):
+    # El llamador ya descartó la división por cero; en modo int solo se aceptan divisiones exactas
+    if mode == DECIMAL_MODE:
+        context = context or decimal.getcontext()
+        return getattr(context, operation)(a, b)
+    if mode == INT_MODE and operation == 'divide':
+        return a // b
+    return OPERATIONS[operation][1](a, b)
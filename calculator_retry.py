@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import http.client
+import random
+import threading
+import time
+import logging
+import xmlrpc.client
+from typing import Callable, Optional
+
+from calculator_binary import ProtocolError
+from calculator_constants import BUSY_ERROR, QUEUE_TIMEOUT_ERROR, SIMULATED_FAULT_ERROR
+from calculator_idempotency import IN_PROGRESS_ERROR
+from calculator_vector import DIVISION_BY_ZERO_ERROR
+
+logger = logging.getLogger(__name__)
+
+# busy: el servidor rechazó la solicitud sin ejecutarla (ocupado, cola llena o la clave sigue en curso)
+# server: fallo del servidor antes de ejecutar (fallo simulado)
+# transport: la solicitud pudo no llegar o la respuesta se perdió; repetirla solo es seguro si es idempotente
+# validation y division_by_zero: el resultado no cambia al repetir
+ERROR_CLASSES = ('busy', 'server', 'transport', 'validation', 'division_by_zero')
+RETRYABLE_CLASSES = ('busy', 'server', 'transport')
+JITTER_MODES = ('full', 'equal', 'none')
+
+BUSY_ERRORS = (BUSY_ERROR, QUEUE_TIMEOUT_ERROR, IN_PROGRESS_ERROR)
+SERVER_ERRORS = (SIMULATED_FAULT_ERROR,)
+# Métodos que se pueden repetir tras un error de transporte sin clave de idempotencia
+SAFE_METHODS = ('ping', 'get_stats', 'query_history', 'prepare')
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_DELAY = 0.05
+DEFAULT_MAX_DELAY = 2.0
+DEFAULT_BUDGET_RATIO = 0.2
+DEFAULT_BUDGET_RESERVE = 10
+
+
+def classify_error(result=None, error: Optional[BaseException] = None) -> Optional[str]:
+    # Retorna la clase del error de una respuesta o excepción, o None si la llamada tuvo éxito
+    # (o la excepción no es de comunicación y no corresponde reintentarla)
+    if error is not None:
+        if isinstance(error, xmlrpc.client.Fault):
+            return 'validation'
+        if isinstance(error, (OSError, EOFError, xmlrpc.client.ProtocolError, http.client.HTTPException,
+                              ProtocolError)):
+            return 'transport'
+        return None
+    if not isinstance(result, dict) or result.get('success', True):
+        return None
+    message = result.get('error')
+    if message in BUSY_ERRORS:
+        return 'busy'
+    if message in SERVER_ERRORS:
+        return 'server'
+    if message == DIVISION_BY_ZERO_ERROR:
+        return 'division_by_zero'
+    return 'validation'
+
+
+class RetryBudget:
+    # Cada llamada nueva deposita ratio fichas y cada reintento consume una: en estado estable los reintentos
+    # no superan ratio veces el tráfico, y reserve permite una ráfaga inicial. Con el servidor saturado el
+    # presupuesto se agota y los clientes dejan de multiplicar la carga
+
+    def __init__(self, ratio: float = DEFAULT_BUDGET_RATIO, reserve: int = DEFAULT_BUDGET_RESERVE):
+        if ratio < 0 or reserve < 0:
+            raise ValueError("El presupuesto de reintentos no puede ser negativo")
+        self.ratio = ratio
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self.tokens = float(reserve)
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    # Middleware de reintentos para CalculatorClientCore: repite las llamadas con errores reintentables
+    # esperando base_delay * 2**intento (hasta max_delay) con jitter, sin pasar del presupuesto ni del
+    # plazo por llamada. Los reintentos pasan por el resto de la cadena, así que reusan la misma clave
+    # de idempotencia que fijó el cliente
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, jitter: str = 'full', deadline: Optional[float] = None,
+                 retry_on: tuple = RETRYABLE_CLASSES, budget: Optional[RetryBudget] = None,
+                 is_safe: Optional[Callable[[str], bool]] = None, seed: Optional[int] = None):
+        if max_retries < 0:
+            raise ValueError("El número de reintentos no puede ser negativo")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("Se requiere 0 <= base_delay <= max_delay")
+        if jitter not in JITTER_MODES:
+            raise ValueError(f"Jitter inválido: {jitter} ({', '.join(JITTER_MODES)})")
+        unknown = set(retry_on) - set(ERROR_CLASSES)
+        if unknown:
+            raise ValueError(f"Clases de error desconocidas: {', '.join(sorted(unknown))}")
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = tuple(retry_on)
+        self.budget = budget if budget is not None else RetryBudget()
+        # is_safe(método) indica si repetir tras un error de transporte no puede ejecutar la operación dos veces
+        self.is_safe = is_safe or (lambda method: method in SAFE_METHODS)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.recovered = 0
+        self.errors = {name: 0 for name in ERROR_CLASSES}
+        self.budget_exhausted = 0
+        self.deadline_exceeded = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt: int) -> float:
+        # Espera antes del reintento número attempt (desde 1)
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter == 'none':
+            return delay
+        with self._lock:
+            sample = self._rng.random()
+        if self.jitter == 'equal':
+            return delay / 2 + delay / 2 * sample
+        return delay * sample
+
+    def _retryable(self, method: str, kind: Optional[str]) -> bool:
+        if kind not in self.retry_on:
+            return False
+        return kind != 'transport' or self.is_safe(method)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def __call__(self, method: str, args: tuple, call: Callable[[], object]):
+        self._count('calls')
+        self.budget.deposit()
+        deadline = time.monotonic() + self.deadline if self.deadline is not None else None
+        attempt = 0
+        while True:
+            try:
+                result, error = call(), None
+            except Exception as e:
+                result, error = None, e
+            kind = classify_error(result, error)
+            if kind is None:
+                if attempt and error is None:
+                    self._count('recovered')
+                if error is not None:
+                    raise error
+                return result
+            with self._lock:
+                self.errors[kind] += 1
+
+            if self._retryable(method, kind):
+                stop = 'gave_up' if attempt >= self.max_retries else None
+                if stop is None:
+                    delay = self.backoff(attempt + 1)
+                    if deadline is not None and time.monotonic() + delay >= deadline:
+                        stop = 'deadline_exceeded'
+                    elif not self.budget.withdraw():
+                        stop = 'budget_exhausted'
+                if stop is None:
+                    attempt += 1
+                    self._count('retries')
+                    logger.debug("Reintento %d de %s en %.3fs (%s)", attempt, method, delay, kind)
+                    time.sleep(delay)
+                    continue
+                self._count(stop)
+                logger.warning("Sin más reintentos para %s tras %d intento(s) (%s): %s",
+                               method, attempt + 1, stop, error if error is not None else result.get('error'))
+            if error is not None:
+                raise error
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'recovered': self.recovered,
+                'errors': dict(self.errors),
+                'budget_exhausted': self.budget_exhausted,
+                'deadline_exceeded': self.deadline_exceeded,
+                'gave_up': self.gave_up,
+                'budget_tokens': self.budget.tokens
+            }
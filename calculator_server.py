@@ -1,223 +1,936 @@
 #!/usr/bin/env python3
 
 import xmlrpc.server
+import socketserver
 import sys
+import os
+import signal
 import logging
-from typing import Union
+from typing import Callable, Union, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import threading
 import time
+import itertools
+import hashlib
+from calculator_latency import LatencyModel, FaultInjector, build_latency_model, derive_seed
+from calculator_binary import BinaryRPCServer
+from calculator_cache import ResultCache, MISSING, CACHE_POLICIES
+from calculator_metrics import ServiceMetrics
+from calculator_constants import BUSY_ERROR, MAX_BATCH_SIZE, QUEUE_TIMEOUT_ERROR
+from calculator_journal import FSYNC_POLICIES, Journal
+from calculator_history import (HISTORY_DIRECTORY, HISTORY_DISABLED_ERROR, DEFAULT_PAGE_SIZE, HistoryStore)
+from calculator_idempotency import (IDEMPOTENT_METHODS, DEFAULT_IDEMPOTENCY_SIZE, DEFAULT_IDEMPOTENCY_TTL,
+                                    MAX_KEY_LENGTH, IdempotencyTable, request_fingerprint)
+from calculator_expr import Expression, ExpressionError, compile_expression
+from calculator_logging import (setup_logging, set_log_level, logging_stats, add_logging_arguments)
+from calculator_vector import (OPERATIONS, DIVISION_BY_ZERO_ERROR, INVALID_INPUT_ERROR, RESULT_RANGE_ERROR,
+                               normalize_operation, is_number, evaluate_vector, wire_result)
+from calculator_numeric import (FLOAT_MODE, INT_MODE, NUMERIC_MODES, DEFAULT_DECIMAL_PRECISION, DECIMAL_ROUNDINGS,
+                                INEXACT_DIVISION_ERROR, NumericError, resolve_mode, parse_operand, encode_value,
+                                apply_operation, decimal_context)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+EXPRESSION_CACHE_SIZE = 1024
+PREPARED_CACHE_SIZE = 256
+MAX_PREPARED_ROWS = 1000000
+PREPARED_NOT_FOUND_ERROR = 'Error: Expresión preparada no encontrada, vuelva a llamar a prepare'
+# Métodos que ocupan un slot de admisión fuera de las operaciones simples (ver admitted_work)
+BATCH_METHODS = {'add_many': 'add', 'subtract_many': 'subtract', 'multiply_many': 'multiply',
+                 'divide_many': 'divide'}
+ADMITTED_METHODS = (*BATCH_METHODS, 'evaluate_many', 'evaluate_batch', 'evaluate', 'evaluate_prepared')
+
+OPERATION_LABELS = {
+    'add': ('suma', 'SUMA'),
+    'subtract': ('resta', 'RESTA'),
+    'multiply': ('multiplicación', 'MULTIPLICACIÓN'),
+    'divide': ('división', 'DIVISION'),
+}
+
+
+class AdmissionController:
+
+    def __init__(self, slots: int = 1, max_queue: int = 0, queue_timeout: Optional[float] = None):
+        if slots < 1:
+            raise ValueError("El número de slots debe ser al menos 1")
+        if max_queue < 0:
+            raise ValueError("El tamaño de la cola no puede ser negativo")
+        self.slots = slots
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._queued = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_queue_depth = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> tuple[Optional[str], float]:
+        # Retorna (motivo de rechazo o None si fue admitida, segundos esperados en cola)
+        if timeout is None:
+            timeout = self.queue_timeout
+        with self._cond:
+            if self._in_flight < self.slots and not self._queue:
+                self._in_flight += 1
+                self._admitted += 1
+                return None, 0.0
+            if len(self._queue) >= self.max_queue:
+                self._rejected += 1
+                return 'busy', 0.0
+
+            ticket = object()
+            self._queue.append(ticket)
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            start = time.monotonic()
+            deadline = None if timeout is None else start + timeout
+            try:
+                while self._queue[0] is not ticket or self._in_flight >= self.slots:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._timed_out += 1
+                        return 'timeout', time.monotonic() - start
+                    self._cond.wait(remaining)
+                self._in_flight += 1
+                self._admitted += 1
+                waited = time.monotonic() - start
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+                return None, waited
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            if self._in_flight > 0:
+                self._in_flight -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'slots': self.slots,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'in_flight': self._in_flight,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_queue_depth,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'queued': self._queued,
+                'avg_wait': self._total_wait / self._admitted if self._admitted else 0.0,
+                'max_wait': self._max_wait,
+            }
+
+
+class AdmittedWork:
+    # Parte de una solicitud que ocupa un slot de admisión: run() hace el cálculo y arma la respuesta, y
+    # on_error(e) la reemplaza si run() falla. Así el servidor síncrono y el asyncio comparten la validación
+    # y el cálculo, y cada uno admite y espera el delay a su manera
+
+    def __init__(self, label: str, metric: str, run: Callable[[], dict], on_error: Callable[[Exception], dict]):
+        self.label = label
+        self.metric = metric
+        self.run = run
+        self.on_error = on_error
+
 
 class CalculatorService:
     
-    def __init__(self):
-        self.operations_count = 0
-        self._op_lock = threading.Lock()
-        self._processing = False
+    def __init__(self, slots: int = 1, max_queue: int = 0, queue_timeout: Optional[float] = None,
+                 latency: Union[str, float, LatencyModel, None] = 'fixed:3',
+                 pre_latency: Union[str, float, LatencyModel, None] = 'zero',
+                 fault_rate: float = 0.0, seed: Optional[int] = None,
+                 cache_size: int = 0, cache_ttl: Optional[float] = None, cache_policy: str = 'lru',
+                 decimal_precision: int = DEFAULT_DECIMAL_PRECISION, decimal_rounding: str = 'ROUND_HALF_EVEN',
+                 journal: Optional[str] = None, fsync: str = 'interval', history: bool = False,
+                 idempotency_size: int = DEFAULT_IDEMPOTENCY_SIZE,
+                 idempotency_ttl: Optional[float] = DEFAULT_IDEMPOTENCY_TTL):
+        self.metrics = ServiceMetrics()
+        self._operation_ids = itertools.count(1)
+        # Con journal los ids los asigna el journal y los contadores se recuperan del último checkpoint
+        self._journal = Journal(journal, fsync) if journal else None
+        if self._journal is not None:
+            for operation, count in self._journal.counts.items():
+                self.metrics.operations.inc((operation,), count)
+        # El historial se alimenta del hilo escritor del journal, fuera del camino de cada solicitud
+        self._history = None
+        if history:
+            if self._journal is None:
+                raise ValueError("El historial requiere el journal (--journal)")
+            self._history = HistoryStore(os.path.join(journal, HISTORY_DIRECTORY))
+            self._history.catch_up(journal)
+            self._journal.add_listener(self._history.append_records)
+        self._admission = AdmissionController(slots, max_queue, queue_timeout)
+        self._service_latency = build_latency_model(latency, derive_seed(seed, 1))
+        self._pre_latency = build_latency_model(pre_latency, derive_seed(seed, 2))
+        self._faults = FaultInjector(fault_rate, derive_seed(seed, 3))
+        self._cache = ResultCache(cache_size, cache_ttl, cache_policy) if cache_size > 0 else None
+        # Expresiones compiladas por texto fuente: las fórmulas repetidas no se vuelven a parsear
+        self._expressions = ResultCache(EXPRESSION_CACHE_SIZE)
+        self._prepared = ResultCache(PREPARED_CACHE_SIZE)
+        self._decimal_context = decimal_context(decimal_precision, decimal_rounding)
+        self._idempotency = IdempotencyTable(idempotency_size, idempotency_ttl)
 
-    def _maybe_fail(self):
-        # Modo determinístico: por ahora no se simulan fallos aleatorios
-        return None
+    @property
+    def operations_count(self) -> int:
+        return self.metrics.operations.total()
+
+    def _next_operation_id(self, operation: str, a=None, b=None, result=None) -> int:
+        # next() sobre itertools.count es atómico en CPython: no requiere lock
+        self.metrics.operations.inc((operation,))
+        if self._journal is not None:
+            return self._journal.append(operation, a, b, result)
+        return next(self._operation_ids)
+
+    def _maybe_fail(self) -> Union[None, dict]:
+        return self._faults.maybe_fail()
+
+    def _service_delay(self):
+        delay = self._service_latency.sample()
+        logger.debug("Delay de procesamiento: %.3fs", delay)
+        if delay > 0:
+            time.sleep(delay)
 
-    def _pre_process(self) -> Union[None, dict]:
-        # Modo determinístico: delay fijo a 0s para forzar colisiones entre solicitudes concurrentes
-        pre_delay = 0
-        print(f"Delay previo (fijo): {pre_delay}s")
-        time.sleep(pre_delay)
+    def _pre_process(self, operation: str = 'batch') -> Union[None, dict]:
+        pre_delay = self._pre_latency.sample()
+        logger.debug("Delay previo: %.3fs", pre_delay)
+        if pre_delay > 0:
+            time.sleep(pre_delay)
         failure = self._maybe_fail()
         if failure is not None:
-            print(f"Fallo simulado: {failure['error']}")
+            logger.debug("Fallo simulado: %s", failure['error'])
+            self.metrics.errors.inc((operation, 'fault'))
             return failure
-        if not self._op_lock.acquire(blocking=False):
-            print("Solicitud rechazada: proceso en ejecución")
+        reason, waited = self._admission.acquire()
+        if reason is not None:
+            self.metrics.rejections.inc((reason,))
+        else:
+            self.metrics.queue_time.observe(waited)
+        if reason == 'busy':
+            logger.debug("Solicitud rechazada: proceso en ejecución")
             return {
                 'success': False,
-                'error': 'proceso en ejecución, solicitud rechazada'
+                'error': BUSY_ERROR
             }
-        self._processing = True
+        if reason == 'timeout':
+            logger.debug("Solicitud rechazada: %.2fs esperando en cola", waited)
+            return {
+                'success': False,
+                'error': QUEUE_TIMEOUT_ERROR
+            }
+        if waited:
+            logger.debug("Espera en cola: %.2fs", waited)
         return None
 
     def _post_process(self):
-        self._processing = False
-        try:
-            self._op_lock.release()
-        except Exception:
-            pass
+        self._admission.release()
 
     def _validate_numbers(self, a, b) -> Union[None, dict]:
         if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
             return {
                 'success': False,
-                'error': 'entradas inválidas'
+                'error': INVALID_INPUT_ERROR
             }
         return None
     
-    def add(self, a: Union[int, float], b: Union[int, float]) -> dict:
+    def _exact_operands(self, operation: str, a, b, mode) -> tuple:
+        # Retorna (modo, a, b, error); en los modos exactos los operandos llegan como texto y se convierten aquí
         try:
-            pre = self._pre_process()
-            if pre is not None:
-                return pre
-            try:
-                val = self._validate_numbers(a, b)
-                if val is not None:
-                    return val
-                self.operations_count += 1
-                print("Delay de procesamiento: 3s")
-                time.sleep(3)
-                result = a + b
-            finally:
-                self._post_process()
-            print(f"Solicitud recibida: SUMA - {a} + {b}")
-            logger.info(f"Operación #{self.operations_count}: {a} + {b} = {result}")
-            return {
-                'success': True,
-                'result': result,
-                'operation': f"{a} + {b}",
-                'operation_id': self.operations_count
+            mode = resolve_mode(mode)
+            if mode != FLOAT_MODE:
+                a, b = parse_operand(a, mode), parse_operand(b, mode)
+            return mode, a, b, None
+        except NumericError as e:
+            self.metrics.errors.inc((operation, 'invalid'))
+            return mode, a, b, {
+                'success': False,
+                'error': f"Error: {str(e)}",
+                'operation': f"{a} {OPERATIONS[operation][0]} {b}"
             }
-        except Exception as e:
-            error_msg = f"Error en suma: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
-            logger.error(error_msg)
+
+    def _check_operands(self, operation: str, a, b, mode: str = FLOAT_MODE) -> Union[None, dict]:
+        if mode == FLOAT_MODE:
+            val = self._validate_numbers(a, b)
+            if val is not None:
+                self.metrics.errors.inc((operation, 'invalid'))
+                return val
+        if operation == 'divide' and b == 0:
+            error_msg = DIVISION_BY_ZERO_ERROR
+            self.metrics.errors.inc((operation, 'division_by_zero'))
+            logger.error("Operación %s / %s: %s", a, b, error_msg)
             return {
                 'success': False,
                 'error': error_msg,
-                'operation': f"{a} + {b}"
+                'operation': f"{a} / {b}"
             }
-    
-    def subtract(self, a: Union[int, float], b: Union[int, float]) -> dict:
+        if mode == INT_MODE and operation == 'divide' and a % b:
+            self.metrics.errors.inc((operation, 'invalid'))
+            return {
+                'success': False,
+                'error': INEXACT_DIVISION_ERROR,
+                'operation': f"{a} / {b}"
+            }
+        return None
+
+    def _cached_operation(self, operation: str, a, b, mode: str = FLOAT_MODE) -> Union[None, dict]:
+        # Los aciertos no pasan por la admisión ni por el delay simulado
+        if self._cache is None or (mode == FLOAT_MODE and not (is_number(a) and is_number(b))):
+            return None
+        if operation == 'divide' and b == 0:
+            return None
+        # En los modos exactos la clave usa el texto: Decimal('1.0') y Decimal('1.00') son iguales pero
+        # sus resultados se escriben distinto
+        key = (operation, type(a), a, type(b), b) if mode == FLOAT_MODE else (operation, mode, str(a), str(b))
+        result = self._cache.get(key)
+        if result is MISSING:
+            return None
+        symbol = OPERATIONS[operation][0]
+        operation_id = self._next_operation_id(operation, a, b, result)
+        logger.info("Operación #%d (caché): %s %s %s = %s", operation_id, a, symbol, b, result)
+        response = {
+            'success': True,
+            'result': result,
+            'operation': f"{a} {symbol} {b}",
+            'operation_id': operation_id,
+            'cached': True
+        }
+        if mode != FLOAT_MODE:
+            response['result'] = encode_value(result)
+            response['mode'] = mode
+        return response
+
+    def _complete_operation(self, operation: str, a, b, mode: str = FLOAT_MODE) -> dict:
+        symbol, fn = OPERATIONS[operation]
+        if mode == FLOAT_MODE:
+            result = wire_result(fn(a, b))
+            if result is None:
+                return self._range_error(operation, f"{a} {symbol} {b}")
+        else:
+            result = apply_operation(operation, a, b, mode, self._decimal_context)
+        if self._cache is not None:
+            key = (operation, type(a), a, type(b), b) if mode == FLOAT_MODE else (operation, mode, str(a), str(b))
+            self._cache.put(key, result)
+        operation_id = self._next_operation_id(operation, a, b, result)
+        logger.info("Operación #%d: %s %s %s = %s", operation_id, a, symbol, b, result)
+        response = {
+            'success': True,
+            'result': result,
+            'operation': f"{a} {symbol} {b}",
+            'operation_id': operation_id
+        }
+        if mode != FLOAT_MODE:
+            response['result'] = encode_value(result)
+            response['mode'] = mode
+        return response
+
+    def _range_error(self, operation: str, text: str) -> dict:
+        self.metrics.errors.inc((operation, 'out_of_range'))
+        logger.error("Operación %s: %s", text, RESULT_RANGE_ERROR)
+        return {
+            'success': False,
+            'error': RESULT_RANGE_ERROR,
+            'operation': text
+        }
+
+    def _operation_error(self, operation: str, a, b, e: Exception) -> dict:
+        error_msg = f"Error en {OPERATION_LABELS[operation][0]}: {str(e)}"
+        self.metrics.errors.inc((operation, 'exception'))
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'operation': f"{a} {OPERATIONS[operation][0]} {b}"
+        }
+
+    def _execute_operation(self, operation: str, a, b, mode: str = FLOAT_MODE) -> dict:
         try:
-            pre = self._pre_process()
+            if mode != FLOAT_MODE:
+                mode, a, b, error = self._exact_operands(operation, a, b, mode)
+                if error is not None:
+                    return error
+            cached = self._cached_operation(operation, a, b, mode)
+            if cached is not None:
+                return cached
+            pre = self._pre_process(operation)
             if pre is not None:
                 return pre
+            start = time.perf_counter()
             try:
-                val = self._validate_numbers(a, b)
-                if val is not None:
-                    return val
-                self.operations_count += 1
-                print("Delay de procesamiento: 3s")
-                time.sleep(3)
-                result = a - b
+                error = self._check_operands(operation, a, b, mode)
+                if error is not None:
+                    return error
+                self._service_delay()
+                return self._complete_operation(operation, a, b, mode)
             finally:
                 self._post_process()
-            print(f"Solicitud recibida: RESTA - {a} - {b}")
-            logger.info(f"Operación #{self.operations_count}: {a} - {b} = {result}")
-            return {
-                'success': True,
-                'result': result,
-                'operation': f"{a} - {b}",
-                'operation_id': self.operations_count
-            }
+                self.metrics.service_time.observe(time.perf_counter() - start, (operation,))
         except Exception as e:
-            error_msg = f"Error en resta: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'operation': f"{a} - {b}"
-            }
+            return self._operation_error(operation, a, b, e)
+
+    def add(self, a: Union[int, float, str], b: Union[int, float, str], mode: str = FLOAT_MODE) -> dict:
+        return self._execute_operation('add', a, b, mode)
+    
+    def subtract(self, a: Union[int, float, str], b: Union[int, float, str], mode: str = FLOAT_MODE) -> dict:
+        return self._execute_operation('subtract', a, b, mode)
     
-    def multiply(self, a: Union[int, float], b: Union[int, float]) -> dict:
+    def multiply(self, a: Union[int, float, str], b: Union[int, float, str], mode: str = FLOAT_MODE) -> dict:
+        return self._execute_operation('multiply', a, b, mode)
+    
+    def divide(self, a: Union[int, float, str], b: Union[int, float, str], mode: str = FLOAT_MODE) -> dict:
+        return self._execute_operation('divide', a, b, mode)
+
+    def _evaluate_elements(self, operation: str, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> list:
+        if mode != FLOAT_MODE:
+            return self._evaluate_exact_elements(operation, a_values, b_values, mode)
+        symbol = OPERATIONS[operation][0]
+        valid = [i for i, (a, b) in enumerate(zip(a_values, b_values)) if is_number(a) and is_number(b)]
+        if len(valid) == len(a_values):
+            values = evaluate_vector(operation, a_values, b_values)
+        else:
+            values = [None] * len(a_values)
+            computed = evaluate_vector(operation, [a_values[i] for i in valid], [b_values[i] for i in valid])
+            for i, value in zip(valid, computed):
+                values[i] = value
+        valid = set(valid) if len(valid) != len(a_values) else None
+
+        results = []
+        # Con journal los ids se asignan juntos al final, en el mismo orden en que quedan registrados
+        operation_ids = self._operation_ids if self._journal is None else itertools.repeat(None)
+        invalid = division_by_zero = out_of_range = 0
+        for i, (a, b, value) in enumerate(zip(a_values, b_values, values)):
+            result = wire_result(value) if value is not None else None
+            if valid is not None and i not in valid:
+                invalid += 1
+                results.append({
+                    'success': False,
+                    'error': INVALID_INPUT_ERROR,
+                    'operation': f"{a} {symbol} {b}"
+                })
+            elif value is None:
+                division_by_zero += 1
+                results.append({
+                    'success': False,
+                    'error': DIVISION_BY_ZERO_ERROR,
+                    'operation': f"{a} {symbol} {b}"
+                })
+            elif result is None:
+                out_of_range += 1
+                results.append({
+                    'success': False,
+                    'error': RESULT_RANGE_ERROR,
+                    'operation': f"{a} {symbol} {b}"
+                })
+            else:
+                results.append({
+                    'success': True,
+                    'result': result,
+                    'operation': f"{a} {symbol} {b}",
+                    'operation_id': next(operation_ids)
+                })
+        self._count_elements(operation, len(results), invalid, division_by_zero, out_of_range)
+        if self._journal is not None:
+            self._journal_elements(operation, a_values, b_values, results)
+        return results
+
+    def _evaluate_exact_elements(self, operation: str, a_values: list, b_values: list, mode: str) -> list:
+        # Los tipos exactos no tienen camino vectorizado: cada elemento se convierte y se calcula por separado
+        symbol = OPERATIONS[operation][0]
+        context = self._decimal_context
+        results = []
+        operation_ids = self._operation_ids if self._journal is None else itertools.repeat(None)
+        invalid = division_by_zero = 0
+        for a, b in zip(a_values, b_values):
+            try:
+                a, b = parse_operand(a, mode), parse_operand(b, mode)
+            except NumericError as e:
+                invalid += 1
+                results.append({
+                    'success': False,
+                    'error': f"Error: {str(e)}",
+                    'operation': f"{a} {symbol} {b}"
+                })
+                continue
+            if operation == 'divide' and b == 0:
+                division_by_zero += 1
+                results.append({
+                    'success': False,
+                    'error': DIVISION_BY_ZERO_ERROR,
+                    'operation': f"{a} {symbol} {b}"
+                })
+            elif mode == INT_MODE and operation == 'divide' and a % b:
+                invalid += 1
+                results.append({
+                    'success': False,
+                    'error': INEXACT_DIVISION_ERROR,
+                    'operation': f"{a} {symbol} {b}"
+                })
+            else:
+                results.append({
+                    'success': True,
+                    'result': encode_value(apply_operation(operation, a, b, mode, context)),
+                    'operation': f"{a} {symbol} {b}",
+                    'operation_id': next(operation_ids),
+                    'mode': mode
+                })
+        self._count_elements(operation, len(results), invalid, division_by_zero)
+        if self._journal is not None:
+            self._journal_elements(operation, a_values, b_values, results)
+        return results
+
+    def _journal_elements(self, operation: str, a_values: list, b_values: list, results: list):
+        completed = [(a, b, item) for a, b, item in zip(a_values, b_values, results) if item['success']]
+        if not completed:
+            return
+        first_id = self._journal.append_many(operation, [(a, b, item['result']) for a, b, item in completed])
+        for offset, (_, _, item) in enumerate(completed):
+            item['operation_id'] = first_id + offset
+
+    def _journal_rows(self, compiled: Expression, columns: dict, results: list, errors: list):
+        # Cada fila evaluada se registra como un evaluate: así los contadores recuperados del journal coinciden
+        failed = {error['row'] for error in errors}
+        records = []
+        for i, result in enumerate(results):
+            if i in failed:
+                continue
+            values = {name: columns[name][i] if isinstance(columns[name], (list, tuple)) else columns[name]
+                      for name in compiled.variables}
+            records.append((compiled.text, values, result))
+        self._journal.append_many('evaluate', records)
+
+    def _count_elements(self, operation: str, total: int, invalid: int, division_by_zero: int,
+                        out_of_range: int = 0):
+        completed = total - invalid - division_by_zero - out_of_range
+        if completed:
+            self.metrics.operations.inc((operation,), completed)
+        if invalid:
+            self.metrics.errors.inc((operation, 'invalid'), invalid)
+        if division_by_zero:
+            self.metrics.errors.inc((operation, 'division_by_zero'), division_by_zero)
+        if out_of_range:
+            self.metrics.errors.inc((operation, 'out_of_range'), out_of_range)
+
+    def _run_admitted(self, work: Union[dict, AdmittedWork]) -> dict:
+        if not isinstance(work, AdmittedWork):
+            return work
         try:
-            pre = self._pre_process()
+            pre = self._pre_process(work.label)
             if pre is not None:
                 return pre
+            start = time.perf_counter()
             try:
-                val = self._validate_numbers(a, b)
-                if val is not None:
-                    return val
-                self.operations_count += 1
-                print("Delay de procesamiento: 3s")
-                time.sleep(3)
-                result = a * b
+                self._service_delay()
+                return work.run()
             finally:
                 self._post_process()
-            print(f"Solicitud recibida: MULTIPLICACIÓN - {a} * {b}")
-            logger.info(f"Operación #{self.operations_count}: {a} * {b} = {result}")
+                self.metrics.service_time.observe(time.perf_counter() - start, (work.metric,))
+        except Exception as e:
+            return work.on_error(e)
+
+    def admitted_work(self, method: str, params: list) -> Union[dict, AdmittedWork]:
+        # Validación previa a la admisión de los métodos en ADMITTED_METHODS; el resto de la solicitud
+        # queda en el AdmittedWork retornado (o la respuesta, si terminó antes de necesitar un slot)
+        if method in BATCH_METHODS:
+            return self._evaluate_many_work(BATCH_METHODS[method], *params)
+        return getattr(self, f"_{method}_work")(*params)
+
+    def _batch_error(self, e: Exception) -> dict:
+        error_msg = f"Error en lote: {str(e)}"
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+    def _batch_work(self, groups: dict, size: int, label: str, mode: str = FLOAT_MODE) -> Union[dict, AdmittedWork]:
+        # groups: operación -> (índices, valores a, valores b); un solo slot y un solo delay por lote
+        if size > MAX_BATCH_SIZE:
+            return {
+                'success': False,
+                'error': f"Error: El lote excede el máximo de {MAX_BATCH_SIZE} elementos"
+            }
+
+        def run() -> dict:
+            results = [None] * size
+            for operation, (indices, a_values, b_values) in groups.items():
+                for i, item in zip(indices, self._evaluate_elements(operation, a_values, b_values, mode)):
+                    results[i] = item
+            errors = sum(1 for item in results if not item['success'])
+            logger.info("Lote %s: %d elementos, %d errores", label, size, errors)
             return {
                 'success': True,
-                'result': result,
-                'operation': f"{a} * {b}",
-                'operation_id': self.operations_count
+                'results': results,
+                'count': size,
+                'errors': errors
             }
-        except Exception as e:
-            error_msg = f"Error en multiplicación: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
-            logger.error(error_msg)
+
+        return AdmittedWork('batch', 'batch', run, self._batch_error)
+
+    def evaluate_many(self, operation: str, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> dict:
+        return self._run_admitted(self._evaluate_many_work(operation, a_values, b_values, mode))
+
+    def _evaluate_many_work(self, operation: str, a_values: list, b_values: list,
+                            mode: str = FLOAT_MODE) -> Union[dict, AdmittedWork]:
+        try:
+            mode = resolve_mode(mode)
+            op = normalize_operation(operation)
+            if op is None:
+                return {
+                    'success': False,
+                    'error': f"Error: Operación desconocida '{operation}'"
+                }
+            if not isinstance(a_values, list) or not isinstance(b_values, list):
+                return {
+                    'success': False,
+                    'error': INVALID_INPUT_ERROR
+                }
+            if len(a_values) != len(b_values):
+                return {
+                    'success': False,
+                    'error': 'Error: Las listas de operandos deben tener la misma longitud'
+                }
+            size = len(a_values)
+            return self._batch_work({op: (range(size), a_values, b_values)}, size, op.upper(), mode)
+        except NumericError as e:
             return {
                 'success': False,
-                'error': error_msg,
-                'operation': f"{a} * {b}"
+                'error': f"Error: {str(e)}"
             }
-    
-    def divide(self, a: Union[int, float], b: Union[int, float]) -> dict:
+        except Exception as e:
+            return self._batch_error(e)
+
+    def add_many(self, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> dict:
+        return self.evaluate_many('add', a_values, b_values, mode)
+
+    def subtract_many(self, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> dict:
+        return self.evaluate_many('subtract', a_values, b_values, mode)
+
+    def multiply_many(self, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> dict:
+        return self.evaluate_many('multiply', a_values, b_values, mode)
+
+    def divide_many(self, a_values: list, b_values: list, mode: str = FLOAT_MODE) -> dict:
+        return self.evaluate_many('divide', a_values, b_values, mode)
+
+    def evaluate_batch(self, operations: list, mode: str = FLOAT_MODE) -> dict:
+        return self._run_admitted(self._evaluate_batch_work(operations, mode))
+
+    def _evaluate_batch_work(self, operations: list, mode: str = FLOAT_MODE) -> Union[dict, AdmittedWork]:
+        # operations: lista de [operación, a, b]; el modo numérico aplica a todo el lote
         try:
-            pre = self._pre_process()
-            if pre is not None:
-                return pre
-            print(f"Solicitud recibida: DIVISION - {a} / {b}")
-            try:
-                val = self._validate_numbers(a, b)
-                if val is not None:
-                    return val
-                if b == 0:
-                    error_msg = "Error: División por cero no permitida"
-                    print(f"Error en servidor: {error_msg}")
-                    logger.error(f"Operación #{self.operations_count + 1}: {error_msg}")
+            mode = resolve_mode(mode)
+            if not isinstance(operations, list):
+                return {
+                    'success': False,
+                    'error': INVALID_INPUT_ERROR
+                }
+            groups = {}
+            for i, item in enumerate(operations):
+                op = None
+                if isinstance(item, (list, tuple)) and len(item) == 3:
+                    op = normalize_operation(item[0])
+                if op is None:
                     return {
                         'success': False,
-                        'error': error_msg,
-                        'operation': f"{a} / {b}"
+                        'error': f"Error: Elemento {i} inválido, se espera [operación, a, b]"
                     }
-                self.operations_count += 1
-                print("Delay de procesamiento: 3s")
-                time.sleep(3)
-                result = a / b
-            finally:
-                self._post_process()
-            logger.info(f"Operación #{self.operations_count}: {a} / {b} = {result}")
+                indices, a_values, b_values = groups.setdefault(op, ([], [], []))
+                indices.append(i)
+                a_values.append(item[1])
+                b_values.append(item[2])
+            return self._batch_work(groups, len(operations), 'MIXTO', mode)
+        except NumericError as e:
             return {
-                'success': True,
-                'result': result,
-                'operation': f"{a} / {b}",
-                'operation_id': self.operations_count
+                'success': False,
+                'error': f"Error: {str(e)}"
             }
         except Exception as e:
-            error_msg = f"Error en división: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
-            logger.error(error_msg)
+            return self._batch_error(e)
+
+    def _compiled_expression(self, expression: str) -> Expression:
+        if not isinstance(expression, str):
+            return compile_expression(expression)
+        compiled = self._expressions.get(expression)
+        if compiled is MISSING:
+            compiled = compile_expression(expression)
+            self._expressions.put(expression, compiled)
+        return compiled
+
+    def _expression_result(self, compiled: Expression, values: dict, result, cached: bool = False) -> dict:
+        operation_id = self._next_operation_id('evaluate', compiled.text, values, result)
+        logger.info("Operación #%d%s: %s = %s", operation_id, ' (caché)' if cached else '', compiled.text, result)
+        response = {
+            'success': True,
+            'result': result,
+            'operation': compiled.text,
+            'operation_id': operation_id
+        }
+        if cached:
+            response['cached'] = True
+        return response
+
+    def _expression_error(self, e: Exception) -> dict:
+        error_msg = f"Error en expresión: {str(e)}"
+        self.metrics.errors.inc(('evaluate', 'exception'))
+        logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg
+        }
+
+    def evaluate(self, expression: str, variables: Optional[dict] = None) -> dict:
+        return self._run_admitted(self._evaluate_work(expression, variables))
+
+    def _evaluate_work(self, expression: str, variables: Optional[dict] = None) -> Union[dict, AdmittedWork]:
+        # La expresión completa se evalúa con una sola admisión y un solo delay de procesamiento
+        try:
+            try:
+                compiled = self._compiled_expression(expression)
+                values = compiled.bind(variables)
+            except ExpressionError as e:
+                self.metrics.errors.inc(('evaluate', 'invalid'))
+                return {
+                    'success': False,
+                    'error': f"Error: {str(e)}"
+                }
+            cache_key = None
+            if self._cache is not None:
+                cache_key = ('evaluate', compiled.text, tuple((name, type(v), v) for name, v in values.items()))
+                result = self._cache.get(cache_key)
+                if result is not MISSING:
+                    return self._expression_result(compiled, values, result, cached=True)
+
+            def run() -> dict:
+                try:
+                    result = wire_result(compiled.evaluate(values))
+                except ZeroDivisionError:
+                    self.metrics.errors.inc(('evaluate', 'division_by_zero'))
+                    logger.error("Expresión %s: %s", compiled.text, DIVISION_BY_ZERO_ERROR)
+                    return {
+                        'success': False,
+                        'error': DIVISION_BY_ZERO_ERROR,
+                        'operation': compiled.text
+                    }
+                except OverflowError:
+                    result = None
+                if result is None:
+                    return self._range_error('evaluate', compiled.text)
+                if cache_key is not None:
+                    self._cache.put(cache_key, result)
+                return self._expression_result(compiled, values, result)
+
+            return AdmittedWork('evaluate', 'evaluate', run, self._expression_error)
+        except Exception as e:
+            return self._expression_error(e)
+
+    def prepare(self, expression: str) -> dict:
+        try:
+            compiled = self._compiled_expression(expression)
+        except ExpressionError as e:
+            self.metrics.errors.inc(('evaluate', 'invalid'))
             return {
                 'success': False,
-                'error': error_msg,
-                'operation': f"{a} / {b}"
+                'error': f"Error: {str(e)}"
             }
-    
+        # El handle depende del árbol y no del texto: preparar la misma fórmula dos veces da el mismo handle,
+        # y dos literales que se escriben igual (repr) no comparten handle
+        handle = hashlib.sha1(repr(compiled.tree).encode('utf-8')).hexdigest()[:16]
+        self._prepared.put(handle, compiled)
+        logger.info("Expresión preparada %s: %s", handle, compiled.text)
+        return {
+            'success': True,
+            'handle': handle,
+            'expression': compiled.text,
+            'variables': list(compiled.variables)
+        }
+
+    def evaluate_prepared(self, handle: str, columns: Optional[dict] = None) -> dict:
+        return self._run_admitted(self._evaluate_prepared_work(handle, columns))
+
+    def _evaluate_prepared_work(self, handle: str, columns: Optional[dict] = None) -> Union[dict, AdmittedWork]:
+        # columns: {variable: [valores...]} o {variable: escalar}; una sola admisión y un solo delay por llamada
+        try:
+            compiled = self._prepared.get(handle) if isinstance(handle, str) else MISSING
+            if compiled is MISSING:
+                return {
+                    'success': False,
+                    'error': PREPARED_NOT_FOUND_ERROR
+                }
+            if columns is not None and not isinstance(columns, dict):
+                return {
+                    'success': False,
+                    'error': INVALID_INPUT_ERROR
+                }
+
+            def run() -> dict:
+                try:
+                    results, errors = compiled.evaluate_columns(columns, max_rows=MAX_PREPARED_ROWS)
+                except ExpressionError as e:
+                    self.metrics.errors.inc(('evaluate', 'invalid'))
+                    return {
+                        'success': False,
+                        'error': f"Error: {str(e)}"
+                    }
+                invalid = sum(1 for error in errors if error['error'] == INVALID_INPUT_ERROR)
+                out_of_range = sum(1 for error in errors if error['error'] == RESULT_RANGE_ERROR)
+                division_by_zero = len(errors) - invalid - out_of_range
+                if len(results) > len(errors):
+                    self.metrics.operations.inc(('evaluate',), len(results) - len(errors))
+                    if self._journal is not None:
+                        self._journal_rows(compiled, columns or {}, results, errors)
+                if invalid:
+                    self.metrics.errors.inc(('evaluate', 'invalid'), invalid)
+                if division_by_zero:
+                    self.metrics.errors.inc(('evaluate', 'division_by_zero'), division_by_zero)
+                if out_of_range:
+                    self.metrics.errors.inc(('evaluate', 'out_of_range'), out_of_range)
+                logger.info("Expresión preparada %s: %d filas, %d errores", handle, len(results), len(errors))
+                return {
+                    'success': True,
+                    'handle': handle,
+                    'expression': compiled.text,
+                    'count': len(results),
+                    'results': results,
+                    'errors': errors
+                }
+
+            return AdmittedWork('evaluate', 'batch', run, self._expression_error)
+        except Exception as e:
+            return self._expression_error(e)
+
     def get_stats(self) -> dict:
         try:
-            print("Solicitud recibida: ESTADÍSTICAS")
+            logger.debug("Solicitud recibida: ESTADÍSTICAS")
             return {
                 'success': True,
                 'total_operations': self.operations_count,
-                'server_status': 'running'
+                'server_status': 'running',
+                'admission': self._admission.stats(),
+                'latency': {
+                    'pre': self._pre_latency.describe(),
+                    'service': self._service_latency.describe(),
+                    'fault_rate': self._faults.rate,
+                    'faults_injected': self._faults.injected
+                },
+                'cache': self._cache.stats() if self._cache is not None else {'enabled': False},
+                'expressions': self._expressions.stats(),
+                'prepared': self._prepared.stats(),
+                'journal': self._journal.stats() if self._journal is not None else {'enabled': False},
+                'history': self._history.stats() if self._history is not None else {'enabled': False},
+                'idempotency': self._idempotency.stats(),
+                'numeric': {
+                    'modes': list(NUMERIC_MODES),
+                    'decimal_precision': self._decimal_context.prec,
+                    'decimal_rounding': self._decimal_context.rounding
+                },
+                'metrics': self.metrics.to_dict(),
+                'logging': logging_stats()
             }
         except Exception as e:
             error_msg = f"Error al obtener estadísticas: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
+            logger.error(error_msg)
             return {
                 'success': False,
                 'error': error_msg
             }
     
+    def _is_final(self, response) -> bool:
+        # Los rechazos por ocupado, espera en cola o fallo simulado no ejecutaron nada: se pueden reintentar
+        return not (isinstance(response, dict) and not response.get('success')
+                    and response.get('error') in (BUSY_ERROR, QUEUE_TIMEOUT_ERROR, self._faults.error))
+
+    def _idempotency_error(self, key: str, method: str) -> Union[None, dict]:
+        if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+            return {
+                'success': False,
+                'error': f"Error: La clave de idempotencia debe ser texto de 1 a {MAX_KEY_LENGTH} caracteres"
+            }
+        if method not in IDEMPOTENT_METHODS:
+            return {
+                'success': False,
+                'error': f"Error: El método '{method}' no admite clave de idempotencia"
+            }
+        return None
+
+    def call_idempotent(self, key: str, method: str, params: Optional[list] = None) -> dict:
+        # Ejecuta method(*params) una sola vez por clave: un reintento con la misma clave recibe la respuesta
+        # original (marcada con replayed) sin repetir el trabajo ni consumir otro operation_id
+        error = self._idempotency_error(key, method)
+        if error is not None:
+            return error
+        params = list(params or [])
+
+        def call() -> dict:
+            try:
+                return getattr(self, method)(*params)
+            except TypeError as e:
+                return {
+                    'success': False,
+                    'error': f"Error: {str(e)}"
+                }
+
+        response = self._idempotency.execute(key, request_fingerprint(method, params), call, self._is_final)
+        if response.get('replayed'):
+            logger.debug("Respuesta repetida para la clave de idempotencia %s", key)
+        return response
+
+    def query_history(self, criteria: Optional[dict] = None) -> dict:
+        # criteria: operation, id_from, id_to (inclusivos), time_from, time_to ([desde, hasta)), cursor y limit.
+        # Retorna una página en columnas; con next_cursor se pide la siguiente sin releer las anteriores
+        if self._history is None:
+            return {
+                'success': False,
+                'error': HISTORY_DISABLED_ERROR
+            }
+        criteria = criteria or {}
+        if not isinstance(criteria, dict):
+            return {
+                'success': False,
+                'error': INVALID_INPUT_ERROR
+            }
+        operation = criteria.get('operation') or None
+        if operation is not None:
+            # Acepta los mismos códigos que los lotes ('+', 'suma', ...) además de 'evaluate'
+            operation = normalize_operation(operation) or operation
+        try:
+            page = self._history.query(
+                operation=operation,
+                id_from=criteria.get('id_from'),
+                id_to=criteria.get('id_to'),
+                time_from=criteria.get('time_from'),
+                time_to=criteria.get('time_to'),
+                cursor=criteria.get('cursor'),
+                limit=criteria.get('limit', DEFAULT_PAGE_SIZE))
+        except (ValueError, TypeError) as e:
+            return {
+                'success': False,
+                'error': f"Error: {str(e)}"
+            }
+        logger.debug("Consulta de historial: %d filas", page['count'])
+        return {
+            'success': True,
+            **page
+        }
+
+    def get_metrics_text(self) -> str:
+        admission = self._admission.stats()
+        gauges = {
+            'calculator_in_flight': ('Solicitudes en ejecución', admission['in_flight']),
+            'calculator_queue_depth': ('Solicitudes en espera en la cola de admisión', admission['queue_depth']),
+        }
+        if self._cache is not None:
+            gauges['calculator_cache_entries'] = ('Entradas en el caché de resultados', len(self._cache))
+        return self.metrics.to_prometheus(gauges)
+
     def ping(self) -> dict:
         try:
-            print("Solicitud recibida: PING")
+            logger.debug("Solicitud recibida: PING")
             return {
                 'success': True,
                 'message': 'pong',
@@ -225,32 +938,217 @@ class CalculatorService:
             }
         except Exception as e:
             error_msg = f"Error en ping: {str(e)}"
-            print(f"Error en servidor: {error_msg}")
+            logger.error(error_msg)
             return {
                 'success': False,
                 'error': error_msg
             }
 
+    def set_log_level(self, level: str, name: str = '') -> dict:
+        # Cambia el nivel en caliente; con name se ajusta solo ese logger (p. ej. 'calculator_server')
+        try:
+            effective = set_log_level(level, name or None)
+            logger.info("Nivel de log de %s: %s", name or 'root', effective)
+            return {
+                'success': True,
+                'logger': name or 'root',
+                'level': effective
+            }
+        except (ValueError, TypeError) as e:
+            return {
+                'success': False,
+                'error': f"Error: {str(e)}"
+            }
+
+
+SERVING_MODES = ('single', 'thread', 'process')
+
+
+class LoggingRequestHandler(xmlrpc.server.SimpleXMLRPCRequestHandler):
+
+    def log_message(self, format, *args):
+        # El log de acceso HTTP pasa por la cola de logging en vez de escribir a stderr en el handler
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class MetricsRequestHandler(LoggingRequestHandler):
+    # Además de XML-RPC por POST, atiende GET /metrics en formato de texto de Prometheus
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.report_404()
+            return
+        body = self.server.calculator.get_metrics_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ThreadedXMLRPCServer(socketserver.ThreadingMixIn, xmlrpc.server.SimpleXMLRPCServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class PooledXMLRPCServer(xmlrpc.server.SimpleXMLRPCServer):
+    request_queue_size = 128
+
+    def __init__(self, addr, workers: int, **kwargs):
+        super().__init__(addr, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rpc-worker')
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
 
-def start_server(host='localhost', port=8000):
+def _register_service(server, calculator: CalculatorService):
+    server.register_instance(calculator)
+
+    server.register_function(calculator.add, 'add')
+    server.register_function(calculator.subtract, 'subtract')
+    server.register_function(calculator.multiply, 'multiply')
+    server.register_function(calculator.divide, 'divide')
+    server.register_function(calculator.evaluate_many, 'evaluate_many')
+    server.register_function(calculator.add_many, 'add_many')
+    server.register_function(calculator.subtract_many, 'subtract_many')
+    server.register_function(calculator.multiply_many, 'multiply_many')
+    server.register_function(calculator.divide_many, 'divide_many')
+    server.register_function(calculator.evaluate_batch, 'evaluate_batch')
+    server.register_function(calculator.evaluate, 'evaluate')
+    server.register_function(calculator.prepare, 'prepare')
+    server.register_function(calculator.evaluate_prepared, 'evaluate_prepared')
+    server.register_function(calculator.get_stats, 'get_stats')
+    server.register_function(calculator.call_idempotent, 'call_idempotent')
+    server.register_function(calculator.query_history, 'query_history')
+    server.register_function(calculator.get_metrics_text, 'get_metrics_text')
+    server.register_function(calculator.ping, 'ping')
+    server.register_function(calculator.set_log_level, 'set_log_level')
+    server.register_multicall_functions()
+
+
+def resolve_workers(mode: str, workers: Optional[int] = None) -> int:
+    # En modo thread, 0 crea un hilo por conexión (sin límite) y N > 0 usa un pool de N hilos
+    if mode not in SERVING_MODES:
+        raise ValueError(f"Modo de servicio inválido: {mode}")
+    if workers is None:
+        return 0 if mode == 'thread' else 1
+    if workers < 0:
+        raise ValueError("El número de workers no puede ser negativo")
+    if mode == 'thread':
+        return workers
+    if workers < 1:
+        raise ValueError(f"El modo '{mode}' requiere al menos 1 worker; 0 solo aplica a --mode thread")
+    if mode == 'single' and workers > 1:
+        raise ValueError("El modo 'single' atiende una solicitud a la vez; usa --mode thread o --mode process")
+    return workers
+
+
+def create_server(host='localhost', port=8000, mode='single', workers=None, calculator=None, **service_options):
+    workers = resolve_workers(mode, workers)
+    if mode == 'process' and service_options.get('journal'):
+        # Los procesos worker escribirían el mismo journal con contadores de id independientes
+        raise ValueError("El journal no está disponible en modo process; usa --mode thread")
+
+    if mode == 'thread':
+        if workers > 0:
+            server = PooledXMLRPCServer((host, port), workers, requestHandler=MetricsRequestHandler,
+                                        allow_none=True)
+        else:
+            server = ThreadedXMLRPCServer((host, port), requestHandler=MetricsRequestHandler, allow_none=True)
+    else:
+        server = xmlrpc.server.SimpleXMLRPCServer((host, port), requestHandler=MetricsRequestHandler,
+                                                  allow_none=True)
+
+    if calculator is None:
+        calculator = CalculatorService(**service_options)
+    _register_service(server, calculator)
+    server.calculator = calculator
+    return server
+
+
+def create_binary_server(host='localhost', port=8100, calculator=None, **service_options):
+    server = BinaryRPCServer((host, port))
+    if calculator is None:
+        calculator = CalculatorService(**service_options)
+    _register_service(server, calculator)
+    server.calculator = calculator
+    return server
+
+
+def _serve_prefork(server, workers: int):
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("El modo 'process' requiere os.fork (no disponible en esta plataforma)")
+
+    # Los procesos hijos comparten el socket de escucha; cada uno acepta conexiones por su cuenta
+    server.socket.setblocking(False)
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    logger.info(f"{workers} procesos worker iniciados: {children}")
     try:
-        server = xmlrpc.server.SimpleXMLRPCServer((host, port), allow_none=True)
-        
-        calculator = CalculatorService()
-        server.register_instance(calculator)
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def start_server(host='localhost', port=8000, mode='single', workers=None, binary_port=None, **service_options):
+    setup_logging(force=False)
+    try:
+        workers = resolve_workers(mode, workers)
+        server = create_server(host, port, mode, workers, **service_options)
         
-        server.register_function(calculator.add, 'add')
-        server.register_function(calculator.subtract, 'subtract')
-        server.register_function(calculator.multiply, 'multiply')
-        server.register_function(calculator.divide, 'divide')
-        server.register_function(calculator.get_stats, 'get_stats')
-        server.register_function(calculator.ping, 'ping')
+        if binary_port:
+            binary_server = create_binary_server(host, binary_port, server.calculator)
+            threading.Thread(target=binary_server.serve_forever, daemon=True).start()
+            logger.info(f"Protocolo binario disponible en calc://{host}:{binary_port}")
         
-        logger.info(f"Servidor RPC iniciado en {host}:{port}")
+        workers_label = 'un hilo por conexión' if mode == 'thread' and workers == 0 else workers
+        logger.info(f"Servidor RPC iniciado en {host}:{port} (modo: {mode}, workers: {workers_label})")
         logger.info("Operaciones disponibles: add, subtract, multiply, divide, get_stats, ping")
+        logger.info("Operaciones por lote: add_many, subtract_many, multiply_many, divide_many, evaluate_many, evaluate_batch")
+        logger.info("Expresiones: evaluate, prepare, evaluate_prepared")
+        logger.info(f"Modos numéricos: {', '.join(NUMERIC_MODES)}")
+        if service_options.get('history'):
+            logger.info("Historial: query_history")
+        logger.info("Reintentos seguros: call_idempotent")
         logger.info("Presiona Ctrl+C para detener el servidor")
         
-        server.serve_forever()
+        if mode == 'process':
+            _serve_prefork(server, workers)
+        else:
+            server.serve_forever()
         
     except KeyboardInterrupt:
         logger.info("Servidor detenido por el usuario")
@@ -260,13 +1158,85 @@ def start_server(host='localhost', port=8000):
         sys.exit(1)
 
 
+def add_service_arguments(parser):
+    parser.add_argument('--slots', type=int, default=1,
+                        help='Operaciones que se procesan en paralelo (default: 1)')
+    parser.add_argument('--queue-size', type=int, default=0,
+                        help='Solicitudes que pueden esperar un slot libre; 0 rechaza si está ocupado (default: 0)')
+    parser.add_argument('--queue-timeout', type=float, default=None,
+                        help='Segundos máximos de espera en cola por solicitud (default: sin límite)')
+    parser.add_argument('--latency', default='fixed:3',
+                        help='Modelo de latencia de procesamiento: zero, fixed:S, uniform:MIN,MAX, '
+                             'exponential:MEDIA[,MAX] o histogram:ARCHIVO.json (default: fixed:3)')
+    parser.add_argument('--pre-latency', default='zero',
+                        help='Modelo de latencia previa a la admisión, mismo formato que --latency (default: zero)')
+    parser.add_argument('--fault-rate', type=float, default=0.0,
+                        help='Probabilidad (0-1) de inyectar un fallo simulado por solicitud (default: 0)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Semilla para latencias y fallos reproducibles (default: aleatoria)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='Entradas máximas del caché de resultados; 0 lo deshabilita (default: 0)')
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help='Segundos de vida de cada resultado en caché (default: sin expiración)')
+    parser.add_argument('--cache-policy', choices=CACHE_POLICIES, default='lru',
+                        help='Política de desalojo del caché: lru o fifo (default: lru)')
+    parser.add_argument('--journal', default=None, metavar='DIRECTORIO',
+                        help='Directorio del journal de operaciones; sin él nada se guarda en disco (default: deshabilitado)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='interval',
+                        help='Cuándo forzar el journal a disco: always (cada grupo, la respuesta espera), '
+                             'interval (cada segundo) o never (el sistema operativo decide) (default: interval)')
+    parser.add_argument('--history', action='store_true',
+                        help='Mantener un índice del historial para query_history (requiere --journal)')
+    parser.add_argument('--idempotency-size', type=int, default=DEFAULT_IDEMPOTENCY_SIZE,
+                        help=f'Claves de idempotencia recordadas (default: {DEFAULT_IDEMPOTENCY_SIZE})')
+    parser.add_argument('--idempotency-ttl', type=float, default=DEFAULT_IDEMPOTENCY_TTL,
+                        help=f'Segundos que se recuerda cada clave de idempotencia (default: {DEFAULT_IDEMPOTENCY_TTL:g})')
+    parser.add_argument('--decimal-precision', type=int, default=DEFAULT_DECIMAL_PRECISION,
+                        help=f'Dígitos significativos del modo decimal (default: {DEFAULT_DECIMAL_PRECISION})')
+    parser.add_argument('--decimal-rounding', choices=DECIMAL_ROUNDINGS, default='ROUND_HALF_EVEN',
+                        help='Redondeo del modo decimal (default: ROUND_HALF_EVEN)')
+
+
+def service_options_from_args(args) -> dict:
+    return {
+        'slots': args.slots,
+        'max_queue': args.queue_size,
+        'queue_timeout': args.queue_timeout,
+        'latency': args.latency,
+        'pre_latency': args.pre_latency,
+        'fault_rate': args.fault_rate,
+        'seed': args.seed,
+        'cache_size': args.cache_size,
+        'cache_ttl': args.cache_ttl,
+        'cache_policy': args.cache_policy,
+        'decimal_precision': args.decimal_precision,
+        'decimal_rounding': args.decimal_rounding,
+        'journal': args.journal,
+        'fsync': args.fsync,
+        'history': args.history,
+        'idempotency_size': args.idempotency_size,
+        'idempotency_ttl': args.idempotency_ttl,
+    }
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Calculadora RPC Server')
     parser.add_argument('--host', default='localhost', help='Dirección del servidor (default: localhost)')
     parser.add_argument('--port', type=int, default=8000, help='Puerto del servidor (default: 8000)')
+    parser.add_argument('--mode', choices=SERVING_MODES, default='single',
+                        help='Modo de servicio: single, thread (hilos) o process (procesos pre-forked) (default: single)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Hilos o procesos worker para los modos thread/process; en thread, 0 crea un hilo '
+                             'por conexión (default: 0 en thread, 1 en process)')
+    parser.add_argument('--binary-port', type=int, default=None,
+                        help='Puerto adicional para el protocolo binario calc:// (default: deshabilitado)')
+    add_service_arguments(parser)
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
     
-    start_server(args.host, args.port)
+    start_server(args.host, args.port, args.mode, args.workers, args.binary_port,
+                 **service_options_from_args(args))
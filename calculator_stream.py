@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+import csv
+import json
+import sys
+import threading
+import time
+import logging
+import xmlrpc.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from calculator_constants import BUSY_ERROR, MAX_BATCH_SIZE, QUEUE_TIMEOUT_ERROR
+from calculator_logging import add_logging_arguments, setup_logging
+from calculator_transport import close_proxy, create_proxy
+from calculator_vector import normalize_operation
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = ('csv', 'jsonl')
+OUTPUT_FIELDS = ('record', 'op', 'a', 'b', 'success', 'result', 'error')
+HEADER_NAMES = ('op', 'operation', 'operacion')
+
+
+def parse_number(text):
+    if not isinstance(text, str):
+        return text
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def wire_number(value):
+    # XML-RPC solo transporta enteros de 32 bits: los demás viajan como float, igual que en los clientes
+    # interactivos. Un entero que ni siquiera cabe en un float se rechaza en su propio registro
+    if type(value) is int and not xmlrpc.client.MININT <= value <= xmlrpc.client.MAXINT:
+        return float(value)
+    return value
+
+
+def read_csv(stream) -> Iterator[tuple]:
+    # Filas op,a,b; la primera se ignora si es un encabezado
+    for line_number, row in enumerate(csv.reader(stream), 1):
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue
+        if line_number == 1 and row[0].strip().lower() in HEADER_NAMES:
+            continue
+        if len(row) != 3:
+            yield line_number, None, f"Se esperan 3 columnas (op,a,b), hay {len(row)}"
+            continue
+        yield line_number, [row[0].strip(), parse_number(row[1]), parse_number(row[2])], None
+
+
+def read_jsonl(stream) -> Iterator[tuple]:
+    # Una línea por registro: {"op": "add", "a": 1, "b": 2} o ["add", 1, 2]
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"JSON inválido: {str(e)}"
+            continue
+        if isinstance(record, dict):
+            record = [record.get('op', record.get('operation')), record.get('a'), record.get('b')]
+        if not isinstance(record, list) or len(record) != 3:
+            yield line_number, None, "Se espera un objeto {op, a, b} o una lista [op, a, b]"
+            continue
+        yield line_number, record, None
+
+
+def read_records(stream, input_format: str) -> Iterator[tuple]:
+    # Las operaciones desconocidas se rechazan aquí: evaluate_batch rechazaría el lote completo
+    reader = read_csv(stream) if input_format == 'csv' else read_jsonl(stream)
+    for line_number, record, error in reader:
+        if record is not None and normalize_operation(record[0]) is None:
+            yield line_number, record, f"Operación inválida: {record[0]}"
+            continue
+        if record is not None:
+            try:
+                record = [record[0], wire_number(record[1]), wire_number(record[2])]
+            except OverflowError:
+                yield line_number, record, "Número fuera de rango"
+                continue
+        yield line_number, record, error
+
+
+class ResultWriter:
+
+    def __init__(self, stream, output_format: str):
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == 'csv':
+            self._csv = csv.writer(stream)
+            self._csv.writerow(OUTPUT_FIELDS)
+
+    def write(self, line_number: int, record: Optional[list], response: dict):
+        op, a, b = record if record is not None else (None, None, None)
+        row = {
+            'record': line_number,
+            'op': op,
+            'a': a,
+            'b': b,
+            'success': bool(response.get('success')),
+            'result': response.get('result'),
+            'error': response.get('error'),
+        }
+        if self._csv is not None:
+            self._csv.writerow(['' if row[field] is None else row[field] for field in OUTPUT_FIELDS])
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+
+class StreamProcessor:
+    # Envía los registros en lotes (evaluate_batch) con hasta `window` lotes en vuelo y escribe los
+    # resultados en el orden de entrada a medida que llegan; la memoria depende de window * batch_size
+
+    def __init__(self, server_url: str, batch_size: int = 1000, window: int = 4, timeout: Optional[float] = 60.0,
+                 retries: int = 5, retry_delay: float = 0.1):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"El tamaño de lote debe estar entre 1 y {MAX_BATCH_SIZE:,}")
+        if window < 1:
+            raise ValueError("La ventana debe admitir al menos 1 lote en vuelo")
+        self.server_url = server_url
+        self.batch_size = batch_size
+        self.window = window
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.proxy = create_proxy(server_url, pool_size=window, timeout=timeout)
+        self.records = 0
+        self.errors = 0
+        self.batches = 0
+        self.busy_retries = 0
+        self._lock = threading.Lock()
+
+    def _call_batch(self, operations: list) -> dict:
+        # evaluate_batch, reintentando mientras el servidor esté ocupado
+        response = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.busy_retries += 1
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+            response = self.proxy.evaluate_batch(operations)
+            if response.get('success') or response.get('error') not in (BUSY_ERROR, QUEUE_TIMEOUT_ERROR):
+                break
+        return response
+
+    def _evaluate(self, operations: list) -> list:
+        # Un Fault se aísla dividiendo el lote en mitades: solo los registros que lo provocan reciben el error
+        # y sus vecinos conservan su propio resultado
+        try:
+            response = self._call_batch(operations)
+        except xmlrpc.client.Fault as e:
+            if len(operations) == 1:
+                return [{'success': False, 'error': f"Error del servidor: {e.faultString}"}]
+            middle = len(operations) // 2
+            return self._evaluate(operations[:middle]) + self._evaluate(operations[middle:])
+        except Exception as e:
+            # Sin respuesta del servidor no hay resultados por registro: todos reciben el error de transporte
+            return [{'success': False, 'error': f"Error de comunicación: {str(e)}"}] * len(operations)
+        if response.get('success'):
+            return response['results']
+        # El servidor rechazó el lote completo (ocupado o fallo): cada registro recibe el mismo error
+        return [{'success': False, 'error': response.get('error')}] * len(operations)
+
+    def _send(self, batch: list) -> list:
+        operations = [record for _, record, error in batch if error is None]
+        responses = self._evaluate(operations) if operations else []
+        results = iter(responses)
+        return [(line_number, record, {'success': False, 'error': error} if error is not None else next(results))
+                for line_number, record, error in batch]
+
+    def _drain(self, pending: deque, writer: ResultWriter):
+        for line_number, record, response in pending.popleft().result():
+            self.records += 1
+            if not response.get('success'):
+                self.errors += 1
+            writer.write(line_number, record, response)
+        writer.flush()
+
+    def _submit(self, executor: ThreadPoolExecutor, pending: deque, batch: list, writer: ResultWriter):
+        # Con la ventana llena se espera al lote más antiguo antes de leer más registros
+        if len(pending) >= self.window:
+            self._drain(pending, writer)
+        pending.append(executor.submit(self._send, batch))
+        self.batches += 1
+
+    def run(self, records: Iterator[tuple], writer: ResultWriter) -> dict:
+        start = time.perf_counter()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.window, thread_name_prefix='stream-batch') as executor:
+            batch = []
+            for item in records:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._submit(executor, pending, batch, writer)
+                    batch = []
+            if batch:
+                self._submit(executor, pending, batch, writer)
+            while pending:
+                self._drain(pending, writer)
+        elapsed = time.perf_counter() - start
+        return {
+            'records': self.records,
+            'errors': self.errors,
+            'batches': self.batches,
+            'busy_retries': self.busy_retries,
+            'elapsed': elapsed,
+            'records_per_second': self.records / elapsed if elapsed else 0.0,
+        }
+
+    def close(self):
+        close_proxy(self.proxy)
+
+
+def _detect_format(path: str, default: str = 'csv') -> str:
+    if path.endswith('.jsonl') or path.endswith('.ndjson') or path.endswith('.json'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Procesamiento por lotes de archivos CSV/JSONL con la Calculadora RPC')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='Archivo de entrada con registros op,a,b; "-" lee de stdin (default: -)')
+    parser.add_argument('--output', '-o', default='-', help='Archivo de salida; "-" escribe en stdout (default: -)')
+    parser.add_argument('--server', default='http://localhost:8000',
+                        help='URL del servidor (http:// o calc://) (default: http://localhost:8000)')
+    parser.add_argument('--format', choices=STREAM_FORMATS, default=None,
+                        help='Formato de entrada (default: según la extensión, csv para stdin)')
+    parser.add_argument('--output-format', choices=STREAM_FORMATS, default=None,
+                        help='Formato de salida (default: el mismo de la entrada)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Registros por solicitud evaluate_batch (default: 1000)')
+    parser.add_argument('--window', type=int, default=4,
+                        help='Lotes en vuelo al mismo tiempo (default: 4)')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='Timeout de cada lote en segundos (default: 60)')
+    parser.add_argument('--retries', type=int, default=5,
+                        help='Reintentos de un lote rechazado por servidor ocupado (default: 5)')
+    add_logging_arguments(parser)
+
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+    input_format = args.format or _detect_format(args.input)
+    output_format = args.output_format or (_detect_format(args.output, input_format)
+                                           if args.output != '-' else input_format)
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    processor = None
+    try:
+        processor = StreamProcessor(args.server, args.batch_size, args.window, args.timeout, args.retries)
+        summary = processor.run(read_records(source, input_format), ResultWriter(target, output_format))
+        logger.info(f"{summary['records']} registros en {summary['batches']} lotes, {summary['errors']} errores, "
+                    f"{summary['records_per_second']:.0f} registros/s")
+    except KeyboardInterrupt:
+        logger.info("Procesamiento cancelado por el usuario")
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"Error en el procesamiento: {str(e)}")
+        sys.exit(1)
+    finally:
+        if processor is not None:
+            processor.close()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == "__main__":
+    main()
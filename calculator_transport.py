@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+import logging
+import xmlrpc.client
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+from calculator_binary import BINARY_SCHEME, BinaryServerProxy
+
+INPROC_SCHEME = 'inproc'
+
+logger = logging.getLogger(__name__)
+
+
+class TimeoutTransport(xmlrpc.client.Transport):
+
+    def __init__(self, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        if self.timeout is not None:
+            conn.timeout = self.timeout
+        return conn
+
+
+class SafeTimeoutTransport(xmlrpc.client.SafeTransport):
+
+    def __init__(self, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        if self.timeout is not None:
+            conn.timeout = self.timeout
+        return conn
+
+
+def _create_single_proxy(url: str, timeout: Optional[float] = None):
+    scheme = urlsplit(url).scheme.lower()
+    if scheme == 'http':
+        if timeout is None:
+            return xmlrpc.client.ServerProxy(url)
+        return xmlrpc.client.ServerProxy(url, transport=TimeoutTransport(timeout))
+    if scheme == 'https':
+        if timeout is None:
+            return xmlrpc.client.ServerProxy(url)
+        return xmlrpc.client.ServerProxy(url, transport=SafeTimeoutTransport(timeout))
+    if scheme == BINARY_SCHEME:
+        return BinaryServerProxy(url, timeout=timeout)
+    if scheme == INPROC_SCHEME:
+        # Importación diferida: solo quien usa inproc:// carga el servidor en su proceso
+        from calculator_inproc import InProcessServerProxy
+        return InProcessServerProxy(url)
+    raise ValueError(f"Esquema de URL no soportado: {scheme or url}")
+
+
+def close_proxy(proxy):
+    try:
+        if isinstance(proxy, xmlrpc.client.ServerProxy):
+            proxy('close')()
+        elif hasattr(proxy, 'close'):
+            proxy.close()
+    except Exception:
+        pass
+
+
+def resolve_method(proxy, name: str):
+    target = proxy
+    for part in name.split('.'):
+        target = getattr(target, part)
+    return target
+
+
+class ConnectionPool:
+
+    def __init__(self, url: str, size: int = 4, idle_timeout: Optional[float] = 60.0,
+                 health_check_interval: Optional[float] = 30.0, timeout: Optional[float] = None):
+        if size < 1:
+            raise ValueError("El pool debe tener al menos 1 conexión")
+        self.url = url
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = []  # (proxy, último uso, último chequeo); el final de la lista es la más reciente
+        self._open = 0
+        self._closed = False
+        self.created = 0
+        self.evicted = 0
+        self.health_failures = 0
+
+    def _evict_idle(self, now: float) -> list:
+        if self.idle_timeout is None:
+            return []
+        expired = [entry for entry in self._idle if now - entry[1] > self.idle_timeout]
+        if expired:
+            self._idle = [entry for entry in self._idle if now - entry[1] <= self.idle_timeout]
+            self._open -= len(expired)
+            self.evicted += len(expired)
+        return expired
+
+    def _healthy(self, proxy) -> bool:
+        try:
+            response = proxy.ping()
+            return isinstance(response, dict) and bool(response.get('success'))
+        except Exception:
+            return False
+
+    def acquire(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("El pool de conexiones está cerrado")
+                expired = self._evict_idle(time.monotonic())
+                entry = None
+                create = False
+                while entry is None and not create:
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif self._open < self.size:
+                        self._open += 1
+                        create = True
+                    else:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError("Tiempo de espera agotado esperando una conexión del pool")
+                        self._cond.wait(remaining)
+            for proxy, _, _ in expired:
+                close_proxy(proxy)
+
+            if create:
+                try:
+                    proxy = _create_single_proxy(self.url, self.timeout)
+                except Exception:
+                    self._discard()
+                    raise
+                with self._cond:
+                    self.created += 1
+                return proxy, time.monotonic()
+
+            proxy, _, last_checked = entry
+            if self.health_check_interval is not None and time.monotonic() - last_checked > self.health_check_interval:
+                if not self._healthy(proxy):
+                    self.health_failures += 1
+                    logger.warning(f"Conexión del pool a {self.url} no responde, se descarta")
+                    close_proxy(proxy)
+                    self._discard()
+                    continue
+                last_checked = time.monotonic()
+            return proxy, last_checked
+
+    def release(self, proxy, last_checked: float, broken: bool = False):
+        if broken:
+            close_proxy(proxy)
+            self._discard()
+            return
+        with self._cond:
+            if self._closed:
+                self._open -= 1
+                close_proxy(proxy)
+                return
+            self._idle.append((proxy, time.monotonic(), last_checked))
+            self._cond.notify()
+
+    def _discard(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        proxy, last_checked = self.acquire(timeout)
+        broken = False
+        try:
+            yield proxy
+        except xmlrpc.client.Fault:
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(proxy, last_checked, broken)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for proxy, _, _ in idle:
+            close_proxy(proxy)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'url': self.url,
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'created': self.created,
+                'evicted': self.evicted,
+                'health_failures': self.health_failures,
+            }
+
+
+class _PooledMethod:
+
+    def __init__(self, pool: ConnectionPool, name: str):
+        self._pool = pool
+        self._name = name
+
+    def __getattr__(self, name: str) -> '_PooledMethod':
+        return _PooledMethod(self._pool, f"{self._name}.{name}")
+
+    def __call__(self, *args):
+        with self._pool.connection() as proxy:
+            return resolve_method(proxy, self._name)(*args)
+
+
+class PooledServerProxy:
+    # Se comporta como un ServerProxy, pero cada llamada toma una conexión exclusiva del pool
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def __getattr__(self, name: str) -> _PooledMethod:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _PooledMethod(self.pool, name)
+
+    def close(self):
+        self.pool.close()
+
+
+def create_proxy(url: str, pool_size: int = 0, timeout: Optional[float] = None, **pool_options):
+    # Selecciona el transporte según el esquema de la URL: http(s):// -> XML-RPC, calc:// -> binario,
+    # inproc:// -> llamada directa a un servicio registrado en este proceso (sin conexión que agrupar)
+    # Con pool_size > 0 las llamadas se reparten en un pool de conexiones persistentes seguro entre hilos
+    if pool_size > 0 and urlsplit(url).scheme.lower() != INPROC_SCHEME:
+        return PooledServerProxy(ConnectionPool(url, pool_size, timeout=timeout, **pool_options))
+    return _create_single_proxy(url, timeout)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import math
+import operator
+import xmlrpc.client
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIVISION_BY_ZERO_ERROR = "Error: División por cero no permitida"
+INVALID_INPUT_ERROR = 'entradas inválidas'
+RESULT_RANGE_ERROR = "Error: Resultado fuera de rango"
+
+OPERATIONS = {
+    'add': ('+', operator.add),
+    'subtract': ('-', operator.sub),
+    'multiply': ('*', operator.mul),
+    'divide': ('/', operator.truediv),
+}
+
+OPERATION_ALIASES = {
+    '+': 'add', 'suma': 'add', 'sum': 'add',
+    '-': 'subtract', 'resta': 'subtract', 'sub': 'subtract',
+    '*': 'multiply', 'multiplicacion': 'multiply', 'mul': 'multiply',
+    '/': 'divide', 'division': 'divide', 'div': 'divide',
+}
+
+# Por debajo de este tamaño el costo de crear arrays de NumPy supera la ganancia
+NUMPY_MIN_SIZE = 64
+INT64_LIMIT = 2 ** 63
+# Mayor entero que un float64 representa sin redondeo
+FLOAT_EXACT_LIMIT = 2 ** 53
+XMLRPC_MININT = xmlrpc.client.MININT
+XMLRPC_MAXINT = xmlrpc.client.MAXINT
+
+
+def normalize_operation(code) -> Optional[str]:
+    if not isinstance(code, str):
+        return None
+    code = code.strip().lower()
+    if code in OPERATIONS:
+        return code
+    return OPERATION_ALIASES.get(code)
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+
+def wire_result(value):
+    # XML-RPC solo transporta enteros de 32 bits: un resultado entero mayor viaja como float, igual que
+    # cualquier otro resultado del modo float. None si no es finito o no cabe ni en un float
+    if type(value) is int and not XMLRPC_MININT <= value <= XMLRPC_MAXINT:
+        try:
+            value = float(value)
+        except OverflowError:
+            return None
+    if type(value) is float and not math.isfinite(value):
+        return None
+    return value
+
+
+def max_magnitude(values) -> int:
+    return max(map(abs, values), default=0)
+
+
+def integer_dtype(bound: int, has_division: bool):
+    # Tipo de NumPy con el que un cálculo entre enteros da lo mismo que en Python, o None si no hay:
+    # int64 mientras ningún valor intermedio pueda llegar a 2**63 (int64 desborda sin avisar) y, con
+    # divisiones, float64 si todos los enteros caben exactos en un float
+    if has_division:
+        return np.float64 if bound <= FLOAT_EXACT_LIMIT else None
+    return np.int64 if bound < INT64_LIMIT else None
+
+
+def _numpy_dtype(operation: str, a_values: list, b_values: list):
+    if not (all(type(x) is int for x in a_values) and all(type(x) is int for x in b_values)):
+        return np.float64
+    a_bound, b_bound = max_magnitude(a_values), max_magnitude(b_values)
+    if operation == 'multiply':
+        bound = a_bound * b_bound
+    elif operation == 'divide':
+        bound = max(a_bound, b_bound)
+    else:
+        bound = a_bound + b_bound
+    return integer_dtype(bound, operation == 'divide')
+
+
+def _numpy_kernel(operation: str, a_values: list, b_values: list, dtype) -> list:
+    a = np.asarray(a_values, dtype=dtype)
+    b = np.asarray(b_values, dtype=dtype)
+    # Los resultados no finitos se rechazan después por elemento (wire_result), sin avisos de NumPy
+    with np.errstate(over='ignore', invalid='ignore'):
+        if operation == 'add':
+            out = a + b
+        elif operation == 'subtract':
+            out = a - b
+        elif operation == 'multiply':
+            out = a * b
+        else:
+            zero = b == 0
+            out = a / np.where(zero, 1, b)
+    if operation == 'divide':
+        out = out.tolist()
+        for i in np.flatnonzero(zero).tolist():
+            out[i] = None
+        return out
+    return out.tolist()
+
+
+def evaluate_vector(operation: str, a_values: list, b_values: list, use_numpy: Optional[bool] = None) -> list:
+    # Evalúa a[i] op b[i] para todos los elementos; las divisiones por cero quedan como None
+    if len(a_values) != len(b_values):
+        raise ValueError("Las listas de operandos deben tener la misma longitud")
+    if use_numpy is None:
+        use_numpy = np is not None and len(a_values) >= NUMPY_MIN_SIZE
+    if use_numpy and np is not None:
+        # Con enteros que no caben en el tipo de NumPy se sigue por Python, que los calcula exactos
+        dtype = _numpy_dtype(operation, a_values, b_values)
+        if dtype is not None:
+            return _numpy_kernel(operation, a_values, b_values, dtype)
+    if operation == 'divide':
+        return [a / b if b != 0 else None for a, b in zip(a_values, b_values)]
+    fn = OPERATIONS[operation][1]
+    return [fn(a, b) for a, b in zip(a_values, b_values)]
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
-import xmlrpc.client
+import sys
 import time
 import threading
-from calculator_server import CalculatorService, start_server
+from calculator_server import start_server
+from calculator_inproc import register_service
+from calculator_transport import create_proxy
+
+DEMO_HTTP_URL = "http://localhost:8001"
+DEMO_INPROC_URL = "inproc://demo"
 
 
 def demo_server():
@@ -14,11 +19,21 @@ def demo_server():
         print(f"Error al iniciar servidor de demo: {str(e)}")
 
 
-def demo_client():
-    time.sleep(2)
-    
+def wait_for_server(url: str, timeout: float = 10.0) -> bool:
+    # Reintenta el ping hasta que el servidor acepta conexiones, en lugar de esperar un tiempo fijo
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if create_proxy(url, timeout=1.0).ping().get('success'):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def demo_client(url: str):
     try:
-        proxy = xmlrpc.client.ServerProxy("http://localhost:8001")
+        proxy = create_proxy(url)
         
         ping_result = proxy.ping()
         print(f"Ping al servidor: {ping_result}")
@@ -60,7 +75,7 @@ def main():
     print("Demo de la Calculadora RPC")
     print("="*50)
     print("Esta demo muestra:")
-    print("- Inicio automático del servidor")
+    print("- Inicio automático del servidor (en este proceso; --http usa un servidor HTTP real)")
     print("- Conexión del cliente")
     print("- Realización de operaciones")
     print("- Manejo de errores")
@@ -68,10 +83,16 @@ def main():
     print("="*50)
     
     try:
-        server_thread = threading.Thread(target=demo_server, daemon=True)
-        server_thread.start()
-        
-        demo_client()
+        if '--http' in sys.argv[1:]:
+            server_thread = threading.Thread(target=demo_server, daemon=True)
+            server_thread.start()
+            if not wait_for_server(DEMO_HTTP_URL):
+                print("El servidor de demo no respondió a tiempo")
+                return
+            demo_client(DEMO_HTTP_URL)
+        else:
+            register_service('demo')
+            demo_client(DEMO_INPROC_URL)
         
         print("\nDemo completada!")
         print("Para usar la calculadora interactivamente:")
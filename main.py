@@ -11,11 +11,12 @@ def main():
     print("2. Cliente local")
     print("3. Cliente remoto")
     print("4. Demo automática")
-    print("5. Salir")
+    print("5. Calculadora embebida (sin servidor)")
+    print("6. Salir")
     
     while True:
         try:
-            choice = input("\nOpción (1-5): ").strip()
+            choice = input("\nOpción (1-6): ").strip()
             
             if choice == '1':
                 print("Iniciando servidor...")
@@ -46,10 +47,17 @@ def main():
                     print(f"Error al ejecutar demo: {str(e)}")
                 break
             elif choice == '5':
+                print("Iniciando calculadora embebida...")
+                try:
+                    os.system("python3 calculator_client_local.py --embedded")
+                except Exception as e:
+                    print(f"Error al iniciar calculadora embebida: {str(e)}")
+                break
+            elif choice == '6':
                 print("Hasta luego!")
                 sys.exit(0)
             else:
-                print("Error: Opción invalida. Selecciona 1-5.")
+                print("Error: Opción invalida. Selecciona 1-6.")
         except KeyboardInterrupt:
             print("\nHasta luego!")
             sys.exit(0)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Se ejecuta en un intérprete nuevo: el logging del proceso de pruebas ya pudo ser configurado por otro módulo
+HOST_SCRIPT = '''
+import logging
+logging.basicConfig(level=logging.WARNING)
+root = logging.getLogger()
+before = list(root.handlers)
+
+from calculator_inproc import register_service
+from calculator_transport import create_proxy
+
+register_service('host', latency='zero')
+result = create_proxy('inproc://host').add(2, 3)['result']
+assert root.handlers == before, root.handlers
+assert root.level == logging.WARNING, logging.getLevelName(root.level)
+print(result)
+'''
+
+
+class EmbeddedLoggingTest(unittest.TestCase):
+
+    def test_import_keeps_host_logging(self):
+        here = os.path.dirname(os.path.abspath(__file__))
+        completed = subprocess.run([sys.executable, '-c', HOST_SCRIPT], cwd=here, capture_output=True, text=True,
+                                   timeout=60)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip(), '5')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+import xmlrpc.client
+
+from calculator_server import create_server
+from calculator_vector import RESULT_RANGE_ERROR
+
+
+class WireResultTest(unittest.TestCase):
+    # Las llamadas pasan por un SimpleXMLRPCServer real: un resultado que XML-RPC no puede serializar
+    # haría fallar la respuesta completa aunque el servicio la haya calculado bien
+
+    def setUp(self):
+        self.server = create_server('localhost', 0, 'single', latency='zero')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.proxy = xmlrpc.client.ServerProxy(f"http://{host}:{port}", allow_none=True)
+
+    def tearDown(self):
+        self.proxy('close')()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_large_integer_product(self):
+        response = self.proxy.multiply(100000, 100000)
+        self.assertTrue(response['success'])
+        self.assertEqual(response['result'], 10 ** 10)
+
+    def test_multiply_many_out_of_int32(self):
+        response = self.proxy.multiply_many([100000] * 3, [100000] * 3)
+        self.assertTrue(response['success'])
+        self.assertEqual([item['result'] for item in response['results']], [10 ** 10] * 3)
+
+    def test_evaluate_batch_keeps_neighbours(self):
+        response = self.proxy.evaluate_batch([['mul', 100000, 100000], ['add', 1, 2], ['mul', 1e300, 1e300]])
+        self.assertTrue(response['success'])
+        self.assertEqual(response['results'][0]['result'], 10 ** 10)
+        self.assertEqual(response['results'][1]['result'], 3)
+        self.assertFalse(response['results'][2]['success'])
+        self.assertEqual(response['results'][2]['error'], RESULT_RANGE_ERROR)
+        self.assertEqual(response['errors'], 1)
+
+    def test_non_finite_result_is_rejected(self):
+        response = self.proxy.multiply(1e300, 1e300)
+        self.assertFalse(response['success'])
+        self.assertEqual(response['error'], RESULT_RANGE_ERROR)
+
+    def test_expression_results(self):
+        self.assertEqual(self.proxy.evaluate('100000*100000')['result'], 10 ** 10)
+        self.assertEqual(self.proxy.evaluate('a*b', {'a': 100000, 'b': 100000})['result'], 10 ** 10)
+        response = self.proxy.evaluate('x/y', {'x': 1e300, 'y': 1e-300})
+        self.assertFalse(response['success'])
+        self.assertEqual(response['error'], RESULT_RANGE_ERROR)
+        self.assertFalse(self.proxy.evaluate('1e309')['success'])
+
+    def test_prepared_rows_out_of_int32(self):
+        handle = self.proxy.prepare('a * b')['handle']
+        for size in (3, 100):
+            columns = {'a': [100000] * size, 'b': [100000] * (size - 1) + [1e308]}
+            response = self.proxy.evaluate_prepared(handle, columns)
+            self.assertTrue(response['success'])
+            self.assertEqual(response['results'][0], 10 ** 10)
+            self.assertEqual(response['errors'], [{'row': size - 1, 'error': RESULT_RANGE_ERROR}])
+
+    def test_prepare_handles_are_distinct(self):
+        self.assertNotEqual(self.proxy.prepare('inf')['handle'], self.proxy.prepare('1e308')['handle'])
+        self.assertEqual(self.proxy.prepare('a+b')['handle'], self.proxy.prepare('a + b')['handle'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import threading
+import unittest
+import xmlrpc.client
+
+from calculator_server import create_server
+from calculator_stream import ResultWriter, StreamProcessor, read_records
+
+
+class StreamRecordsTest(unittest.TestCase):
+    # Un registro problemático no debe hacer fallar a los demás registros de su lote
+
+    def setUp(self):
+        self.server = create_server('localhost', 0, 'thread', 0, latency='zero')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.processor = StreamProcessor(f"http://{host}:{port}", batch_size=10)
+
+    def tearDown(self):
+        self.processor.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _run(self, text: str) -> list:
+        output = io.StringIO()
+        self.processor.run(read_records(io.StringIO(text), 'csv'), ResultWriter(output, 'jsonl'))
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_each_record_keeps_its_result(self):
+        rows = self._run("add,1,2\nmultiply,100000,100000\ndivide,1,0\nadd,x,1\n")
+        self.assertEqual([row['success'] for row in rows], [True, True, False, False])
+        self.assertEqual(rows[0]['result'], 3)
+        self.assertEqual(rows[1]['result'], 10 ** 10)
+        self.assertIn('División por cero', rows[2]['error'])
+
+    def test_fault_only_fails_its_record(self):
+        real = self.processor.proxy
+
+        class FaultyProxy:
+            def evaluate_batch(self, operations):
+                if any(op[1] == 13 for op in operations):
+                    raise xmlrpc.client.Fault(1, 'OverflowError: int exceeds XML-RPC limits')
+                return real.evaluate_batch(operations)
+
+        self.processor.proxy = FaultyProxy()
+        try:
+            rows = self._run(''.join(f"add,{i},1\n" for i in range(10, 16)))
+        finally:
+            self.processor.proxy = real
+        self.assertEqual([row['success'] for row in rows], [True, True, True, False, True, True])
+        self.assertIn('OverflowError', rows[3]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()